@@ -0,0 +1,130 @@
+# coding=utf-8
+"""控制器热点路径：ENB 应用、禁用、安装、列表刷新，分辨率设置，教程过滤和版本比较"""
+
+import os
+import random
+
+import harness
+from common import case, write_preset, write_display_tweaks, FakeLineEdit, FakeCheckBox
+
+
+PRESET_COUNT = 30 # ENB备份 中的预设数量
+
+
+def _enb_workspace(ctx, presets=2):
+    """在游戏目录的 ENB备份 中生成预设，并准备 ENB 窗口"""
+    game_path = ctx.path("game")
+    for i in range(presets):
+        write_preset(os.path.join(game_path, "ENB备份", f"Preset{i:02d}"), seed=i)
+    assert harness.open_enb_window(ctx.controller, game_path)
+    return game_path
+
+
+def _apply(ctx, name):
+    controller = ctx.controller
+    controller.enb_list.select(name)
+    controller.start_enb()
+    harness.wait_for_job(controller)
+
+
+@case("start_enb")
+def bench_start_enb(ctx, repeat):
+    _enb_workspace(ctx)
+    _apply(ctx, "Preset00") # 首次部署不计入
+    for i in range(repeat):
+        name = f"Preset{(i + 1) % 2:02d}"
+        with ctx.measure("start_enb.switch"):
+            _apply(ctx, name)
+        with ctx.measure("start_enb.unchanged"):
+            _apply(ctx, name)
+
+
+@case("stop_enb")
+def bench_stop_enb(ctx, repeat):
+    _enb_workspace(ctx, presets=1)
+    for _ in range(repeat):
+        _apply(ctx, "Preset00")
+        with ctx.measure("stop_enb"):
+            ctx.controller.stop_enb()
+            harness.wait_for_job(ctx.controller)
+
+
+@case("install_enb")
+def bench_install_enb(ctx, repeat):
+    _enb_workspace(ctx, presets=1)
+    ctx.dialogs.directory = write_preset(ctx.path("download", "NewPreset"), seed=99)
+    ctx.dialogs.text = "NewPreset"
+    for _ in range(repeat):
+        # 第一次为新建，之后每次都覆盖同名预设
+        with ctx.measure("install_enb"):
+            ctx.controller.install_enb()
+            harness.wait_for_job(ctx.controller)
+
+
+@case("refresh_enb_list")
+def bench_refresh_enb_list(ctx, repeat):
+    game_path = _enb_workspace(ctx, presets=PRESET_COUNT)
+    index_path = os.path.join(game_path, "ENB备份", ".enb_index.json")
+    for _ in range(repeat):
+        with ctx.measure("refresh_enb_list.warm"):
+            ctx.controller.refresh_enb_list()
+        os.remove(index_path)
+        ctx.controller.enb_index.presets = {}
+        with ctx.measure("refresh_enb_list.cold"):
+            ctx.controller.refresh_enb_list()
+
+
+@case("apply_resolution_settings")
+def bench_apply_resolution_settings(ctx, repeat):
+    controller = ctx.controller
+    config_path = write_display_tweaks(
+        os.path.join(ctx.organizer.modsPath(), "显示修复-SSE Display Tweaks", "SKSE", "Plugins", "SSEDisplayTweaks.ini"),
+        random.Random(1)
+    )
+    controller.current_res_value = FakeLineEdit()
+    controller.res_input = FakeLineEdit()
+    controller.fullscreen_check = FakeCheckBox()
+    controller.borderless_check = FakeCheckBox()
+    controller.auto_res_check = FakeCheckBox()
+    for i in range(repeat):
+        with ctx.measure("resolution.open"):
+            controller._refresh_resolution_window()
+        controller.res_input.setText(("1920x1080", "2560x1440")[i % 2])
+        with ctx.measure("resolution.apply"):
+            controller.apply_resolution_settings(config_path)
+        controller._flush_pending_settings_mirrors()
+
+
+@case("tutorial_filter")
+def bench_tutorial_filter(ctx, repeat):
+    tutorial_index = ctx.import_plugin("tutorial_index")
+    catalog = harness.make_catalog(20, 500)
+    for _ in range(repeat):
+        with ctx.measure("tutorial_index.build"):
+            index = tutorial_index.TutorialIndex(catalog)
+    model = tutorial_index.TutorialListModel(index)
+    proxy = tutorial_index.TutorialFilterProxy(index)
+    proxy.setSourceModel(model)
+    typed = "enb画质"
+    for _ in range(repeat):
+        # 模拟逐字输入，每次按键过滤一次
+        for end in range(1, len(typed) + 1):
+            with ctx.measure("tutorial_filter.keystroke"):
+                proxy.set_filter(typed[:end], tutorial_index.ALL_CATEGORIES)
+        with ctx.measure("tutorial_filter.clear"):
+            proxy.set_filter("", "分类0")
+
+
+@case("compare_versions")
+def bench_compare_versions(ctx, repeat):
+    rng = random.Random(2)
+    pairs = [
+        (".".join(str(rng.randint(0, 20)) for _ in range(rng.randint(1, 4))),
+         ".".join(str(rng.randint(0, 20)) for _ in range(rng.randint(1, 4))))
+        for _ in range(10000)
+    ]
+    compare = ctx.controller._compare_versions
+    for _ in range(repeat):
+        with ctx.measure("compare_versions.x10000"):
+            for left, right in pairs:
+                compare(left, right)
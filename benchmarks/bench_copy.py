@@ -0,0 +1,37 @@
+# coding=utf-8
+"""并发复制引擎与 shutil.copytree 的对比：大量小文件和少量大文件两种预设"""
+
+import os
+import random
+import shutil
+
+from common import case, write_file, write_preset
+
+
+WORKER_COUNTS = (1, 4, 8)
+
+
+def _large_preset(root, files=8, size=8 * 1024 * 1024):
+    rng = random.Random(7)
+    for i in range(files):
+        write_file(os.path.join(root, "reshade-shaders", "Textures", f"lut{i}.dds"), rng.randbytes(size))
+    return root
+
+
+@case("copy")
+def bench_copy(ctx, repeat):
+    enb_deploy = ctx.import_plugin("enb_deploy")
+    sources = {
+        "small": write_preset(ctx.path("small"), seed=1, shaders=1600, shader_size=4 * 1024),
+        "large": _large_preset(ctx.path("large")),
+    }
+    target = ctx.path("target")
+    for kind, source in sources.items():
+        for i in range(repeat):
+            with ctx.measure(f"copy.{kind}.copytree"):
+                shutil.copytree(source, target)
+            shutil.rmtree(target)
+            for workers in WORKER_COUNTS:
+                with ctx.measure(f"copy.{kind}.workers{workers}"):
+                    enb_deploy.copy_tree(source, target, workers=workers)
+                shutil.rmtree(target)
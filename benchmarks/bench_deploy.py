@@ -0,0 +1,58 @@
+# coding=utf-8
+"""ENB 增量部署与“全部删除再全部复制”的对比（两个数千文件、约一成不同的预设）"""
+
+import os
+import shutil
+
+from common import case, write_preset
+
+
+SHADERS = 2400 # 每个预设约 3000 个文件
+SHADER_SIZE = 16 * 1024
+DIFFER_EVERY = 10
+
+
+def _full_copy(preset_path, game_path, entries):
+    """增量部署之前的做法：删除游戏目录中所有 ENB 文件，再逐项复制整个预设"""
+    for entry in entries:
+        target = os.path.join(game_path, entry)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        elif os.path.exists(target):
+            os.remove(target)
+    for entry in entries:
+        source = os.path.join(preset_path, entry)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(game_path, entry))
+        elif os.path.exists(source):
+            shutil.copy2(source, os.path.join(game_path, entry))
+
+
+@case("deploy")
+def bench_deploy(ctx, repeat):
+    enb_deploy = ctx.import_plugin("enb_deploy")
+    entries = ["enbseries", "reshade-shaders", "d3d11.dll", "d3dcompiler_46e.dll", "enblocal.ini", "enbseries.ini", "dxgi.dll"]
+    game_path = ctx.path("game")
+    state_dir = ctx.path("game", "ENB备份")
+    presets = [
+        write_preset(ctx.path("game", "ENB备份", f"Preset{i}"), seed=i, shaders=SHADERS, shader_size=SHADER_SIZE,
+                     differ_every=DIFFER_EVERY)
+        for i in range(2)
+    ]
+    os.makedirs(game_path, exist_ok=True)
+
+    for i in range(repeat):
+        with ctx.measure("deploy.full_copy"):
+            _full_copy(presets[i % 2], game_path, entries)
+    enb_deploy.remove_entries(game_path, entries, state_dir)
+
+    # 第一次部署需要生成清单并复制所有文件，不计入
+    enb_deploy.deploy_preset(presets[0], game_path, entries, state_dir)
+    for i in range(repeat):
+        preset = presets[(i + 1) % 2]
+        with ctx.measure("deploy.incremental_switch") as fields:
+            stats = enb_deploy.deploy_preset(preset, game_path, entries, state_dir)
+            fields["files_copied"] = stats.files_copied
+        print(f"切换到 {os.path.basename(preset)}: {stats.summary()}")
+        with ctx.measure("deploy.unchanged"):
+            enb_deploy.deploy_preset(preset, game_path, entries, state_dir)
@@ -0,0 +1,33 @@
+# coding=utf-8
+"""共享连接池的 HttpClient 与每次新建连接的 urlopen 的对比（本地 HTTP 服务器）"""
+
+import json
+import urllib.request
+
+import harness
+from common import case
+
+
+REQUESTS = 50 # 每次测量连续发出的请求数
+BODY = json.dumps({"plugin": {"version": "9.9.9"}, "changelog": "x" * 4096})
+
+
+@case("http")
+def bench_http(ctx, repeat):
+    http_client = ctx.import_plugin("http_client")
+    with harness.LocalServer({"/manifest": harness.static(BODY)}) as server:
+        url = server.url("/manifest")
+        for _ in range(repeat):
+            with ctx.measure(f"http.urlopen.x{REQUESTS}"):
+                for _ in range(REQUESTS):
+                    with urllib.request.urlopen(url, timeout=10) as response:
+                        response.read()
+
+            client = http_client.HttpClient()
+            with ctx.measure(f"http.pooled.x{REQUESTS}") as fields:
+                for _ in range(REQUESTS):
+                    client.get_bytes(url)
+                fields["connections"] = client.connections_opened
+            client.close()
+            if client.connections_opened != 1:
+                print(f"警告: 连接池为 {REQUESTS} 个请求打开了 {client.connections_opened} 个连接")
@@ -0,0 +1,51 @@
+# coding=utf-8
+"""保留原始行的 IniDocument 与 configparser 的对比：读取、修改 [Render] 并写回 SSEDisplayTweaks.ini"""
+
+import random
+import configparser
+
+from common import case, write_display_tweaks
+
+
+SIZES = {"typical": (30, 25), "large": (200, 40)} # (节数, 每节键数)
+
+
+def _configparser_cycle(path, resolution):
+    """改用 IniDocument 之前的做法：打开窗口时读取一次，确认时再读取一次并整体写回"""
+    config = configparser.ConfigParser()
+    config.read(path, encoding='utf-8')
+    config.get("Render", "Resolution", fallback="未设置")
+    config.getboolean("Render", "Fullscreen", fallback=False)
+    config = configparser.ConfigParser()
+    config.read(path, encoding='utf-8-sig')
+    config.set("Render", "Resolution", resolution)
+    config.set("Render", "Fullscreen", "false")
+    with open(path, 'w', encoding='utf-8') as f:
+        config.write(f)
+
+
+def _ini_document_cycle(ini_editor, path, resolution):
+    config = ini_editor.IniDocument.load(path)
+    config.get("Render", "Resolution", fallback="未设置")
+    config.getboolean("Render", "Fullscreen", fallback=False)
+    config.set("Render", "Resolution", resolution)
+    config.set("Render", "Fullscreen", "false")
+    config.save()
+
+
+@case("ini")
+def bench_ini(ctx, repeat):
+    ini_editor = ctx.import_plugin("ini_editor")
+    for size, (sections, keys) in SIZES.items():
+        paths = {
+            kind: write_display_tweaks(ctx.path(size, kind, "SSEDisplayTweaks.ini"), random.Random(3), sections, keys)
+            for kind in ("configparser", "ini_editor")
+        }
+        for i in range(repeat):
+            resolution = ("1920x1080", "2560x1440")[i % 2]
+            with ctx.measure(f"ini.{size}.configparser"):
+                _configparser_cycle(paths["configparser"], resolution)
+            with ctx.measure(f"ini.{size}.ini_editor"):
+                _ini_document_cycle(ini_editor, paths["ini_editor"], resolution)
+            with ctx.measure(f"ini.{size}.ini_editor_unchanged"):
+                _ini_document_cycle(ini_editor, paths["ini_editor"], resolution)
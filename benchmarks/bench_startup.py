@@ -0,0 +1,13 @@
+# coding=utf-8
+"""插件启动耗时（新进程中的模块导入和 init），与其他用例一起按版本保存和比较"""
+
+from common import BENCH_PREFIX, case
+from startup import measure_startup
+
+
+@case("startup")
+def bench_startup(ctx, repeat):
+    for result in measure_startup(repeat):
+        ctx.tracer.record(BENCH_PREFIX + "startup.import", result["import_ms"])
+        ctx.tracer.record(BENCH_PREFIX + "startup.init", result["init_ms"])
+        ctx.tracer.record(BENCH_PREFIX + "startup.total", result["import_ms"] + result["init_ms"])
@@ -0,0 +1,147 @@
+# coding=utf-8
+"""
+基准测试共用的工具。
+
+每个用例在独立的临时目录中加载插件（mobase、Qt 替身或 offscreen 的真实 Qt），
+用 FakeOrganizer 初始化控制器，并把测量结果写入插件自己的 Tracer 日志，
+由 run.py 汇总为 p50 / p95 并按插件版本保存、比较。
+"""
+
+import os
+import sys
+import time
+import random
+import contextlib
+from importlib import import_module
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "tests", "support"))
+
+import harness
+
+
+CASES = [] # [(名称, 函数)]，函数签名为 func(ctx, repeat)
+BENCH_PREFIX = "bench." # 用例自行计时的操作名前缀，与插件内部 span 区分
+TRACE_MAX_BYTES = 1 << 30 # 基准日志不轮换
+
+
+def case(name):
+    """注册一个基准用例"""
+    def register(func):
+        CASES.append((name, func))
+        return func
+    return register
+
+
+class FakeLineEdit:
+    def __init__(self, text=""):
+        self._text = text
+
+    def text(self):
+        return self._text
+
+    def setText(self, text):
+        self._text = text
+
+
+class FakeCheckBox:
+    def __init__(self, checked=False):
+        self._checked = checked
+
+    def isChecked(self):
+        return self._checked
+
+    def setChecked(self, checked):
+        self._checked = bool(checked)
+
+
+class Context:
+    """一个用例使用的插件实例、控制器和临时目录"""
+
+    def __init__(self, root, label, log_path):
+        self.root = root
+        self.label = label
+        self.plugin = harness.load_plugin(os.path.join(root, "plugin"))
+        self.module = import_module(harness.PACKAGE_NAME + ".consolidation_controller")
+        self.dialogs = harness.ScriptedDialogs().install(self.module)
+        self.organizer = harness.FakeOrganizer(os.path.join(root, "mo2"), settings={"trace_enabled": True})
+
+        controller = self.module.ConsolidationController()
+        # 基准测试不访问网络（版本探测的耗时取决于网络环境），也不弹出欢迎窗口
+        controller.PLUGIN_MANIFEST_URL = harness.unreachable_url("/manifest")
+        controller.PLUGIN_VERSION_URL = harness.unreachable_url("/version")
+        controller.PLUGIN_CHANGELOG_URL = harness.unreachable_url("/changelog")
+        controller._start_version_probe = lambda: None
+        controller.show_welcome_dialog = lambda: None
+        controller.tracer.log_path = log_path
+        controller.tracer.max_bytes = TRACE_MAX_BYTES
+        controller.init(self.organizer)
+        controller.tracer.base_fields["version"] = label
+        self.controller = controller
+        self.tracer = controller.tracer
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def import_plugin(self, name):
+        """导入本用例加载的插件中的模块"""
+        return import_module(f"{harness.PACKAGE_NAME}.{name}")
+
+    @contextlib.contextmanager
+    def measure(self, name, **fields):
+        """计时一次操作并记录为 bench.<name>；可以在 with 块中向返回的字典添加记录字段"""
+        started = time.perf_counter()
+        yield fields
+        self.tracer.record(BENCH_PREFIX + name, (time.perf_counter() - started) * 1000, **fields)
+
+    def close(self):
+        self.controller._stop_background_work()
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def write_preset(root, seed, shaders=40, shader_size=64 * 1024, differ_every=2):
+    """
+    生成一个合成 ENB 预设：DLL、两个 INI、enbseries 下的着色器和 reshade-shaders 下的纹理。
+
+    每 differ_every 个着色器和纹理中有一个内容取决于 seed，其余在所有预设中相同，
+    与真实预设之间的差异相近。
+    """
+    rng = random.Random(seed)
+    shared = random.Random(0)
+    write_file(os.path.join(root, "d3d11.dll"), shared.randbytes(2 * 1024 * 1024))
+    write_file(os.path.join(root, "d3dcompiler_46e.dll"), shared.randbytes(1024 * 1024))
+    write_file(os.path.join(root, "enblocal.ini"), write_ini_text(random.Random(seed), 6, 12).encode('utf-8'))
+    write_file(os.path.join(root, "enbseries.ini"), write_ini_text(random.Random(seed), 40, 30).encode('utf-8'))
+    for i in range(shaders):
+        source = rng if i % differ_every == 1 else shared
+        write_file(os.path.join(root, "enbseries", f"effect{i:04d}.fx"), source.randbytes(shader_size))
+    for i in range(shaders // 4):
+        source = rng if i % differ_every == 1 else shared
+        write_file(os.path.join(root, "reshade-shaders", "Textures", f"tex{i:04d}.png"), source.randbytes(shader_size * 2))
+    return root
+
+
+def write_ini_text(rng, sections, keys):
+    """生成带注释的合成 INI 文本"""
+    lines = ["; synthetic"]
+    for s in range(sections):
+        lines.append(f"[Section{s}]")
+        for k in range(keys):
+            if k % 7 == 0:
+                lines.append(f"; comment {s}.{k}")
+            lines.append(f"Key{k}={rng.random():.6f}")
+        lines.append("")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def write_display_tweaks(path, rng, sections=30, keys=25):
+    """生成包含 [Render] 节的 SSEDisplayTweaks.ini"""
+    text = write_ini_text(rng, sections, keys)
+    text += "[Render]\r\nResolution=1920x1080\r\nFullscreen=false\r\nBorderless=true\r\n"
+    write_file(path, text.encode('utf-8'))
+    return path
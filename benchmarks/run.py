@@ -0,0 +1,143 @@
+# coding=utf-8
+"""
+在 MO2 之外运行插件的基准测试，并与之前保存的插件版本比较。
+
+    python benchmarks/run.py                    # 运行全部用例，保存为当前版本并与上一个版本比较
+    python benchmarks/run.py -k enb --repeat 10 # 只运行名称包含 enb 的用例
+    python benchmarks/run.py --baseline 1.2.0   # 与指定版本比较
+
+结果保存在 benchmarks/results/summary.json（{版本: {"saved_at", "ops"}}）；
+任一操作的 p95 比基准版本慢 REGRESSION_RATIO 倍以上时以退出码 1 结束。
+启动耗时的绝对预算由 benchmarks/startup.py 单独检查。
+"""
+
+import os
+import sys
+import glob
+import json
+import shutil
+import argparse
+import tempfile
+import traceback
+import subprocess
+from importlib import import_module
+
+from common import BENCH_DIR, CASES, Context, harness
+
+
+DEFAULT_RESULTS_PATH = os.path.join(BENCH_DIR, "results", "summary.json")
+DEFAULT_REPEAT = 5
+
+
+def default_label():
+    """当前插件版本的标签：git describe 的结果，不可用时为 dev"""
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--tags", "--always", "--dirty"],
+            cwd=harness.PLUGIN_DIR, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return "dev"
+    return result.stdout.strip() or "dev"
+
+
+def load_cases():
+    for path in sorted(glob.glob(os.path.join(BENCH_DIR, "bench_*.py"))):
+        import_module(os.path.splitext(os.path.basename(path))[0])
+    return list(CASES)
+
+
+def qt_application():
+    """基准测试期间使用的 QApplication（真实 Qt 使用 offscreen 平台）"""
+    try:
+        from PyQt6 import QtWidgets
+    except ImportError:
+        from PyQt5 import QtWidgets
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def run_cases(cases, label, repeat, log_path, work_dir):
+    """依次在各自的临时目录中运行用例，返回失败的用例名"""
+    failed = []
+    for name, func in cases:
+        print(f"运行 {name} ...", flush=True)
+        root = os.path.join(work_dir, name)
+        ctx = None
+        try:
+            ctx = Context(root, label, log_path)
+            func(ctx, repeat)
+        except Exception:
+            traceback.print_exc()
+            failed.append(name)
+        finally:
+            if ctx is not None:
+                ctx.close()
+            shutil.rmtree(root, ignore_errors=True)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="插件基准测试")
+    parser.add_argument("-k", dest="keyword", default="", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每个操作的测量次数")
+    parser.add_argument("--label", default=None, help="本次结果的版本标签，默认为 git describe")
+    parser.add_argument("--baseline", default=None, help="比较的基准版本，默认为最近保存的其他版本")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH, help="保存结果的 JSON 文件")
+    parser.add_argument("--no-save", action="store_true", help="只比较，不保存本次结果")
+    parser.add_argument("--list", action="store_true", help="列出所有用例")
+    args = parser.parse_args(argv)
+
+    harness.install_stubs()
+    cases = [(name, func) for name, func in load_cases() if args.keyword in name]
+    if args.list:
+        print("\n".join(name for name, _func in cases))
+        return 0
+    if not cases:
+        print(f"没有名称包含 {args.keyword!r} 的用例")
+        return 2
+
+    label = args.label or default_label()
+    app = qt_application()
+    work_dir = tempfile.mkdtemp(prefix="xingli-bench-")
+    log_path = os.path.join(work_dir, "trace.jsonl")
+    try:
+        failed = run_cases(cases, label, args.repeat, log_path, work_dir)
+        tracing = import_module(harness.PACKAGE_NAME + ".tracing")
+        tracer = tracing.Tracer(log_path, enabled=True, max_bytes=1 << 30)
+        summary = tracer.summary(version=label)
+        print()
+        print(f"版本 {label}，每项 {args.repeat} 次")
+        print(tracer.format_summary(summary))
+
+        history = {}
+        if os.path.exists(args.results):
+            with open(args.results, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        if args.baseline is not None:
+            if args.baseline not in history:
+                print(f"{args.results} 中没有版本 {args.baseline} 的结果")
+                return 2
+            regressions = tracing.compare_summaries(history[args.baseline]["ops"], summary)
+            if not args.no_save:
+                os.makedirs(os.path.dirname(args.results), exist_ok=True)
+                tracer.save_summary(args.results, label)
+        elif args.no_save:
+            others = [entry for name, entry in history.items() if name != label]
+            baseline = max(others, key=lambda entry: entry.get("saved_at", 0)) if others else None
+            regressions = tracing.compare_summaries(baseline["ops"], summary) if baseline else {}
+        else:
+            os.makedirs(os.path.dirname(args.results), exist_ok=True)
+            regressions = tracer.save_summary(args.results, label)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        app.quit()
+
+    for name, (before, after) in sorted(regressions.items()):
+        print(f"性能回退: {name} 的 p95 从 {before:.1f} ms 增加到 {after:.1f} ms")
+    if failed:
+        print("失败的用例: " + ", ".join(failed))
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# coding=utf-8
+"""
+测量插件的启动耗时：每次在新的 Python 进程中导入 consolidation_controller 并调用 init。
+
+    python benchmarks/startup.py              # 运行 7 次，取中位数与 STARTUP_BUDGET_MS 比较
+    python benchmarks/startup.py --budget 30  # 使用指定的预算（毫秒）
+
+导入 + init 的中位数超出预算，或导入插件后已经加载了 HEAVY_MODULES 中的模块时以退出码 1 结束。
+mobase 和 Qt 在计时前导入（MO2 加载插件时它们已经存在）；网络地址指向本机没有监听的端口。
+"""
+
+import os
+import sys
+import json
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "tests", "support"))
+
+import harness
+
+
+DEFAULT_RUNS = 7
+# 启动时不应导入的模块：网络请求只在后台线程或点击按钮时发生，ENB 文件操作只在点击按钮时发生
+HEAVY_MODULES = (
+    "http.client",
+    "urllib.request",
+    "ssl",
+    "shutil",
+    harness.PACKAGE_NAME + ".http_client",
+    harness.PACKAGE_NAME + ".enb_deploy",
+)
+
+
+def _child(plugin_dir, work_dir):
+    """在子进程中运行：计时导入和 init，以 JSON 输出结果"""
+    import time
+    from importlib import import_module
+
+    harness.install_stubs()
+    import mobase # noqa: F401
+    try:
+        from PyQt6 import QtWidgets
+    except ImportError:
+        from PyQt5 import QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    harness.load_plugin(plugin_dir, copy_sources=False)
+    preloaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    started = time.perf_counter()
+    module = import_module(harness.PACKAGE_NAME + ".consolidation_controller")
+    imported = time.perf_counter()
+    # init 会启动版本探测线程，它在后台导入网络模块，所以在 init 之前检查
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules and name not in preloaded]
+
+    controller = module.ConsolidationController()
+    controller.PLUGIN_MANIFEST_URL = harness.unreachable_url("/manifest")
+    controller.PLUGIN_VERSION_URL = harness.unreachable_url("/version")
+    controller.PLUGIN_CHANGELOG_URL = harness.unreachable_url("/changelog")
+    organizer = harness.FakeOrganizer(os.path.join(work_dir, "mo2"))
+    init_started = time.perf_counter()
+    controller.init(organizer)
+    finished = time.perf_counter()
+    controller._stop_background_work()
+    app.quit()
+
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "init_ms": (finished - init_started) * 1000,
+        "loaded": loaded,
+        "preloaded": preloaded,
+        "budget_ms": module.ConsolidationController.STARTUP_BUDGET_MS,
+    }))
+
+
+def measure_startup(runs=DEFAULT_RUNS):
+    """
+    在 runs 个新进程中测量启动耗时，返回每次的结果列表。
+    插件先复制到临时目录，并在第一个（不计入的）进程中生成 .pyc，与 MO2 第二次及以后启动时相同。
+    """
+    # 在这里导入：tempfile 会带入 shutil，子进程中不应提前加载
+    import tempfile
+    import subprocess
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="xingli-startup-") as work_dir:
+        plugin_dir = os.path.join(work_dir, "plugin")
+        harness.copy_plugin(plugin_dir)
+        env = dict(os.environ)
+        env.pop("PYTHONDONTWRITEBYTECODE", None) # 不写入 .pyc 时每次都要重新编译插件
+        env["PYTHONPYCACHEPREFIX"] = os.path.join(work_dir, "pycache") # .pyc 只写入临时目录
+        for i in range(runs + 1):
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", plugin_dir, work_dir],
+                capture_output=True, text=True, encoding="utf-8", timeout=60, env=env
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"启动测量进程失败:\n{result.stdout[-2000:]}{result.stderr[-2000:]}")
+            if i > 0:
+                results.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="插件启动耗时")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="测量的进程数")
+    parser.add_argument("--budget", type=float, default=None, help="导入 + init 的预算（毫秒），默认为 STARTUP_BUDGET_MS")
+    args = parser.parse_args(argv)
+    results = measure_startup(max(1, args.runs))
+    import_ms = _median([r["import_ms"] for r in results])
+    init_ms = _median([r["init_ms"] for r in results])
+    total_ms = _median([r["import_ms"] + r["init_ms"] for r in results])
+    budget_ms = args.budget if args.budget is not None else results[0]["budget_ms"]
+    loaded = sorted({name for r in results for name in r["loaded"]})
+    preloaded = sorted({name for r in results for name in r["preloaded"]})
+
+    print(f"启动耗时中位数 {total_ms:.1f} ms (导入 {import_ms:.1f} ms, init {init_ms:.1f} ms)，预算 {budget_ms:.0f} ms，{len(results)} 次")
+    if preloaded:
+        print("导入插件之前已加载（不计入）: " + ", ".join(preloaded))
+    failed = False
+    if loaded:
+        print("启动时导入了不应导入的模块: " + ", ".join(loaded))
+        failed = True
+    if total_ms > budget_ms:
+        print(f"启动耗时超出预算: {total_ms:.1f} ms > {budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        # 子进程不经过 argparse：它的帮助格式化会导入 shutil
+        _child(*sys.argv[2:4])
+        sys.exit(0)
+    sys.exit(main())
@@ -1,21 +1,16 @@
 # coding=utf-8
 
+# 启动时只导入 __init__ / init 需要的模块；教程、ENB 存储、插件更新、winreg 等在第一次使用时再导入
+# HTTP 客户端（http.client、urllib.request、ssl）、ENB 部署（shutil、hashlib）也不在这里导入，见 benchmarks/startup.py
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import os
 import re
-import webbrowser
-import json
-import urllib.request
-import urllib.error
 import logging # 添加 logging 模块
+import threading
 import mobase
 import configparser
-import shutil
-import time
-import tempfile
-import threading
-import winreg
-import configparser # 确保导入
-from urllib.parse import urlparse
 
 try:
     import PyQt6.QtWidgets as QtWidgets
@@ -26,16 +21,98 @@ except ImportError:
     import PyQt5.QtGui as QtGui
     from PyQt5.QtCore import QCoreApplication, Qt, QThread, pyqtSignal, QTimer
 
-from .tutorial_data import TUTORIAL_CATEGORIES
 from .network import Network
+from .mod_state import ModStateTransaction
+from .dialog_registry import DialogRegistry
+from .tracing import Tracer, NULL_SPAN, traced
+
+_IMPORT_FINISHED = time.perf_counter()
+
+
+class VersionProbeThread(QThread):
+    """在后台线程中获取服务器版本号，避免阻塞 MO2 启动"""
+    version_probed = pyqtSignal(object) # 成功时为版本字符串，失败时为 None
+
+    def __init__(self, get_manifest, fallback_url, timeout=5, span=None, parent=None):
+        super().__init__(parent)
+        self.get_manifest = get_manifest # 在后台线程中调用，第一次调用时才导入并创建 HTTP 客户端
+        self.fallback_url = fallback_url
+        self.timeout = timeout
+        self.span = NULL_SPAN if span is None else span
+
+    def run(self):
+        server_version = None
+        with self.span:
+            try:
+                # 缓存未过期时不会访问网络；同时预取组合清单，供之后的更新日志、排序检查使用
+                data = self.get_manifest().section("plugin", self.fallback_url, timeout=self.timeout)
+                server_version = data.get("version")
+                print(f"启动时获取服务器版本成功: {server_version}")
+            except Exception as e:
+                self.span.set("result", "failed")
+                print(f"启动时检查服务器版本失败: {str(e)}")
+        # 信号会被排队到主线程，槽函数在 UI 线程中执行
+        self.version_probed.emit(server_version)
+
+class FileJobThread(QThread):
+    """在后台线程中执行文件操作（ENB 安装、应用、禁用，插件更新），通过信号报告进度和结果"""
+    progress = pyqtSignal(int, int, object, object) # 已完成文件数, 文件总数, 已完成字节数, 总字节数
+    job_succeeded = pyqtSignal(object)
+    job_failed = pyqtSignal(object)
+    job_cancelled = pyqtSignal()
+
+    def __init__(self, work, span=None, parent=None):
+        super().__init__(parent)
+        self.work = work # work(progress, cancelled)，在后台线程中调用
+        self.span = NULL_SPAN if span is None else span # 记录整个任务的耗时和处理的文件数、字节数
+
+    def run(self):
+        from .enb_deploy import OperationCancelled
+        with self.span:
+            try:
+                result = self.work(self._report_progress, self.isInterruptionRequested)
+            except OperationCancelled:
+                self.span.set("result", "cancelled")
+                self.job_cancelled.emit()
+            except Exception as e:
+                self.span.set("result", "failed")
+                self.job_failed.emit(e)
+            else:
+                self.job_succeeded.emit(result)
+
+    def _report_progress(self, files_done, files_total, bytes_done, bytes_total):
+        self.span.set("files", files_done)
+        self.span.set("bytes", bytes_done)
+        self.progress.emit(files_done, files_total, bytes_done, bytes_total)
 
 class ConsolidationController(mobase.IPluginTool):
     NAME = "星黎整合管理器"  # 修改为中文名称
     PLUGIN_UPDATE_URL = "https://silent-waterfall-efd4.a306435856.workers.dev/download"  # 替换为插件更新文件的下载链接
     PLUGIN_VERSION_URL = "https://silent-waterfall-efd4.a306435856.workers.dev/version"
     PLUGIN_CHANGELOG_URL = "https://silent-waterfall-efd4.a306435856.workers.dev/changelog"
+    PLUGIN_MANIFEST_URL = "https://silent-waterfall-efd4.a306435856.workers.dev/manifest" # 组合清单，一次请求获取所有远程元数据
+    VERSION_URL = None # 整合包版本的单独地址，未配置时只从组合清单获取
+    ORDER_URL = None # 模组排序的单独地址，未配置时只从组合清单获取
     CONFIG_FILE_NAME = "version.ini" # ini 文件名
+    METADATA_CACHE_FILE_NAME = "metadata_cache.json" # 远程元数据缓存文件名
+    ORDER_SYNC_FILE_NAME = "order_sync.json" # 上次应用的模组排序
+    GAME_PATH_CACHE_FILE_NAME = "game_path.json" # 上次确认的游戏路径
+    TRACE_FILE_NAME = "trace.jsonl" # 开启性能追踪时记录各项操作耗时的日志
+    TRACE_SUMMARY_FILE_NAME = "trace_summary.json" # 按插件版本保存的耗时汇总，用于发现版本间的性能回退
+    DEFAULT_METADATA_CACHE_TTL = 3600 # 元数据缓存有效期（秒）
+    # 以下三项与 copy_engine.DEFAULT_WORKERS、enb_deploy.DEPLOY_MODE_COPY、settings_sync.DEFAULT_BACKUP_COUNT 相同；
+    # settings() 在 MO2 加载插件时就会调用，不为了默认值导入这些模块
+    DEFAULT_COPY_WORKERS = 4
+    DEFAULT_ENB_DEPLOY_MODE = "copy"
+    DEFAULT_SETTINGS_BACKUP_COUNT = 5
     DEFAULT_VERSION = "1.0.0" # 默认版本号
+    SETTINGS_MIRROR_DELAY_MS = 500 # 连续多次确认设置时，只在最后一次之后同步到 overwrite
+    TUTORIAL_SEARCH_DELAY_MS = 150 # 教程搜索框输入停顿多久后开始搜索
+    STARTUP_BUDGET_MS = 50 # 模块导入 + init 的耗时预算，超出时在日志中警告
+    PREFETCH_REUSE_SECONDS = 300 # 点击“检查更新”时，这段时间内预取过的清单不再重新验证
+    VERSION_PROBE_TIMEOUT = 5 # 启动时版本探测的单次请求超时（秒）
+    QUIT_WAIT_MS = 5000 # MO2 退出时等待所有后台线程结束的最长时间，不超过一次请求的超时
+    ENB_CLOSE_WAIT_MS = 2000 # 关闭 ENB 窗口时等待任务取消的最长时间，超过后任务在后台完成
 
     AUTO_RESOLUTION_MOD_NAME = "自动分辨率设置-Auto Resolution"
 
@@ -46,9 +123,28 @@ class ConsolidationController(mobase.IPluginTool):
         self.network = None
         self.server_version = None # 用于存储服务器版本号
         self.version_label = None # 用于稍后更新标签
+        self.window = None
         self.plugin_path = os.path.dirname(__file__) # 获取插件目录
+        self.tracer = Tracer(os.path.join(self.plugin_path, self.TRACE_FILE_NAME)) # 在 init 中根据插件设置开启
+        self.dialogs = DialogRegistry(self.tracer) # 主窗口、ENB、教程、分辨率窗口只构建一次
+        self._tutorial_index = None # 第一次打开教程或查找教程地址时构建
+        self._version_probe = None # 后台版本探测线程
+        self._enb_job = None # 正在运行的 ENB 文件操作线程
+        self._update_job = None # 正在运行的插件更新线程
+        self.prefetch = None # MO2 主界面初始化后启动的预取调度器
         self.config_path = os.path.join(self.plugin_path, self.CONFIG_FILE_NAME) # ini 文件路径
         self.local_version = self._read_local_version() # 在初始化时读取
+        self._metadata_cache = None # 第一次访问网络时根据插件设置创建
+        self._remote_manifest = None
+        self._order_sync = None # 第一次检查排序更新时创建
+        self._game_paths = None # 第一次需要游戏路径时创建
+        self.mod_states = None # 模组启用状态事务，在 init 中创建
+        self.display_tweaks_ini = None # 分辨率设置窗口打开时解析的 SSEDisplayTweaks.ini
+        self._mirror_timer = None
+        self._pending_mirrors = {} # 目标路径 -> 源路径，等待同步
+        self._http_client = None # 所有网络请求共享的连接池，第一次访问网络时创建
+        self._network_lock = threading.RLock() # 版本探测、预取线程和主线程可能同时第一次访问网络
+        self._network_closed = False # MO2 正在退出，之后创建的连接池立即关闭
 
     def _read_local_version(self) -> str:
         """从 version.ini 读取本地版本号"""
@@ -88,28 +184,152 @@ class ConsolidationController(mobase.IPluginTool):
 
 
     def init(self, organizer: mobase.IOrganizer):
+        init_started = time.perf_counter()
         self.organizer = organizer
+        self.tracer.enabled = bool(self._get_setting("trace_enabled", False))
+        self.tracer.base_fields["version"] = self.local_version
+        self.mod_states = ModStateTransaction(organizer)
         # 初始化网络模块，使用读取到的本地版本
         print(f"使用的本地版本进行初始化: {self.local_version}") # 调试信息
         # 确保 Network 类已定义或导入
         # from .network import Network # 可能需要取消注释或调整
         self.network = Network(self, self.local_version, self.PLUGIN_VERSION_URL, self.PLUGIN_CHANGELOG_URL) # 传递 self
 
-        # 尝试在初始化时同步获取服务器版本
+        # 在后台线程中获取服务器版本，init 立即返回
+        self._start_version_probe()
+
+        # MO2 主界面初始化后再预取其余远程资源，避免与启动争抢
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.121 Safari/537.36"
-            }
-            req = urllib.request.Request(self.PLUGIN_VERSION_URL, headers=headers)
-            with urllib.request.urlopen(req, timeout=5) as response: # 使用5秒超时
-                data = json.loads(response.read().decode('utf-8'))
-                self.server_version = data.get("version")
-                print(f"启动时获取服务器版本成功: {self.server_version}")
-        except Exception as e:
-            print(f"启动时检查服务器版本失败: {str(e)}")
-            self.server_version = None # 确保失败时为 None
+            organizer.onUserInterfaceInitialized(lambda _main_window: self._start_prefetch())
+        except AttributeError:
+            QTimer.singleShot(0, self._start_prefetch)
+
+        # MO2 退出时释放缓存的窗口
+        app = QtWidgets.QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.dialogs.close_all)
+            app.aboutToQuit.connect(self._save_trace_summary)
+            app.aboutToQuit.connect(self._stop_background_work)
+            app.aboutToQuit.connect(self._flush_pending_settings_mirrors) # 还在等待合并的设置同步不能丢失
 
         QTimer.singleShot(2000, self.show_welcome_dialog)
+        self._report_startup_time(init_started)
+        return True
+
+    def _report_startup_time(self, init_started):
+        """记录模块导入和 init 的耗时，超出 STARTUP_BUDGET_MS 时警告"""
+        import_ms = (_IMPORT_FINISHED - _IMPORT_STARTED) * 1000
+        init_ms = (time.perf_counter() - init_started) * 1000
+        total_ms = import_ms + init_ms
+        print(f"插件启动耗时 {total_ms:.1f} ms (导入 {import_ms:.1f} ms, init {init_ms:.1f} ms)")
+        self.tracer.record("init", init_ms, import_ms=round(import_ms, 2))
+        if total_ms > self.STARTUP_BUDGET_MS:
+            logging.warning(f"插件启动耗时 {total_ms:.1f} ms，超出预算 {self.STARTUP_BUDGET_MS} ms")
+
+    def _start_version_probe(self):
+        """启动后台版本探测线程，结果通过信号回到主线程"""
+        if self._version_probe is not None and self._version_probe.isRunning():
+            return
+        self._version_probe = VersionProbeThread(
+            lambda: self.remote_manifest, self.PLUGIN_VERSION_URL, timeout=self.VERSION_PROBE_TIMEOUT,
+            span=self.tracer.span("version_probe")
+        )
+        self._version_probe.version_probed.connect(self._on_server_version_probed)
+        self._version_probe.start()
+
+    def _start_prefetch(self):
+        """
+        并发预取点击按钮时需要的数据。版本探测线程已在 init 中最先开始，
+        其余按更新日志、整合包版本、模组排序、教程索引的顺序开始。
+        """
+        if self.prefetch is not None:
+            return
+        from .prefetch import PrefetchScheduler
+        self.prefetch = PrefetchScheduler(tracer=self.tracer)
+        self.prefetch.add("changelog", self.fetch_changelog, priority=1)
+        self.prefetch.add("modpack", lambda: self.remote_manifest.section("modpack", self.VERSION_URL, timeout=10), priority=2)
+        self.prefetch.add("order", self._prefetch_order, priority=3)
+        self.prefetch.add("tutorials", lambda: self.tutorial_index, priority=4)
+        self.prefetch.start()
+
+    def _prefetch_order(self):
+        """清单中的排序哈希与上次应用的不同时，提前下载新的排序"""
+        order_info = self.remote_manifest.section("order", timeout=10) or {}
+        order_url = order_info.get("url") or self.ORDER_URL
+        if not order_url or self.prefetch.cancelled or self.order_sync.is_current(order_info.get("sha256")):
+            return
+        self.metadata_cache.fetch(order_url, timeout=10, force=True)
+
+    def _stop_background_work(self):
+        """
+        MO2 退出时取消预取并中断所有网络请求，等待版本探测线程结束，
+        避免销毁仍在运行的 QThread。
+        """
+        if self.prefetch is not None:
+            self.prefetch.cancel()
+        with self._network_lock:
+            self._network_closed = True
+            http_client = self._http_client
+        if http_client is not None:
+            http_client.shutdown()
+        # ENB 文件操作和插件更新在取消时回到一致状态（删除不响应取消，会先完成）
+        jobs = [
+            (name, job) for name, job in (("版本探测", self._version_probe), ("ENB 文件操作", self._enb_job), ("插件更新", self._update_job))
+            if job is not None and job.isRunning()
+        ]
+        for _name, job in jobs:
+            job.requestInterruption()
+        deadline = time.monotonic() + self.QUIT_WAIT_MS / 1000
+        for name, job in jobs:
+            if not job.wait(max(0, int((deadline - time.monotonic()) * 1000))):
+                print(f"警告: {name}线程未能在退出前结束")
+
+    def _on_server_version_probed(self, server_version):
+        """版本探测完成后的槽函数（主线程）"""
+        self.server_version = server_version
+        self._update_version_label()
+
+    def fetch_metadata(self, url, timeout=10, force=False):
+        """通过磁盘缓存获取远程元数据（版本、更新日志、下载信息），供 network 模块调用"""
+        return self.metadata_cache.fetch(url, timeout=timeout, force=force)
+
+    def fetch_changelog(self, force=False):
+        """获取更新日志文本（优先来自组合清单），供 network 模块调用"""
+        return self.remote_manifest.section("changelog", self.PLUGIN_CHANGELOG_URL, as_json=False, timeout=10, force=force)
+
+    def _get_setting(self, key, default):
+        """读取插件设置，organizer 不可用或未设置时返回默认值"""
+        if self.organizer is None:
+            return default
+        try:
+            value = self.organizer.pluginSetting(self.name(), key)
+        except Exception:
+            return default
+        return default if value is None else value
+
+    def _version_label_content(self):
+        """根据本地和服务器版本生成版本标签的文本和样式"""
+        version_text = f"本地版本: {self.local_version}"
+        label_style = "color: #999; font-size: 10px;" # 默认样式
+        if self.server_version:
+            version_text += f" / 服务器: {self.server_version}"
+            # 服务器版本更新，突出显示
+            if self._compare_versions(self.server_version, self.local_version) > 0:
+                label_style = "color: red; font-size: 10px; font-weight: bold;"
+        return version_text, label_style
+
+    def _update_version_label(self):
+        """如果主窗口正在显示，原地刷新版本标签"""
+        if not self.version_label or not self.window or not self.window.isVisible():
+            return False
+        version_text, label_style = self._version_label_content()
+        try:
+            self.version_label.setText(version_text)
+            self.version_label.setStyleSheet(label_style)
+        except RuntimeError as e:
+            # 底层 Qt 对象可能已被销毁
+            logging.error(f"RuntimeError updating version_label: {e}")
+            return False
         return True
 
     def name(self) -> str:
@@ -140,7 +360,15 @@ class ConsolidationController(mobase.IPluginTool):
             return mobase.VersionInfo(0, 0, 0)
 
     def settings(self) -> list:
-        return []
+        return [
+            mobase.PluginSetting("metadata_cache_ttl", "远程版本/更新日志缓存的有效期（秒）", self.DEFAULT_METADATA_CACHE_TTL),
+            mobase.PluginSetting("offline_serve_stale", "网络不可用时使用已过期的缓存数据", True),
+            mobase.PluginSetting("enb_dedup_store", "安装 ENB 预设时使用按内容去重的存储，节省重复文件占用的空间", False),
+            mobase.PluginSetting("copy_workers", "复制 ENB 文件时使用的并发线程数（1 表示逐个复制）", self.DEFAULT_COPY_WORKERS),
+            mobase.PluginSetting("enb_deploy_mode", "ENB 部署方式: copy(复制) / hardlink(硬链接) / reflink(写时复制)，链接失败时自动回退为复制", self.DEFAULT_ENB_DEPLOY_MODE),
+            mobase.PluginSetting("settings_backup_count", "同步到 overwrite 的配置文件保留的备份数量", self.DEFAULT_SETTINGS_BACKUP_COUNT),
+            mobase.PluginSetting("trace_enabled", "记录各项操作的耗时到 trace.jsonl，用于排查卡顿（重启 MO2 后生效）", False),
+        ]
 
     def displayName(self) -> str:
         return "星黎MO2小助手"  
@@ -226,9 +454,17 @@ class ConsolidationController(mobase.IPluginTool):
 
 
     def display(self) -> None:
-        # 每次调用都重置窗口和标签引用，确保使用新对象
+        logging.debug("Entering display method") # 添加日志
+        # 窗口只在第一次打开时构建，之后只刷新版本标签
+        self.dialogs.open("main", self._build_main_window, self._refresh_main_window)
+        logging.debug("After window.exec()") # 添加日志
+
+    def _refresh_main_window(self):
+        # 服务器版本可能在窗口隐藏期间到达
+        self._update_version_label()
+
+    def _build_main_window(self):
         self.window = QtWidgets.QDialog()
-        self.version_label = None # <-- 重置 version_label
         self.window.setWindowTitle("星黎MO2小助手")
         self.window.setWindowFlags(self.window.windowFlags() | Qt.WindowMinMaxButtonsHint | Qt.WindowCloseButtonHint)
 
@@ -311,65 +547,64 @@ class ConsolidationController(mobase.IPluginTool):
         info_text.setWordWrap(True)
         info_text.setStyleSheet("color: #666; font-style: italic;")
         main_layout.addWidget(info_text)
-        logging.debug("Entering display method") # 添加日志
-        
-        # 添加版本信息 (本地和服务器)
-        local_version_str = self.local_version # 使用从 ini 读取的版本
-        version_text = f"本地版本: {local_version_str}"
-        label_style = "color: #999; font-size: 10px;" # 默认样式
-
-        if self.server_version:
-            version_text += f" / 服务器: {self.server_version}"
-            # 比较版本
-            if self._compare_versions(self.server_version, local_version_str) > 0:
-                # 服务器版本更新，突出显示
-                label_style = "color: red; font-size: 10px; font-weight: bold;"
 
-        # 创建或更新标签
-        logging.debug(f"Checking version_label. Is None: {self.version_label is None}") # 添加日志
-        if self.version_label is None:
-            self.version_label = QtWidgets.QLabel(version_text)
-            self.version_label.setAlignment(Qt.AlignRight)
-            main_layout.addWidget(self.version_label)
-            self.version_label.setStyleSheet(label_style) # <-- 设置样式
-        else:
-            # 如果标签已存在，先检查窗口是否还存活
-            # (假设 self.window 是包含 self.version_label 的窗口)
-            if not self.window or not self.window.isVisible():
-                 logging.warning("Window or version_label's parent is no longer visible/valid. Skipping update.")
-                 return # 窗口无效，直接返回
-
-            # 窗口有效，继续更新
-            logging.debug("version_label exists and window is visible. Attempting to update text.") # 更新日志信息
-            try:
-                # 调试日志：访问 winId (可以保留或移除)
-                logging.debug(f"Accessing version_label.winId(): {self.version_label.winId()}")
-            except RuntimeError as e:
-                # 如果在这里仍然出错，说明 isVisible 检查可能不够，或者对象在检查后瞬间失效
-                logging.error(f"RuntimeError accessing version_label even after visibility check: {e}")
-                return # 出错则直接返回
-
-            logging.debug(f"Calling setText with: '{version_text}'")
-            self.version_label.setText(version_text)
-            self.version_label.setStyleSheet(label_style) # <-- 同样设置样式
+        # 添加版本信息 (本地和服务器)
+        # 服务器版本由后台线程获取，到达后通过 _update_version_label 原地刷新
+        version_text, label_style = self._version_label_content()
+        self.version_label = QtWidgets.QLabel(version_text)
+        self.version_label.setAlignment(Qt.AlignRight)
+        self.version_label.setStyleSheet(label_style)
+        main_layout.addWidget(self.version_label)
+
+        # 开启性能追踪时显示耗时汇总入口
+        if self.tracer.enabled:
+            trace_button = QtWidgets.QPushButton("性能记录")
+            trace_button.setFlat(True)
+            trace_button.setStyleSheet("color: #999; font-size: 10px;")
+            trace_button.clicked.connect(self.show_trace_summary)
+            main_layout.addWidget(trace_button, 0, Qt.AlignRight)
 
         self.window.setLayout(main_layout)
         self.window.setMinimumSize(400, 300)
-        logging.debug("Before window.exec()") # 添加日志
-        self.window.exec()
-        logging.debug("After window.exec()") # 添加日志
+        return self.window
+
+    def _save_trace_summary(self):
+        """退出时按插件版本保存耗时汇总，并与上一个版本比较"""
+        if not self.tracer.enabled:
+            return
+        try:
+            regressions = self.tracer.save_summary(
+                os.path.join(self.plugin_path, self.TRACE_SUMMARY_FILE_NAME), self.local_version
+            )
+        except Exception as e:
+            print(f"保存性能汇总失败: {e}")
+            return
+        for name, (before, after) in regressions.items():
+            logging.warning(f"性能回退: {name} 的 p95 从 {before:.1f} ms 增加到 {after:.1f} ms")
+
+    def show_trace_summary(self):
+        """显示各项操作耗时的 p50 / p95 汇总"""
+        try:
+            text = self.tracer.format_summary(self.tracer.summary(version=self.local_version))
+        except Exception as e:
+            text = f"读取追踪日志失败: {e}"
+        box = QtWidgets.QMessageBox(self.window)
+        box.setWindowTitle("性能记录")
+        box.setText(f"<pre>{text}</pre>")
+        box.setInformativeText(self.tracer.log_path)
+        box.exec()
 
     def check_version(self):
+        import urllib.error
         try:
-            with urllib.request.urlopen(self.VERSION_URL, timeout=10) as response:
-                data = json.loads(response.read().decode('utf-8'))
-                latest_version = data.get("version", "Unknown")
-                QtWidgets.QMessageBox.information(
-                    None,
-                    "整合包版本",
-                    "最新整合包版本: {}".format(latest_version)
-                )
-        except urllib.error.URLError as e:
+            data = self.remote_manifest.section("modpack", self.VERSION_URL, timeout=10) or {}
+            latest_version = data.get("version", "Unknown")
+            QtWidgets.QMessageBox.information(
+                None,
+                "整合包版本",
+                "最新整合包版本: {}".format(latest_version)
+            )
+        except (urllib.error.URLError, ValueError) as e:
             QtWidgets.QMessageBox.critical(
                 None,
                 "错误",
@@ -377,31 +612,60 @@ class ConsolidationController(mobase.IPluginTool):
             )
 
     def check_order_updates(self):
+        import urllib.error
         try:
-            with urllib.request.urlopen(self.ORDER_URL, timeout=10) as response:
-                order_content = response.read().decode('utf-8')
-                local_order_path = os.path.join(self.organizer.overwritePath(), "mod_order.txt")
-                
-                # Save new order to local file
-                with open(local_order_path, "w", encoding="utf-8") as file:
-                    file.write(order_content)
-                
-                QtWidgets.QMessageBox.information(
-                    None,
-                    "成功",
-                    "新的模组排序已下载并保存。"
-                )
+            # 组合清单中的排序地址优先，其次是单独配置的地址
+            order_info = self.remote_manifest.section("order", timeout=10) or {}
+            order_url = order_info.get("url") or self.ORDER_URL
+            if not order_url:
+                raise urllib.error.URLError("服务器未提供模组排序地址")
+            # 清单中的哈希与上次应用的一致时不需要下载
+            if self.order_sync.is_current(order_info.get("sha256")):
+                QtWidgets.QMessageBox.information(None, "提示", "模组排序已是最新。")
+                return
+            # 预取的内容与清单中的哈希一致时直接使用；否则通过元数据缓存下载，内容未变化时服务器返回 304
+            from .order_sync import order_hash
+            cached = self.metadata_cache.get(order_url)
+            remote_hash = (order_info.get("sha256") or "").lower()
+            if cached and remote_hash and order_hash(cached["body"]) == remote_hash:
+                order_content = cached["body"]
+            else:
+                order_content = self.metadata_cache.fetch(order_url, timeout=10, force=True)
+            result = self.order_sync.apply(order_content, self.organizer.modList())
+            if result is None:
+                QtWidgets.QMessageBox.information(None, "提示", "模组排序已是最新。")
+                return
+
+            local_order_path = os.path.join(self.organizer.overwritePath(), "mod_order.txt")
+
+            # Save new order to local file
+            with open(local_order_path, "w", encoding="utf-8") as file:
+                file.write(order_content)
+
+            QtWidgets.QMessageBox.information(
+                None,
+                "成功",
+                "新的模组排序已下载并应用。\n" + result.summary()
+            )
         except urllib.error.URLError as e:
             QtWidgets.QMessageBox.critical(
                 None,
                 "错误",
                 "下载新的排序失败: {}".format(str(e))
             )
+        except Exception as e:
+            # 写入 mod_order.txt 失败、清单或排序格式错误、MO2 接口报错等，不能让异常逃出槽函数
+            QtWidgets.QMessageBox.critical(
+                None,
+                "错误",
+                "下载新的排序失败: {}".format(str(e))
+            )
     
 
     def _get_game_path_from_registry(self):
         """从注册表获取游戏安装路径"""
         try:
+            import winreg # 仅 Windows 可用
             key = winreg.OpenKey(
                 winreg.HKEY_LOCAL_MACHINE,
                 r"SOFTWARE\WOW6432Node\Bethesda Softworks\Skyrim Special Edition"
@@ -411,7 +675,7 @@ class ConsolidationController(mobase.IPluginTool):
             return None
 
     def _prompt_for_game_path(self):
-        """弹出文件夹选择对话框让用户手动选择游戏路径"""
+        """弹出文件夹选择对话框让用户手动选择游戏路径，返回游戏根目录，取消或目录无效时返回 None"""
         QtWidgets.QMessageBox.information(
             None,
             "未找到游戏路径",
@@ -433,7 +697,7 @@ class ConsolidationController(mobase.IPluginTool):
                     "路径确认",
                     f"已选择路径：{selected_path}\n找到 skse64_loader.exe。"
                 )
-                return skse_path
+                return os.path.normpath(selected_path)
             else:
                 # 也检查 SkyrimSE.exe 作为备选
                 skyrim_exe_path = os.path.join(selected_path, "SkyrimSE.exe")
@@ -476,6 +740,10 @@ class ConsolidationController(mobase.IPluginTool):
                 "打开教程失败: {}".format(str(e))
             )
     def show_tutorial_window(self):
+        self.dialogs.open("tutorial", self._build_tutorial_window, lambda: self._refresh_tutorial_list())
+
+    def _build_tutorial_window(self):
+        from .tutorial_index import TutorialListModel, TutorialFilterProxy, ALL_CATEGORIES, search_placeholder
         # 创建一个窗口，用于显示教程分类和教程列表
         tutorial_window = QtWidgets.QDialog()
         tutorial_window.setWindowTitle("星黎整合包教程中心")
@@ -530,7 +798,11 @@ class ConsolidationController(mobase.IPluginTool):
                 border-left: 1px solid #c0c0c0;
             }
         """)
-        category_combo.addItems(TUTORIAL_CATEGORIES.keys())
+        # 第一项为跨分类搜索，之后是各个分类
+        category_combo.addItem("全部分类", ALL_CATEGORIES)
+        for category in self.tutorial_index.categories:
+            category_combo.addItem(category, category)
+        category_combo.setCurrentIndex(1 if self.tutorial_index.categories else 0)
         category_layout.addWidget(category_combo)
         
         # 添加搜索框
@@ -540,7 +812,7 @@ class ConsolidationController(mobase.IPluginTool):
         search_layout.addWidget(search_label)
         
         search_input = QtWidgets.QLineEdit()
-        search_input.setPlaceholderText("输入关键词搜索教程...")
+        search_input.setPlaceholderText(search_placeholder())
         search_input.setStyleSheet("""
             QLineEdit {
                 border: 1px solid #c0c0c0;
@@ -554,30 +826,36 @@ class ConsolidationController(mobase.IPluginTool):
         main_layout.addLayout(category_layout)
         main_layout.addLayout(search_layout)
 
-        # 教程列表
-        tutorial_list = QtWidgets.QListWidget()
+        # 教程列表（模型 + 过滤代理，搜索时不重新创建列表项）
+        tutorial_model = TutorialListModel(self.tutorial_index, tutorial_window)
+        tutorial_proxy = TutorialFilterProxy(self.tutorial_index, tutorial_window)
+        tutorial_proxy.setSourceModel(tutorial_model)
+        tutorial_list = QtWidgets.QListView()
+        tutorial_list.setModel(tutorial_proxy)
+        tutorial_list.setUniformItemSizes(True)
+        tutorial_list.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         tutorial_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 border: 1px solid #c0c0c0;
                 border-radius: 3px;
                 padding: 5px;
                 background-color: #ffffff;
                 alternate-background-color: #f7f7f7;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 8px;
                 border-bottom: 1px solid #e0e0e0;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #e6f0ff;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #cce0ff;
                 color: black;
             }
         """)
         tutorial_list.setAlternatingRowColors(True)
-        tutorial_list.itemDoubleClicked.connect(lambda item: self.open_tutorial_url(item.text()))
+        tutorial_list.doubleClicked.connect(lambda index: self._open_url(index.data(Qt.UserRole)))
         main_layout.addWidget(tutorial_list)
         
         # 添加提示标签
@@ -606,7 +884,7 @@ class ConsolidationController(mobase.IPluginTool):
                 background-color: #2a66c8;
             }
         """)
-        open_button.clicked.connect(lambda: self.open_tutorial_url(tutorial_list.currentItem().text()) if tutorial_list.currentItem() else None)
+        open_button.clicked.connect(lambda: self._open_url(tutorial_list.currentIndex().data(Qt.UserRole)) if tutorial_list.currentIndex().isValid() else None)
         button_layout.addWidget(open_button)
         
         # 关闭按钮
@@ -632,39 +910,117 @@ class ConsolidationController(mobase.IPluginTool):
 
         # 更新教程列表函数
         def update_tutorials():
-            selected_category = category_combo.currentText()
-            search_text = search_input.text().lower()
-            tutorials = TUTORIAL_CATEGORIES[selected_category]
-            tutorial_list.clear()
-            
-            for tutorial in tutorials:
-                # 如果搜索框有内容，则过滤
-                if search_text and search_text not in tutorial["name"].lower():
-                    continue
-                tutorial_list.addItem(tutorial["name"])
+            tutorial_proxy.set_filter(search_input.text(), category_combo.currentData())
+
+        # 输入停顿后再搜索，连续输入时不逐字刷新
+        search_timer = QTimer(tutorial_window)
+        search_timer.setSingleShot(True)
+        search_timer.setInterval(self.TUTORIAL_SEARCH_DELAY_MS)
+        search_timer.timeout.connect(update_tutorials)
 
         # 连接信号
         category_combo.currentIndexChanged.connect(update_tutorials)
-        search_input.textChanged.connect(update_tutorials)
+        search_input.textChanged.connect(search_timer.start)
 
-        # 初始更新
-        update_tutorials()
+        # 每次打开窗口时更新
+        self._refresh_tutorial_list = update_tutorials
 
         tutorial_window.setLayout(main_layout)
         tutorial_window.resize(500, 500)
-        tutorial_window.exec()
+        return tutorial_window
+
+    @property
+    def game_paths(self):
+        if self._game_paths is None:
+            from .game_path import GamePathResolver
+            self._game_paths = GamePathResolver(
+                os.path.join(self.plugin_path, self.GAME_PATH_CACHE_FILE_NAME),
+                managed_game=lambda: self.organizer.managedGame().gameDirectory().absolutePath(),
+                mo_ini_path=os.path.join(self.organizer.basePath(), "ModOrganizer.ini"),
+                registry=self._get_game_path_from_registry
+            )
+        return self._game_paths
+
+    @property
+    def http_client(self):
+        """所有网络请求共享的连接池，network 模块和插件更新通过 self 访问"""
+        with self._network_lock:
+            if self._http_client is None:
+                from .http_client import HttpClient
+                self._http_client = HttpClient()
+                self._http_client.tracer = self.tracer # 网络耗时计入当前操作
+                if self._network_closed:
+                    self._http_client.shutdown()
+            return self._http_client
+
+    @property
+    def metadata_cache(self):
+        """远程元数据的磁盘缓存，第一次使用时根据插件设置创建"""
+        with self._network_lock:
+            if self._metadata_cache is None:
+                from .metadata_cache import MetadataCache
+                self._metadata_cache = MetadataCache(
+                    os.path.join(self.plugin_path, self.METADATA_CACHE_FILE_NAME),
+                    ttl=self._get_setting("metadata_cache_ttl", self.DEFAULT_METADATA_CACHE_TTL),
+                    serve_stale_offline=self._get_setting("offline_serve_stale", True),
+                    http_client=self.http_client
+                )
+            return self._metadata_cache
+
+    @property
+    def remote_manifest(self):
+        with self._network_lock:
+            if self._remote_manifest is None:
+                from .remote_manifest import RemoteManifest
+                self._remote_manifest = RemoteManifest(self.metadata_cache, self.PLUGIN_MANIFEST_URL)
+            return self._remote_manifest
+
+    @property
+    def order_sync(self):
+        if self._order_sync is None:
+            from .order_sync import OrderSync
+            self._order_sync = OrderSync(os.path.join(self.plugin_path, self.ORDER_SYNC_FILE_NAME))
+        return self._order_sync
+
+    @property
+    def tutorial_index(self):
+        """教程索引，第一次使用时从 TUTORIAL_CATEGORIES 构建"""
+        if self._tutorial_index is None:
+            from .tutorial_data import TUTORIAL_CATEGORIES
+            from .tutorial_index import TutorialIndex
+            self._tutorial_index = TutorialIndex(TUTORIAL_CATEGORIES)
+        return self._tutorial_index
+
+    def _open_url(self, url):
+        import webbrowser
+        webbrowser.open(url)
+
     def open_tutorial_url(self, tutorial_name):
-         # 根据教程名称找到对应的 URL 并打开
-         for category in TUTORIAL_CATEGORIES.values():
-             for tutorial in category:
-               if tutorial["name"] == tutorial_name:
-                    webbrowser.open(tutorial["url"])
-                    return
+        # 根据教程名称找到对应的 URL 并打开
+        url = self.tutorial_index.url_for(tutorial_name)
+        if url:
+            self._open_url(url)
 
     def update_plugin(self):
         """
         检查并更新插件
         """
+        # 版本信息中提供了 sha256 时，使用可续传、带校验的下载器
+        try:
+            # 刚预取过的清单直接使用，否则重新验证
+            force = not self.remote_manifest.is_recent(self.PREFETCH_REUSE_SECONDS)
+            version_info = self.remote_manifest.section("plugin", self.PLUGIN_VERSION_URL, timeout=10, force=force)
+        except Exception as e:
+            print(f"获取插件版本信息失败: {str(e)}")
+            version_info = None
+        if version_info and version_info.get("version") and version_info.get("sha256"):
+            self._on_server_version_probed(version_info["version"])
+            self.install_plugin_update(
+                version_info["version"], version_info["sha256"], version_info.get("url"),
+                files=version_info.get("files"), files_url=version_info.get("files_url")
+            )
+            return
+
         # 使用Network类检查更新
         if self.network:
             self.network.check_for_updates(self.window)
@@ -674,7 +1030,79 @@ class ConsolidationController(mobase.IPluginTool):
             self.network = Network(version_str, self.PLUGIN_VERSION_URL)
             self.network.check_for_updates(self.window)
     
+    def install_plugin_update(self, new_version, expected_sha256, download_url=None, files=None, files_url=None):
+        """
+        下载并安装插件更新：流式写入临时文件，断线后续传，校验 SHA-256 后替换插件文件，
+        最后更新 version.ini。也可由 network 模块调用。
+
+        提供服务器文件清单 files 和下载根地址 files_url 时只下载变化的文件，失败则回退到完整更新包。
+        """
+        if self._update_job is not None and self._update_job.isRunning():
+            return
+        if self._compare_versions(new_version, self.local_version) <= 0:
+            QtWidgets.QMessageBox.information(self.window, "检查更新", f"当前已是最新版本 ({self.local_version})。")
+            return
+        reply = QtWidgets.QMessageBox.question(
+            self.window, "发现新版本",
+            f"发现新版本 {new_version}（当前 {self.local_version}），是否立即下载并更新？",
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
+        )
+        if reply != QtWidgets.QMessageBox.Yes:
+            return
+
+        from .plugin_updater import PluginUpdater
+        updater = PluginUpdater(self.plugin_path, self.http_client)
+        url = download_url or self.PLUGIN_UPDATE_URL
+
+        def work(progress, cancelled):
+            return updater.apply_update(url, expected_sha256, files, files_url, progress, cancelled)
+
+        progress_dialog = QtWidgets.QProgressDialog("正在下载更新...", "取消", 0, 1000, self.window)
+        progress_dialog.setWindowTitle("更新插件")
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+
+        def on_progress(_files_done, _files_total, bytes_done, bytes_total):
+            if bytes_total:
+                progress_dialog.setValue(int(bytes_done * 1000 / bytes_total))
+                progress_dialog.setLabelText(f"正在下载更新... {bytes_done / 1024 / 1024:.1f}/{bytes_total / 1024 / 1024:.1f} MB")
+            else:
+                progress_dialog.setLabelText(f"正在下载更新... {bytes_done / 1024 / 1024:.1f} MB")
+
+        def finished():
+            progress_dialog.close()
+
+        def succeeded(result):
+            finished()
+            changed, downloaded, saved = result
+            self.update_local_version_in_config(new_version)
+            message = f"插件已更新到 {new_version}（更新 {len(changed)} 个文件，下载 {downloaded / 1024:.0f} KB"
+            if saved:
+                message += f"，增量更新节省 {saved / 1024:.0f} KB"
+            message += "），请重启 Mod Organizer 2 以加载新版本。"
+            QtWidgets.QMessageBox.information(self.window, "更新完成", message)
+
+        def failed(error):
+            finished()
+            QtWidgets.QMessageBox.critical(self.window, "更新失败", f"插件更新失败，已下载的部分会在下次更新时继续。\n错误信息: {str(error)}")
+
+        def cancelled():
+            finished()
+            QtWidgets.QMessageBox.information(self.window, "更新取消", "更新已取消，已下载的部分会在下次更新时继续。")
+
+        self._track_job("_update_job", FileJobThread(work, self.tracer.span("plugin_update.job")))
+        self._update_job.progress.connect(on_progress)
+        self._update_job.job_succeeded.connect(succeeded)
+        self._update_job.job_failed.connect(failed)
+        self._update_job.job_cancelled.connect(cancelled)
+        progress_dialog.canceled.connect(self._update_job.requestInterruption)
+        progress_dialog.show()
+        self._update_job.start()
+
     def manage_enb(self):
+        self.dialogs.open("enb", self._build_enb_window, self._refresh_enb_window)
+
+    def _build_enb_window(self):
         # 创建 ENB 管理窗口
         enb_window = QtWidgets.QDialog()
         enb_window.setWindowTitle("ENB 管理")
@@ -787,56 +1215,43 @@ class ConsolidationController(mobase.IPluginTool):
         self.enb_status_label.setAlignment(Qt.AlignCenter)
         main_layout.addWidget(self.enb_status_label)
 
-        # 读取 Mod Organizer 2 的配置文件
-        mo_config = configparser.ConfigParser()
-        mo_config_path = os.path.join(self.organizer.basePath(), "ModOrganizer.ini")
-        if not os.path.exists(mo_config_path):
-            # 提示用户手动选择路径
-            QtWidgets.QMessageBox.critical(
-                None,
-                "错误",
-                "未找到 ModOrganizer.ini 文件: {}".format(mo_config_path)
-            )
-            # 弹出文件夹选择对话框
-            game_path_selected = QtWidgets.QFileDialog.getExistingDirectory(
-                caption="选择游戏路径",
-                directory=QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.DocumentsLocation)
-            )
-            if game_path_selected:  # 用户选择了路径
-                self.game_path = game_path_selected
-            else:  # 用户取消选择，退出
-                return
-        else:
-            mo_config.read(mo_config_path)
-            try:
-                game_path_str = mo_config.get("General", "gamePath")
-                if game_path_str.startswith("@ByteArray("):
-                    game_path_str = game_path_str[len("@ByteArray("):-1]
-                self.game_path = os.path.normpath(game_path_str)
-            except (configparser.NoOptionError, configparser.NoSectionError):
-                QtWidgets.QMessageBox.critical(
-                    None,
-                    "错误",
-                    "无法从 ModOrganizer.ini 中读取 gamePath。"
-                )
-                # 弹出文件夹选择对话框
-                game_path_selected = QtWidgets.QFileDialog.getExistingDirectory(
-                    caption="选择游戏路径",
-                    directory=QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.DocumentsLocation)
-                )
-                if game_path_selected:  # 用户选择了路径
-                    self.game_path = game_path_selected
-                else:  # 用户取消选择，退出
-                    return
+        # 后台任务进度条和取消按钮（仅在任务进行时显示）
+        progress_layout = QtWidgets.QHBoxLayout()
+        self.enb_progress_bar = QtWidgets.QProgressBar()
+        self.enb_progress_bar.setRange(0, 1000)
+        self.enb_progress_bar.setVisible(False)
+        progress_layout.addWidget(self.enb_progress_bar)
+        self.enb_cancel_button = QtWidgets.QPushButton("取消")
+        self.enb_cancel_button.setVisible(False)
+        self.enb_cancel_button.clicked.connect(self._cancel_enb_job)
+        progress_layout.addWidget(self.enb_cancel_button)
+        main_layout.addLayout(progress_layout)
+
+        # 任务进行时需要禁用的按钮，防止重复点击排队冲突的操作
+        self.enb_action_buttons = [install_button, start_button, stop_button]
 
-        # 检查游戏路径是否存在
-        if not os.path.exists(self.game_path):
-            QtWidgets.QMessageBox.critical(
-                None,
-                "错误",
-                "游戏路径不存在: {}".format(self.game_path)
-            )
-            return
+        # 连接按钮信号
+        # 使用 lambda，避免 clicked 的 checked 参数传给被追踪的方法
+        install_button.clicked.connect(lambda: self.install_enb()) # 连接安装按钮
+        start_button.clicked.connect(lambda: self.start_enb())
+        stop_button.clicked.connect(lambda: self.stop_enb())
+
+        # 设置窗口布局
+        enb_window.setLayout(main_layout)
+        enb_window.setMinimumSize(500, 400)
+        enb_window.finished.connect(self._on_enb_window_closed)
+        return enb_window
+
+    def _refresh_enb_window(self):
+        """每次打开 ENB 窗口前确定游戏路径并刷新预设列表，失败时返回 False"""
+        # 游戏路径在会话内只确定一次，通常不需要解析任何文件
+        game_path = self.game_paths.resolve()
+        if game_path is None:
+            game_path = self._prompt_for_game_path()
+            if game_path is None:
+                return False
+            self.game_paths.remember(game_path)
+        self.game_path = game_path
 
         # 检查 ENB 备份路径是否存在
         self.enb_backup_path = os.path.join(self.game_path, "ENB备份")
@@ -854,10 +1269,7 @@ class ConsolidationController(mobase.IPluginTool):
                     "错误",
                     f"创建ENB备份文件夹失败: {e}"
                 )
-                return
-
-        # 填充 ENB 列表 (调用新的辅助方法)
-        self.refresh_enb_list()
+                return False
 
         # 定义需要移动的文件和文件夹列表
         self.enb_files_and_folders = [
@@ -870,17 +1282,143 @@ class ConsolidationController(mobase.IPluginTool):
             "dxgi.dll"
         ]
 
-        # 连接按钮信号
-        install_button.clicked.connect(self.install_enb) # 连接安装按钮
-        start_button.clicked.connect(self.start_enb)
-        stop_button.clicked.connect(self.stop_enb)
-        
-        # 设置窗口布局
-        enb_window.setLayout(main_layout)
-        enb_window.setMinimumSize(500, 400)
-        enb_window.exec()
-        # 启动 ENB 功能
+        from .enb_store import EnbStore, STORE_DIR_NAME
+        from .enb_index import PresetIndex
+
+        # 去重存储位于 ENB备份/.store，未启用时不会创建任何文件
+        self.enb_store = EnbStore(os.path.join(self.enb_backup_path, STORE_DIR_NAME))
+        # 预设索引（大小、文件数、完整性、当前启用），按目录修改时间增量刷新
+        self.enb_index = PresetIndex(self.enb_backup_path, self.enb_files_and_folders)
+
+        # 上次切换 ENB 时若被中断（崩溃或强制关闭），自动前滚或回滚到一致状态
+        self._recover_interrupted_enb_switch()
+
+        # 通过指纹识别游戏目录中当前部署的是哪个预设（包括手动复制的）
+        try:
+            self.enb_index.refresh(self.enb_store)
+            self.enb_index.detect_active(self.game_path)
+        except Exception as e:
+            print(f"识别当前 ENB 预设失败: {e}")
+
+        # 填充 ENB 列表 (调用新的辅助方法)
+        self.refresh_enb_list()
+        return True
+
+    def _recover_interrupted_enb_switch(self):
+        from . import enb_deploy
+        try:
+            result = enb_deploy.recover_interrupted(self.game_path, self.enb_backup_path, self.enb_files_and_folders)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(
+                None,
+                "错误",
+                f"恢复上次中断的 ENB 切换失败: {str(e)}\n请检查游戏目录中的 ENB 文件。"
+            )
+            return
+        if result == "rolled_back":
+            QtWidgets.QMessageBox.information(None, "提示", "检测到上次 ENB 切换被中断，已恢复为切换前的 ENB。")
+        elif result == "rolled_forward":
+            QtWidgets.QMessageBox.information(None, "提示", "检测到上次 ENB 切换被中断，已完成切换。")
+
+    def _run_enb_job(self, work, on_success, error_message, cancel_message, trace_name="enb_job"):
+        """在后台线程中执行 ENB 文件操作，期间禁用按钮并显示进度"""
+        if self._enb_job is not None and self._enb_job.isRunning():
+            return
+
+        def succeeded(result):
+            self._end_enb_job()
+            on_success(result)
+
+        def failed(error):
+            self._end_enb_job()
+            QtWidgets.QMessageBox.critical(None, "错误", f"{error_message}\n错误信息: {str(error)}")
+
+        def cancelled():
+            self._end_enb_job()
+            QtWidgets.QMessageBox.information(None, "操作取消", cancel_message)
+
+        self._track_job("_enb_job", FileJobThread(work, self.tracer.span(trace_name)))
+        self._enb_job.progress.connect(self._on_enb_job_progress)
+        self._enb_job.job_succeeded.connect(succeeded)
+        self._enb_job.job_failed.connect(failed)
+        self._enb_job.job_cancelled.connect(cancelled)
+        self._set_enb_controls_busy(True)
+        self._enb_job.start()
+
+    def _track_job(self, attr, job):
+        """
+        保存后台任务的引用，直到 QThread.finished 才释放。
+        结果信号在线程结束之前发出，在结果的槽函数中释放引用会销毁仍在运行的 QThread。
+        """
+        setattr(self, attr, job)
+
+        def release():
+            if getattr(self, attr) is job:
+                setattr(self, attr, None)
+            job.deleteLater()
+
+        job.finished.connect(release)
+
+    def _set_enb_controls_busy(self, busy):
+        """任务进行时禁用操作按钮并显示进度条"""
+        try:
+            for button in self.enb_action_buttons:
+                button.setEnabled(not busy)
+            self.enb_progress_bar.setValue(0)
+            self.enb_progress_bar.setFormat("准备中...")
+            self.enb_progress_bar.setVisible(busy)
+            self.enb_cancel_button.setEnabled(busy)
+            self.enb_cancel_button.setVisible(busy)
+        except RuntimeError:
+            pass # ENB 窗口已关闭
+
+    def _end_enb_job(self):
+        self._set_enb_controls_busy(False)
+
+    def _on_enb_job_progress(self, files_done, files_total, bytes_done, bytes_total):
+        try:
+            if bytes_total:
+                self.enb_progress_bar.setValue(int(bytes_done * 1000 / bytes_total))
+            elif files_total:
+                self.enb_progress_bar.setValue(int(files_done * 1000 / files_total))
+            self.enb_progress_bar.setFormat(
+                f"{files_done}/{files_total} 个文件  {bytes_done / 1024 / 1024:.1f}/{bytes_total / 1024 / 1024:.1f} MB"
+            )
+        except RuntimeError:
+            pass
+
+    def _cancel_enb_job(self):
+        if self._enb_job is not None and self._enb_job.isRunning():
+            self._enb_job.requestInterruption()
+            self.enb_cancel_button.setEnabled(False)
+            self.enb_progress_bar.setFormat("正在取消...")
+
+    def _on_enb_window_closed(self, _result=None):
+        """窗口关闭时取消正在进行的任务；大量文件的删除、换入不响应取消，等待超时后让任务在后台完成"""
+        job = self._enb_job
+        if job is not None and job.isRunning():
+            job.requestInterruption()
+            if not job.wait(self.ENB_CLOSE_WAIT_MS):
+                print("ENB 文件操作仍在进行，将在后台完成")
+
+    def _enb_deploy_mode(self):
+        """读取 ENB 部署方式设置，无效值按复制处理"""
+        from .enb_deploy import DEPLOY_MODES
+        mode = str(self._get_setting("enb_deploy_mode", self.DEFAULT_ENB_DEPLOY_MODE)).strip().lower()
+        return mode if mode in DEPLOY_MODES else self.DEFAULT_ENB_DEPLOY_MODE
+
+    def _copy_workers(self):
+        """读取并发复制线程数设置，限制在 1~32 之间"""
+        try:
+            workers = int(self._get_setting("copy_workers", self.DEFAULT_COPY_WORKERS))
+        except (TypeError, ValueError):
+            workers = self.DEFAULT_COPY_WORKERS
+        return max(1, min(workers, 32))
+
+    # 启动 ENB 功能
+    @traced("start_enb")
     def start_enb(self):
+        from . import enb_deploy
         try:
             # 检查 ENB 列表是否初始化
             if not hasattr(self, 'enb_list') or self.enb_list is None:
@@ -900,12 +1438,15 @@ class ConsolidationController(mobase.IPluginTool):
                 )
                 return
 
-            enb_name = selected_item.text()
+            enb_name = selected_item.data(Qt.UserRole) or selected_item.text()
             enb_source_path = os.path.join(self.enb_backup_path, enb_name)
             game_path = self.game_path
 
+            # 预设可能是普通文件夹，也可能保存在去重存储中
+            in_store = not os.path.isdir(enb_source_path) and self.enb_store.has_preset(enb_name)
+
             # 验证源路径是否存在
-            if not os.path.exists(enb_source_path):
+            if not in_store and not os.path.exists(enb_source_path):
                 QtWidgets.QMessageBox.critical(
                     None,
                     "错误",
@@ -913,49 +1454,53 @@ class ConsolidationController(mobase.IPluginTool):
                 )
                 return
 
-            # 步骤 1: 删除游戏目录中的旧 ENB 文件
-            for item in self.enb_files_and_folders:
-                target_path = os.path.join(game_path, item)
-                if os.path.exists(target_path):
-                    try:
-                        if os.path.isfile(target_path):
-                            os.remove(target_path)
-                        elif os.path.isdir(target_path):
-                            shutil.rmtree(target_path)
-                    except Exception as e:
-                        QtWidgets.QMessageBox.critical(
-                            None,
-                            "错误",
-                            f"删除文件失败: {target_path}\n错误信息: {str(e)}"
-                        )
-                        return
-
-            # 步骤 2: 复制新 ENB 到游戏目录
-            for item in self.enb_files_and_folders:
-                source_item = os.path.join(enb_source_path, item)
-                target_item = os.path.join(game_path, item)
+            # 增量部署：只删除多余文件、只复制新增或变化的文件，相同文件保持不动
+            # 是否已经部署由清单哈希判断（抽样指纹只用于标记当前启用的预设），内容一致时不做任何文件操作
+            # 文件操作在后台线程中进行，这里只捕获后台线程需要的值
+            entries = list(self.enb_files_and_folders)
+            # 部署记录、切换日志、暂存区和回滚区都保存在 ENB备份 中（与游戏目录同一磁盘）
+            state_dir = self.enb_backup_path
+            mode = self._enb_deploy_mode()
+            workers = self._copy_workers()
+            store = self.enb_store
+            if in_store:
+                def work(progress, cancelled):
+                    manifest = store.preset_manifest(enb_name, entries)
+                    return enb_deploy.deploy_manifest(
+                        manifest,
+                        lambda rel: store.object_path(manifest[rel]["hash"]),
+                        game_path, entries, state_dir, mode, progress, cancelled, workers
+                    )
+            else:
+                def work(progress, cancelled):
+                    return enb_deploy.deploy_preset(
+                        enb_source_path, game_path, entries, state_dir, mode, progress, cancelled, workers
+                    )
 
-                try:
-                    if os.path.isfile(source_item):
-                        shutil.copy2(source_item, target_item)  # 复制文件并保留元数据
-                    elif os.path.isdir(source_item):
-                        shutil.copytree(
-                            source_item,
-                            target_item,
-                            dirs_exist_ok=True  # 允许覆盖目录
-                        )
-                except Exception as e:
-                    QtWidgets.QMessageBox.critical(
+            def on_success(stats):
+                print(f"ENB [{enb_name}] 部署完成: {stats.summary()}")
+                self.enb_index.set_active(enb_name)
+                self.refresh_enb_list()
+                self.enb_status_label.setText(stats.summary())
+                if not (stats.files_copied or stats.files_linked or stats.files_deleted):
+                    QtWidgets.QMessageBox.information(
                         None,
-                        "错误",
-                        f"复制文件失败: {source_item} → {target_item}\n错误信息: {str(e)}"
+                        "提示",
+                        f"ENB [{enb_name}] 已经是当前部署的预设，无需重新应用。"
                     )
                     return
+                QtWidgets.QMessageBox.information(
+                    None,
+                    "成功",
+                    f"ENB [{enb_name}] 已成功部署到游戏目录！"
+                )
 
-            QtWidgets.QMessageBox.information(
-                None,
-                "成功",
-                f"ENB [{enb_name}] 已成功部署到游戏目录！"
+            self._run_enb_job(
+                work,
+                on_success,
+                f"部署 ENB 文件失败: {enb_source_path} → {game_path}",
+                "部署已取消，游戏目录未被修改。",
+                "start_enb.job"
             )
 
         except Exception as e:
@@ -967,30 +1512,34 @@ class ConsolidationController(mobase.IPluginTool):
 
 
     # 关闭 ENB 功能
+    @traced("stop_enb")
     def stop_enb(self):
+        from . import enb_deploy
         game_path = self.game_path
-        for item in self.enb_files_and_folders:
-                target_path = os.path.join(game_path, item)
-                if os.path.exists(target_path):
-                    try:
-                        if os.path.isfile(target_path):
-                            os.remove(target_path)
-                        elif os.path.isdir(target_path):
-                            shutil.rmtree(target_path)
-                    except Exception as e:
-                        QtWidgets.QMessageBox.critical(
-                            None,
-                            "错误",
-                            f"删除文件失败: {target_path}\n错误信息: {str(e)}"
-                        )
-                        return
-        QtWidgets.QMessageBox.information(
-        None,
-        "成功",
-        f"ENB已成功禁用！"
+        entries = list(self.enb_files_and_folders)
+        state_dir = self.enb_backup_path
+
+        def work(progress, cancelled):
+            # 删除不响应取消，避免留下一半的 ENB
+            enb_deploy.remove_entries(game_path, entries, state_dir, progress)
+
+        def on_success(_result):
+            self.enb_index.set_active(None)
+            self.refresh_enb_list()
+            QtWidgets.QMessageBox.information(None, "成功", "ENB已成功禁用！")
+
+        self._run_enb_job(
+            work,
+            on_success,
+            f"删除 ENB 文件失败: {game_path}",
+            "操作已取消。",
+            "stop_enb.job"
         )
     # 新增：安装 ENB 的方法
+    @traced("install_enb")
     def install_enb(self):
+        import shutil
+        from . import enb_deploy
         try:
             # 1. 选择源文件夹
             source_dir = QtWidgets.QFileDialog.getExistingDirectory(
@@ -1015,9 +1564,10 @@ class ConsolidationController(mobase.IPluginTool):
 
             preset_name = preset_name.strip()
             target_path = os.path.join(self.enb_backup_path, preset_name)
+            use_store = bool(self._get_setting("enb_dedup_store", False))
 
-            # 3. 检查是否已存在并处理覆盖
-            if os.path.exists(target_path):
+            # 3. 检查是否已存在并处理覆盖（普通文件夹或去重存储中的同名预设）
+            if os.path.exists(target_path) or self.enb_store.has_preset(preset_name):
                 # 使用 PyQt6/PyQt5 兼容的方式引用 StandardButton
                 try:
                     # 尝试 PyQt6
@@ -1047,35 +1597,48 @@ class ConsolidationController(mobase.IPluginTool):
                 if not should_continue:
                     QtWidgets.QMessageBox.information(None, "操作取消", "安装已取消。")
                     return
-                else:
-                    try:
-                        shutil.rmtree(target_path) # 覆盖前先删除旧的
-                    except Exception as e:
-                         QtWidgets.QMessageBox.critical(None, "错误", f"无法删除旧的预设文件夹: {target_path}\n错误: {str(e)}")
-                         return
 
-            # 4. 创建目录并复制文件
-            try:
-                shutil.copytree(source_dir, target_path)
+            # 4. 在后台线程中复制文件，或导入去重存储
+            store = self.enb_store
+            workers = self._copy_workers()
+
+            def work(progress, cancelled):
+                # 新预设完整写入后才替换或删除同名的旧预设，取消或失败时旧预设保持不变
+                if not use_store:
+                    # 先复制到临时文件夹，完成后再换入；取消或失败时只删除临时文件夹
+                    enb_deploy.replace_tree(source_dir, target_path, progress, cancelled, workers)
+                    if store.has_preset(preset_name):
+                        store.delete_preset(preset_name)
+                    return
+                try:
+                    # 引用树在导入完成时才写入，替换存储中的同名旧预设
+                    bytes_written = store.import_preset(source_dir, preset_name, progress, cancelled, workers)
+                finally:
+                    # 回收被覆盖预设、或中断导入留下的未引用文件
+                    removed, freed = store.gc()
+                if os.path.exists(target_path):
+                    shutil.rmtree(target_path)
+                print(f"ENB 预设 '{preset_name}' 已导入去重存储: 新写入 {bytes_written} 字节，回收 {removed} 个文件 ({freed} 字节)")
 
+            def on_success(_result):
                 # 5. 刷新列表
                 self.refresh_enb_list()
                 QtWidgets.QMessageBox.information(None, "成功", f"ENB 预设 '{preset_name}' 已成功安装！")
 
-            except Exception as e:
-                QtWidgets.QMessageBox.critical(None, "安装失败", f"复制 ENB 文件时出错: {str(e)}")
-                # 清理可能部分创建的文件夹
-                if os.path.exists(target_path):
-                    try:
-                        shutil.rmtree(target_path)
-                    except Exception:
-                        pass # 忽略清理错误
+            self._run_enb_job(
+                work,
+                on_success,
+                "复制 ENB 文件时出错",
+                "安装已取消，已复制的文件已清理，原有的同名预设未被修改。",
+                "install_enb.job"
+            )
 
         except Exception as e:
             QtWidgets.QMessageBox.critical(None, "未知错误", f"安装 ENB 时发生错误: {str(e)}")
 
 
     # 新增：刷新 ENB 列表的方法
+    @traced("refresh_enb_list")
     def refresh_enb_list(self):
         # 检查 ENB 列表控件和备份路径是否存在
         if not hasattr(self, 'enb_list') or self.enb_list is None:
@@ -1089,11 +1652,23 @@ class ConsolidationController(mobase.IPluginTool):
 
         self.enb_list.clear()
         try:
-            presets = [d for d in os.listdir(self.enb_backup_path) if os.path.isdir(os.path.join(self.enb_backup_path, d))]
+            # 只重新扫描目录修改时间变化过的预设
+            store = getattr(self, 'enb_store', None)
+            presets = self.enb_index.refresh(store)
             if presets:
-                self.enb_list.addItems(presets)
+                for name in presets:
+                    item = QtWidgets.QListWidgetItem(self.enb_index.describe(name))
+                    item.setData(Qt.UserRole, name) # 实际预设名称，供应用 ENB 时使用
+                    item.setToolTip(self.enb_index.tooltip(name))
+                    self.enb_list.addItem(item)
                 if hasattr(self, 'enb_status_label'):
-                    self.enb_status_label.setText(f"找到 {len(presets)} 个 ENB 预设。")
+                    status_text = f"找到 {len(presets)} 个 ENB 预设。"
+                    if self.enb_index.active:
+                        status_text += f" 当前启用: {self.enb_index.active}"
+                    dedup_text = store.dedup_summary() if store is not None else ""
+                    if dedup_text:
+                        status_text += f" ({dedup_text})"
+                    self.enb_status_label.setText(status_text)
             else:
                 if hasattr(self, 'enb_status_label'):
                     self.enb_status_label.setText("在 ENB备份 文件夹中未找到任何预设。")
@@ -1106,235 +1681,214 @@ class ConsolidationController(mobase.IPluginTool):
 
     def show_resolution_settings(self):
         try:
-            # 构建配置文件路径
-            config_path = os.path.join(
-                self.organizer.modsPath(),
-                "显示修复-SSE Display Tweaks",
-                "SKSE",
-                "Plugins",
-                "SSEDisplayTweaks.ini"
-            )
+            self.dialogs.open("resolution", self._build_resolution_window, self._refresh_resolution_window)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(None, "未知错误",
+                f"初始化分辨率设置失败:\n{str(e)}")
+            return
 
-            # 预处理INI文件（关键修复）
-            if os.path.exists(config_path):
-                # 使用utf-8-sig自动处理BOM
-                with open(config_path, 'r', encoding='utf-8-sig') as file:
-                    content = file.read()
-                    
-                    # 强制转换为标准INI格式
-                    content = content.lstrip('\ufeff')  # 确保移除BOM
-                    content = content.replace('\r\n', '\n').replace('\r', '\n')  # 统一换行符
-                    
-                    # 确保有[Render]节
-                    if '[Render]' not in content:
-                        content = '[Render]\n' + content
-                        
-                    # 临时文件路径
-                    temp_path = config_path + ".tmp"
-                    with open(temp_path, 'w', encoding='utf-8') as cleaned_file:
-                        cleaned_file.write(content)
-                        
-                # 替换原文件
-                shutil.move(temp_path, config_path)
-            
-            # 读取配置（使用预处理后的文件）
-            config = configparser.ConfigParser()
-            try:
-                config.read(config_path, encoding='utf-8')
-            except Exception as e:
-                QtWidgets.QMessageBox.critical(None, "配置文件错误",
-                    f"无法解析配置文件:\n{str(e)}\n"
-                    "请确保SSEDisplayTweaks.ini格式正确！")
-                return
-                
-            # 创建分辨率设置窗口
-            resolution_window = QtWidgets.QDialog()
-            resolution_window.setWindowTitle("分辨率设置")
-            resolution_window.setWindowFlags(resolution_window.windowFlags() | Qt.WindowCloseButtonHint)
-            
-            # 创建主布局
-            main_layout = QtWidgets.QVBoxLayout()
-            main_layout.setSpacing(10)
-            main_layout.setContentsMargins(15, 15, 15, 15)
-            
-            # 添加标题标签
-            title_label = QtWidgets.QLabel("游戏分辨率设置")
-            title_font = QtGui.QFont()
-            title_font.setPointSize(14)
-            title_font.setBold(True)
-            title_label.setFont(title_font)
-            title_label.setAlignment(Qt.AlignCenter)
-            main_layout.addWidget(title_label)
-            
-            # 添加说明文本
-            info_text = QtWidgets.QLabel("在这里可以设置游戏的分辨率和窗口模式，设置将在重启游戏后生效。")
-            info_text.setWordWrap(True)
-            info_text.setStyleSheet("color: #666; margin-bottom: 10px;")
-            main_layout.addWidget(info_text)
-            
-            # 创建表单布局
-            form_layout = QtWidgets.QFormLayout()
-            form_layout.setVerticalSpacing(10)
-            form_layout.setHorizontalSpacing(15)
-            
-            # 当前分辨率显示
-            try:
-                current_res = config.get("Render", "Resolution")
-            except (configparser.NoOptionError, configparser.NoSectionError):
-                current_res = "未设置"
-                
-            current_res_value = QtWidgets.QLabel(current_res)
-            current_res_value.setStyleSheet("font-weight: bold; color: #4a86e8;")
-            form_layout.addRow("当前分辨率:", current_res_value)
-            
-            # 分辨率输入框
-            self.res_input = QtWidgets.QLineEdit()
-            self.res_input.setPlaceholderText("例如：1920x1080")
-            self.res_input.setStyleSheet("""
-                QLineEdit {
-                    padding: 8px;
-                    border: 1px solid #ccc;
-                    border-radius: 4px;
-                    background-color: #f8f8f8;
-                }
-                QLineEdit:focus {
-                    border: 1px solid #4a86e8;
-                }
-            """)
-            form_layout.addRow("新分辨率:", self.res_input)
-            
-            # 窗口模式选择
-            mode_group = QtWidgets.QGroupBox("窗口模式")
-            mode_group.setStyleSheet("""
-                QGroupBox {
-                    font-weight: bold;
-                    border: 1px solid #ccc;
-                    border-radius: 4px;
-                    margin-top: 10px;
-                    padding-top: 10px;
-                }
-                QGroupBox::title {
-                    subcontrol-origin: margin;
-                    left: 10px;
-                    padding: 0 5px;
-                }
-            """)
-            
-            mode_layout = QtWidgets.QVBoxLayout()
-            
-            self.fullscreen_check = QtWidgets.QCheckBox("全屏模式")
-            self.borderless_check = QtWidgets.QCheckBox("无边框窗口")
-            
-            checkbox_style = """
-                QCheckBox {
-                    spacing: 8px;
-                }
-                QCheckBox::indicator {
-                    width: 18px;
-                    height: 18px;
-                }
-                QCheckBox::indicator:unchecked {
-                    border: 1px solid #ccc;
-                    background-color: white;
-                    border-radius: 3px;
-                }
-                QCheckBox::indicator:checked {
-                    background-color: #4a86e8;
-                    border: 1px solid #4a86e8;
-                    border-radius: 3px;
-                }
-            """
-            
-            self.fullscreen_check.setStyleSheet(checkbox_style)
-            self.borderless_check.setStyleSheet(checkbox_style)
-            
-            self.fullscreen_check.clicked.connect(self.update_window_mode)
-            self.borderless_check.clicked.connect(self.update_window_mode)
-            
-            # 更新初始状态
-            try:
-                fullscreen = config.getboolean("Render", "Fullscreen", fallback=False)
-                borderless = config.getboolean("Render", "Borderless", fallback=False)
-                self.fullscreen_check.setChecked(fullscreen)
-                self.borderless_check.setChecked(borderless)
-            except Exception:
-                pass
-                
-            mode_layout.addWidget(self.fullscreen_check)
-            mode_layout.addWidget(self.borderless_check)
-            mode_group.setLayout(mode_layout)
-            
-            # 自动分辨率MOD开关
-            self.auto_res_check = QtWidgets.QCheckBox("启用自动分辨率调整")
-            self.auto_res_check.setStyleSheet(checkbox_style)
-            auto_res_state = self.organizer.modList().state("自动分辨率设置-Auto Resolution")
-            auto_res_enabled = auto_res_state == mobase.ModState.ACTIVE
-            self.auto_res_check.setChecked(auto_res_enabled)
-            
-            # 添加表单布局到主布局
-            main_layout.addLayout(form_layout)
-            main_layout.addWidget(mode_group)
-            main_layout.addWidget(self.auto_res_check)
-            
-            # 添加按钮
-            button_layout = QtWidgets.QHBoxLayout()
-            button_layout.setSpacing(10)
-            
-            # 按钮样式
-            button_style = """
-            QPushButton {
-                background-color: #4a86e8;
-                color: white;
-                border: none;
-                padding: 10px;
-                border-radius: 5px;
-                font-size: 12px;
-                min-height: 40px;
-                min-width: 100px;
-            }
-            QPushButton:hover {
-                background-color: #3a76d8;
-            }
-            QPushButton:pressed {
-                background-color: #2a66c8;
-            }
-            """
-            
-            cancel_btn = QtWidgets.QPushButton("取消")
-            cancel_btn.setStyleSheet(button_style.replace("#4a86e8", "#999").replace("#3a76d8", "#888").replace("#2a66c8", "#777"))
-            cancel_btn.clicked.connect(resolution_window.reject)
-            
-            confirm_btn = QtWidgets.QPushButton("确认设置")
-            confirm_btn.setStyleSheet(button_style)
-            confirm_btn.clicked.connect(lambda: self.apply_resolution_settings(config_path) or resolution_window.accept())
-            
-            button_layout.addWidget(cancel_btn)
-            button_layout.addWidget(confirm_btn)
-            
-            main_layout.addLayout(button_layout)
-            
-            # 设置窗口布局
-            resolution_window.setLayout(main_layout)
-            resolution_window.setMinimumWidth(350)
-            resolution_window.exec()
-        except FileNotFoundError:
+    def _refresh_resolution_window(self):
+        """每次打开分辨率窗口前重新读取 SSEDisplayTweaks.ini 并刷新当前值，失败时返回 False"""
+        # 构建配置文件路径
+        config_path = os.path.join(
+            self.organizer.modsPath(),
+            "显示修复-SSE Display Tweaks",
+            "SKSE",
+            "Plugins",
+            "SSEDisplayTweaks.ini"
+        )
+
+        from .ini_editor import IniDocument
+
+        # IniDocument.load 对不存在的文件返回空文档，这里先检查
+        if not os.path.isfile(config_path):
             QtWidgets.QMessageBox.critical(None, "文件未找到",
                 "SSEDisplayTweaks.ini文件不存在！\n"
                 "请确认已安装SSE Display Tweaks模组")
-            return
+            return False
+
+        # 只解析一次，保留注释和键的顺序；确认设置时复用同一份文档
+        try:
+            config = IniDocument.load(config_path)
+            self.display_tweaks_ini = config
         except Exception as e:
-            QtWidgets.QMessageBox.critical(None, "未知错误",
-                f"初始化分辨率设置失败:\n{str(e)}")
-            return
+            QtWidgets.QMessageBox.critical(None, "配置文件错误",
+                f"无法解析配置文件:\n{str(e)}\n"
+                "请确保SSEDisplayTweaks.ini格式正确！")
+            return False
+
+        self.current_res_value.setText(config.get("Render", "Resolution", fallback="未设置"))
+        self.fullscreen_check.setChecked(config.getboolean("Render", "Fullscreen", fallback=False))
+        self.borderless_check.setChecked(config.getboolean("Render", "Borderless", fallback=False))
+        auto_res_state = self.organizer.modList().state(self.AUTO_RESOLUTION_MOD_NAME)
+        self.auto_res_check.setChecked(bool(auto_res_state & mobase.ModState.ACTIVE))
+        return True
+
+    def _build_resolution_window(self):
+        # 创建分辨率设置窗口
+        resolution_window = QtWidgets.QDialog()
+        resolution_window.setWindowTitle("分辨率设置")
+        resolution_window.setWindowFlags(resolution_window.windowFlags() | Qt.WindowCloseButtonHint)
+        
+        # 创建主布局
+        main_layout = QtWidgets.QVBoxLayout()
+        main_layout.setSpacing(10)
+        main_layout.setContentsMargins(15, 15, 15, 15)
+        
+        # 添加标题标签
+        title_label = QtWidgets.QLabel("游戏分辨率设置")
+        title_font = QtGui.QFont()
+        title_font.setPointSize(14)
+        title_font.setBold(True)
+        title_label.setFont(title_font)
+        title_label.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(title_label)
+        
+        # 添加说明文本
+        info_text = QtWidgets.QLabel("在这里可以设置游戏的分辨率和窗口模式，设置将在重启游戏后生效。")
+        info_text.setWordWrap(True)
+        info_text.setStyleSheet("color: #666; margin-bottom: 10px;")
+        main_layout.addWidget(info_text)
+        
+        # 创建表单布局
+        form_layout = QtWidgets.QFormLayout()
+        form_layout.setVerticalSpacing(10)
+        form_layout.setHorizontalSpacing(15)
+        
+        # 当前分辨率显示（打开窗口时刷新）
+        self.current_res_value = QtWidgets.QLabel("未设置")
+        self.current_res_value.setStyleSheet("font-weight: bold; color: #4a86e8;")
+        form_layout.addRow("当前分辨率:", self.current_res_value)
+        
+        # 分辨率输入框
+        self.res_input = QtWidgets.QLineEdit()
+        self.res_input.setPlaceholderText("例如：1920x1080")
+        self.res_input.setStyleSheet("""
+            QLineEdit {
+                padding: 8px;
+                border: 1px solid #ccc;
+                border-radius: 4px;
+                background-color: #f8f8f8;
+            }
+            QLineEdit:focus {
+                border: 1px solid #4a86e8;
+            }
+        """)
+        form_layout.addRow("新分辨率:", self.res_input)
+        
+        # 窗口模式选择
+        mode_group = QtWidgets.QGroupBox("窗口模式")
+        mode_group.setStyleSheet("""
+            QGroupBox {
+                font-weight: bold;
+                border: 1px solid #ccc;
+                border-radius: 4px;
+                margin-top: 10px;
+                padding-top: 10px;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+            }
+        """)
+        
+        mode_layout = QtWidgets.QVBoxLayout()
+        
+        self.fullscreen_check = QtWidgets.QCheckBox("全屏模式")
+        self.borderless_check = QtWidgets.QCheckBox("无边框窗口")
+        
+        checkbox_style = """
+            QCheckBox {
+                spacing: 8px;
+            }
+            QCheckBox::indicator {
+                width: 18px;
+                height: 18px;
+            }
+            QCheckBox::indicator:unchecked {
+                border: 1px solid #ccc;
+                background-color: white;
+                border-radius: 3px;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #4a86e8;
+                border: 1px solid #4a86e8;
+                border-radius: 3px;
+            }
+        """
+        
+        self.fullscreen_check.setStyleSheet(checkbox_style)
+        self.borderless_check.setStyleSheet(checkbox_style)
+        
+        self.fullscreen_check.clicked.connect(self.update_window_mode)
+        self.borderless_check.clicked.connect(self.update_window_mode)
+        
+        mode_layout.addWidget(self.fullscreen_check)
+        mode_layout.addWidget(self.borderless_check)
+        mode_group.setLayout(mode_layout)
+        
+        # 自动分辨率MOD开关
+        self.auto_res_check = QtWidgets.QCheckBox("启用自动分辨率调整")
+        self.auto_res_check.setStyleSheet(checkbox_style)
+        
+        # 添加表单布局到主布局
+        main_layout.addLayout(form_layout)
+        main_layout.addWidget(mode_group)
+        main_layout.addWidget(self.auto_res_check)
+        
+        # 添加按钮
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.setSpacing(10)
+        
+        # 按钮样式
+        button_style = """
+        QPushButton {
+            background-color: #4a86e8;
+            color: white;
+            border: none;
+            padding: 10px;
+            border-radius: 5px;
+            font-size: 12px;
+            min-height: 40px;
+            min-width: 100px;
+        }
+        QPushButton:hover {
+            background-color: #3a76d8;
+        }
+        QPushButton:pressed {
+            background-color: #2a66c8;
+        }
+        """
+        
+        cancel_btn = QtWidgets.QPushButton("取消")
+        cancel_btn.setStyleSheet(button_style.replace("#4a86e8", "#999").replace("#3a76d8", "#888").replace("#2a66c8", "#777"))
+        cancel_btn.clicked.connect(resolution_window.reject)
+        
+        confirm_btn = QtWidgets.QPushButton("确认设置")
+        confirm_btn.setStyleSheet(button_style)
+        confirm_btn.clicked.connect(lambda: self.apply_resolution_settings(self.display_tweaks_ini.path) or resolution_window.accept())
+        
+        button_layout.addWidget(cancel_btn)
+        button_layout.addWidget(confirm_btn)
+        
+        main_layout.addLayout(button_layout)
+        
+        # 设置窗口布局
+        resolution_window.setLayout(main_layout)
+        resolution_window.setMinimumWidth(350)
+        # 关闭窗口时不再等待合并，立即同步到 overwrite 目录
+        resolution_window.finished.connect(lambda _result: self._flush_pending_settings_mirrors())
+        return resolution_window
 
+    @traced("apply_resolution_settings")
     def apply_resolution_settings(self, config_path):
         try:
-            # 创建必要目录结构
-            os.makedirs(os.path.dirname(config_path), exist_ok=True)
-            
-            # 读取时使用utf-8-sig
-            config = configparser.ConfigParser()
-            config.read(config_path, encoding='utf-8-sig')
+            # 复用打开窗口时解析的文档
+            config = self.display_tweaks_ini
+            if config is None or config.path != config_path:
+                from .ini_editor import IniDocument
+                config = IniDocument.load(config_path)
             # 验证分辨率格式
             resolution = self.res_input.text().strip()
             if resolution:
@@ -1342,67 +1896,26 @@ class ConsolidationController(mobase.IPluginTool):
                     QtWidgets.QMessageBox.warning(None, "格式错误", "分辨率格式不正确，请使用 宽x高 格式（例如：1920x1080）")
                     return
 
-            # 确保文件存在并符合格式
-            try:
-                # 添加默认节头
-                default_section = '[Render]\n'
-                with open(config_path, 'r+', encoding='utf-8') as file:
-                    content = file.read()
-                    if not content.startswith('['):
-                        content = default_section + content
-                        file.seek(0)
-                        file.write(content)
-                        file.truncate()
-            except FileNotFoundError:
-                # 如果文件不存在，创建一个空文件
-                with open(config_path, 'w', encoding='utf-8') as file:
-                    file.write('[Render]\n')
-
-            # 写入SSEDisplayTweaks.ini
-            config = configparser.ConfigParser()
-            config.read(config_path, encoding='utf-8')
-            
-            if not config.has_section("Render"):
-                config.add_section("Render")
-            
-            # 获取当前配置
-            current_res = config.get("Render", "Resolution", fallback="未设置")
-            current_fullscreen = config.getboolean("Render", "Fullscreen", fallback=False)
-            current_borderless = config.getboolean("Render", "Borderless", fallback=False)
-            
-            # 更新配置
+            # 更新配置（值未变化的键不会标记为修改，缺少的键和 [Render] 节会被补上）
             if resolution:
                 config.set("Render", "Resolution", resolution)
             config.set("Render", "Fullscreen", str(self.fullscreen_check.isChecked()).lower())
             config.set("Render", "Borderless", str(self.borderless_check.isChecked()).lower())
-            
-            # 保存配置到原始路径
-            with open(config_path, 'w', encoding='utf-8') as configfile:
-                config.write(configfile)
+
+            # 只在有修改时原子地写回原始路径
+            config.save()
             
             # 确定目标路径（overwrite目录）
             overwrite_path = os.path.join(self.organizer.overwritePath(), "SKSE", "Plugins", "SSEDisplayTweaks.ini")
-            
-            # 创建目标目录（如果不存在）
-            os.makedirs(os.path.dirname(overwrite_path), exist_ok=True)
-            
+
             try:
-                # 备份目标文件
-                if os.path.exists(overwrite_path):
-                    shutil.copy(overwrite_path, overwrite_path + ".bak")
-                
-                # 复制到overwrite目录
-                shutil.copy(config_path, overwrite_path)
+                # 延迟同步到overwrite目录，内容相同时不会写入
+                self._schedule_settings_mirror(config_path, overwrite_path)
                 
-                # 处理自动分辨率MOD
+                # 处理自动分辨率MOD（状态未变化时不会刷新）
                 try:
-                    mod_list = self.organizer.modList()
-                    current_state = mod_list.state("自动分辨率设置-Auto Resolution")
-                    target_state = mobase.ModState.ACTIVE if self.auto_res_check.isChecked() else mobase.ModState.INACTIVE
-                    
-                    if current_state != target_state:
-                        mod_list.setState("自动分辨率设置-Auto Resolution", target_state)
-                        self.organizer.refresh()
+                    with self.mod_states:
+                        self.mod_states.set_active(self.AUTO_RESOLUTION_MOD_NAME, self.auto_res_check.isChecked())
                 except Exception as e:
                     QtWidgets.QMessageBox.warning(None, "MOD状态错误", f"无法修改自动分辨率MOD状态: {str(e)}")
                 
@@ -1413,15 +1926,41 @@ class ConsolidationController(mobase.IPluginTool):
                 )
             except Exception as e:
                 QtWidgets.QMessageBox.critical(None, "写入失败", f"无法保存设置: {str(e)}")
-            with open(config_path, 'w', encoding='utf-8') as configfile:
-                config.write(configfile)
-                
+
         except Exception as e:
             QtWidgets.QMessageBox.critical(None, "保存失败",
                 f"无法保存设置:\n{str(e)}\n"
                 "请检查文件权限和防病毒软件设置！")
             return
 
+    def _schedule_settings_mirror(self, source, target):
+        """把 source 同步到 target；短时间内的多次调用合并为一次写入"""
+        self._pending_mirrors[target] = source
+        if self._mirror_timer is None:
+            self._mirror_timer = QTimer()
+            self._mirror_timer.setSingleShot(True)
+            self._mirror_timer.setInterval(self.SETTINGS_MIRROR_DELAY_MS)
+            self._mirror_timer.timeout.connect(self._flush_settings_mirrors)
+        self._mirror_timer.start() # 重新开始计时
+
+    def _flush_pending_settings_mirrors(self):
+        """停止合并计时，立即写入所有等待中的同步"""
+        if self._mirror_timer is not None:
+            self._mirror_timer.stop()
+        if self._pending_mirrors:
+            self._flush_settings_mirrors()
+
+    def _flush_settings_mirrors(self):
+        pending, self._pending_mirrors = self._pending_mirrors, {}
+        from .settings_sync import SettingsMirror
+        mirror = SettingsMirror(self._get_setting("settings_backup_count", self.DEFAULT_SETTINGS_BACKUP_COUNT))
+        for target, source in pending.items():
+            try:
+                if mirror.mirror(source, target):
+                    print(f"已同步 {source} -> {target}")
+            except Exception as e:
+                QtWidgets.QMessageBox.critical(None, "写入失败", f"无法同步设置到 overwrite 目录: {str(e)}")
+
     def update_window_mode(self):
         pass # 添加 pass 语句以修复空函数体错误
     # +++ 添加版本比较函数 (带缩进修复和健壮性改进) +++
@@ -1481,26 +2020,8 @@ class ConsolidationController(mobase.IPluginTool):
         print(f"本地版本已从 {old_version} 更新为 {self.local_version}")
 
         # 如果 UI 正在显示，尝试更新 UI 上的标签
-        if hasattr(self, 'version_label') and self.version_label and hasattr(self, 'window') and self.window and self.window.isVisible():
-             # 更新显示的版本文本
-             version_text = f"本地版本: {self.local_version}"
-             if self.server_version:
-                 version_text += f" / 服务器: {self.server_version}"
-             # 检查是否还需要红色高亮 (更新后本地应该等于或高于服务器)
-             label_style = "color: #999; font-size: 10px;" # 恢复默认样式
-             # 重新比较更新后的本地版本和服务器版本
-             if self.server_version and self._compare_versions(self.server_version, self.local_version) > 0:
-                 label_style = "color: red; font-size: 10px; font-weight: bold;"
-
-             # 确保在 Qt 主线程中更新 UI
-             # (如果此方法可能从非主线程调用，需要使用信号槽机制)
-             # 假设目前是从主线程调用的
-             try:
-                 self.version_label.setText(version_text)
-                 self.version_label.setStyleSheet(label_style)
-                 print("UI 版本标签已更新")
-             except Exception as e:
-                 print(f"更新 UI 版本标签时出错: {e}")
+        if self._update_version_label():
+            print("UI 版本标签已更新")
         else:
             print("UI 未显示或 version_label 不可用，跳过 UI 更新")
 
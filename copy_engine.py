@@ -0,0 +1,90 @@
+# coding=utf-8
+
+import os
+import shutil
+
+
+DEFAULT_WORKERS = 4
+COPY_FILE_RANGE_CHUNK = 64 * 1024 * 1024
+
+
+class CopyErrors(Exception):
+    """批量文件操作中一个或多个文件失败，failures 为 [(项目, 异常)]"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        details = "\n".join(f"{item}: {error}" for item, error in failures[:5])
+        if len(failures) > 5:
+            details += f"\n... 以及另外 {len(failures) - 5} 个错误"
+        super().__init__(f"{len(failures)} 个文件处理失败:\n{details}")
+
+
+def _copy_with_file_range(source, target):
+    """使用 copy_file_range 在内核态复制数据，不经过用户态缓冲区"""
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), min(remaining, COPY_FILE_RANGE_CHUNK))
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def copy_file(source, target):
+    """
+    复制单个文件并保留元数据，效果与 shutil.copy2 相同。
+
+    Linux 上优先使用 copy_file_range，文件系统不支持时回退到 shutil.copyfile
+    （它在各平台上已经使用 sendfile / fcopyfile / 大缓冲区读写）。
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            _copy_with_file_range(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+    else:
+        shutil.copyfile(source, target)
+    shutil.copystat(source, target)
+
+
+def run_parallel(items, func, workers=DEFAULT_WORKERS, tracker=None, size_of=None):
+    """
+    用有界线程池对 items 中的每一项调用 func(item)，返回与 items 顺序一致的结果列表。
+
+    单个文件失败不会中止其他文件，全部完成后以 CopyErrors 汇总抛出。
+    tracker 为 enb_deploy.ProgressTracker：每完成一项报告一次进度；
+    取消后尚未开始的项目会被跳过，已开始的项目会完成，最后抛出 OperationCancelled。
+    size_of(item) 返回该项的字节数，用于进度统计。
+    """
+    results = [None] * len(items)
+    failures = []
+
+    def task(index, item):
+        if tracker is not None and tracker.is_cancelled():
+            return
+        results[index] = func(item)
+        if tracker is not None:
+            tracker.advance(size_of(item) if size_of else 0)
+
+    if workers <= 1 or len(items) <= 1:
+        for index, item in enumerate(items):
+            if tracker is not None:
+                tracker.check()
+            try:
+                task(index, item)
+            except Exception as e:
+                failures.append((item, e))
+    else:
+        from concurrent.futures import ThreadPoolExecutor, as_completed # 只有并行复制时才需要
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(task, index, item): item for index, item in enumerate(items)}
+            for future in as_completed(futures):
+                error = future.exception()
+                if error is not None:
+                    failures.append((futures[future], error))
+
+    if tracker is not None:
+        tracker.check()
+    if failures:
+        raise CopyErrors(failures)
+    return results
@@ -0,0 +1,69 @@
+# coding=utf-8
+
+import time
+
+try:
+    from PyQt6.QtCore import QTimer
+except ImportError:
+    from PyQt5.QtCore import QTimer
+
+
+class DialogRegistry:
+    """
+    按名称缓存插件窗口：第一次打开时构建，关闭后隐藏保留，再次打开时只刷新动态数据。
+
+    同时记录每个窗口从调用到显示的耗时（冷启动 / 热启动），用于比较构建窗口的开销。
+    """
+
+    def __init__(self, tracer=None):
+        self._dialogs = {}
+        self.timings = {} # 名称 -> {"cold": [毫秒], "warm": [毫秒]}
+        self.tracer = tracer # 设置时同时把打开耗时写入追踪日志
+
+    def get(self, name):
+        return self._dialogs.get(name)
+
+    def open(self, name, build, refresh=None):
+        """
+        显示名为 name 的模态窗口。
+
+        build() 返回新建的 QDialog，只在第一次打开时调用；
+        refresh() 在每次显示前调用，返回 False 时取消显示。
+        返回 exec() 的结果，取消显示时返回 None。
+        """
+        started = time.perf_counter()
+        dialog = self._dialogs.get(name)
+        cold = dialog is None
+        if cold:
+            dialog = build()
+            self._dialogs[name] = dialog
+        if refresh is not None and refresh() is False:
+            return None
+        # 进入 exec 的事件循环后窗口已经显示，此时记录耗时
+        QTimer.singleShot(0, lambda: self._record(name, cold, started))
+        return dialog.exec()
+
+    def _record(self, name, cold, started):
+        elapsed = (time.perf_counter() - started) * 1000
+        kind = "cold" if cold else "warm"
+        self.timings.setdefault(name, {"cold": [], "warm": []})[kind].append(elapsed)
+        print(f"窗口 {name} 打开耗时 {elapsed:.1f} ms ({'首次构建' if cold else '复用'})")
+        if self.tracer is not None:
+            self.tracer.record(f"dialog:{name}", elapsed, cold=cold)
+
+    def timing_summary(self):
+        """{名称: {"cold": 平均毫秒, "warm": 平均毫秒}}，没有记录的一项为 None"""
+        return {
+            name: {kind: (sum(values) / len(values) if values else None) for kind, values in kinds.items()}
+            for name, kinds in self.timings.items()
+        }
+
+    def close_all(self):
+        """关闭并释放所有缓存的窗口（MO2 退出时调用）"""
+        dialogs, self._dialogs = self._dialogs, {}
+        for dialog in dialogs.values():
+            try:
+                dialog.close()
+                dialog.deleteLater()
+            except RuntimeError:
+                pass # 底层 Qt 对象已被销毁
@@ -0,0 +1,568 @@
+# coding=utf-8
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+from .copy_engine import DEFAULT_WORKERS, copy_file, run_parallel
+
+try:
+    import fcntl # 仅在 Linux/macOS 上可用，用于 reflink
+except ImportError:
+    fcntl = None
+
+
+MANIFEST_FILE_NAME = ".enb_manifest.json" # 每个预设目录中的清单文件
+DEPLOYED_RECORD_FILE_NAME = ".enb_deployed.json" # 记录当前部署到游戏目录的文件
+JOURNAL_FILE_NAME = ".enb_journal.json" # 正在进行的切换，用于中断后恢复
+STAGING_DIR_NAME = ".enb_staging" # 新预设文件的暂存区
+ROLLBACK_DIR_NAME = ".enb_rollback" # 被替换的旧文件，切换完成前用于回滚
+HASH_CHUNK_SIZE = 1024 * 1024
+
+DEPLOY_MODE_COPY = "copy"
+DEPLOY_MODE_HARDLINK = "hardlink"
+DEPLOY_MODE_REFLINK = "reflink"
+DEPLOY_MODES = (DEPLOY_MODE_COPY, DEPLOY_MODE_HARDLINK, DEPLOY_MODE_REFLINK)
+
+# 用户可能在游戏目录中直接编辑的配置和着色器文件，硬链接会把修改写回备份预设（或去重存储中多个预设共用的对象），因此总是复制
+LINK_EXCLUDED_EXTENSIONS = (".ini", ".fx", ".fxh", ".txt", ".cfg")
+_FICLONE = 0x40049409 # Linux ioctl: 在支持的文件系统 (Btrfs/XFS) 上克隆文件
+
+
+def hash_file(path):
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _key(rel_path):
+    """用于比较的路径键（Windows 下不区分大小写）"""
+    return os.path.normcase(rel_path)
+
+
+def scan_entries(root, entries):
+    """
+    遍历 root 下 entries 列出的文件和文件夹。
+
+    返回 {相对路径: os.stat_result}，只包含文件。
+    """
+    found = {}
+    for entry in entries:
+        entry_path = os.path.join(root, entry)
+        if os.path.isfile(entry_path):
+            found[entry] = os.stat(entry_path)
+        elif os.path.isdir(entry_path):
+            for dir_path, _dir_names, file_names in os.walk(entry_path):
+                for file_name in file_names:
+                    full_path = os.path.join(dir_path, file_name)
+                    found[os.path.relpath(full_path, root)] = os.stat(full_path)
+    return found
+
+
+def build_manifest(root, entries, previous=None):
+    """
+    为 root 下的 ENB 文件生成清单 {相对路径: {size, mtime_ns, hash}}。
+
+    previous 中大小和修改时间都未变化的文件直接复用其哈希，不再读取内容。
+    """
+    previous = previous or {}
+    manifest = {}
+    for rel_path, st in scan_entries(root, entries).items():
+        old = previous.get(rel_path)
+        if old and old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns:
+            file_hash = old["hash"]
+        else:
+            file_hash = hash_file(os.path.join(root, rel_path))
+        manifest[rel_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": file_hash}
+    return manifest
+
+
+def load_json(path):
+    """读取 JSON 文件，不存在或损坏时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"读取 {path} 失败: {e}")
+        return None
+
+
+def save_json(path, data):
+    """通过临时文件原子地写入 JSON"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def load_preset_manifest(preset_path, entries):
+    """读取预设清单并增量刷新；有变化时写回预设目录"""
+    manifest_path = os.path.join(preset_path, MANIFEST_FILE_NAME)
+    previous = load_json(manifest_path) or {}
+    manifest = build_manifest(preset_path, entries, previous)
+    if manifest != previous:
+        try:
+            save_json(manifest_path, manifest)
+        except OSError as e:
+            # 预设目录只读时仍然可以部署，只是下次需要重新计算
+            print(f"保存 ENB 预设清单失败: {e}")
+    return manifest
+
+
+def _try_reflink(source, target):
+    """尝试写时复制克隆文件，不支持时返回 False"""
+    if fcntl is None:
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(target):
+            os.remove(target)
+        return False
+    shutil.copystat(source, target)
+    return True
+
+
+def place_file(source, target, mode=DEPLOY_MODE_COPY):
+    """
+    把预设文件放到游戏目录中，返回实际使用的方式。
+
+    硬链接/reflink 失败（例如跨磁盘）时逐文件回退为复制。
+    目标文件总是先删除再放置：如果目标是指向其他预设的硬链接，
+    直接覆盖写入会把内容写进那个预设的备份。
+    """
+    if os.path.lexists(target):
+        os.remove(target)
+    # 按目标文件名判断：去重存储中的对象文件以哈希命名，没有扩展名
+    if mode == DEPLOY_MODE_HARDLINK and not target.lower().endswith(LINK_EXCLUDED_EXTENSIONS):
+        try:
+            os.link(source, target)
+            return DEPLOY_MODE_HARDLINK
+        except OSError:
+            pass
+    elif mode == DEPLOY_MODE_REFLINK and _try_reflink(source, target):
+        return DEPLOY_MODE_REFLINK
+    copy_file(source, target)
+    return DEPLOY_MODE_COPY
+
+
+class OperationCancelled(Exception):
+    """用户取消了正在进行的文件操作"""
+
+
+class ProgressTracker:
+    """
+    汇总文件操作进度并转发给回调。
+
+    callback(files_done, files_total, bytes_done, bytes_total)；
+    cancelled() 返回 True 时，下一次 check 会抛出 OperationCancelled。
+    可以被复制线程池中的多个线程同时调用。
+    """
+
+    def __init__(self, files_total=0, bytes_total=0, callback=None, cancelled=None):
+        self.files_total = files_total
+        self.bytes_total = bytes_total
+        self.files_done = 0
+        self.bytes_done = 0
+        self.callback = callback
+        self.cancelled = cancelled
+        self._lock = threading.Lock()
+
+    def is_cancelled(self):
+        return self.cancelled is not None and self.cancelled()
+
+    def check(self):
+        if self.is_cancelled():
+            raise OperationCancelled()
+
+    def advance(self, size=0):
+        with self._lock:
+            self.files_done += 1
+            self.bytes_done += size
+            if self.callback is not None:
+                self.callback(self.files_done, self.files_total, self.bytes_done, self.bytes_total)
+
+
+class DeployStats:
+    """一次部署的统计信息"""
+
+    def __init__(self):
+        self.files_copied = 0
+        self.files_linked = 0 # 硬链接或 reflink，不产生数据写入
+        self.files_deleted = 0
+        self.files_unchanged = 0
+        self.bytes_written = 0
+
+    def summary(self):
+        text = f"复制 {self.files_copied} 个文件 ({self.bytes_written / 1024 / 1024:.1f} MB)，"
+        if self.files_linked:
+            text += f"链接 {self.files_linked} 个，"
+        return text + f"删除 {self.files_deleted} 个，未变化 {self.files_unchanged} 个"
+
+
+class DeployPlan:
+    """部署计划：需要删除、复制以及保持不变的相对路径"""
+
+    def __init__(self):
+        self.to_delete = [] # 游戏目录中多余的文件
+        self.to_copy = [] # 新增或内容变化的文件
+        self.unchanged = [] # 内容一致，无需处理
+
+
+def plan_deploy(manifest, game_path, entries, deployed_record=None):
+    """
+    比较预设清单与游戏目录中的现有文件，生成部署计划。
+
+    deployed_record 为上次部署时记录的清单；游戏文件的大小和修改时间与记录一致时
+    直接信任记录中的哈希，否则仅在大小相同的情况下重新计算哈希。
+    """
+    deployed_record = deployed_record or {}
+    recorded = {_key(rel): info for rel, info in deployed_record.items()}
+    wanted = {_key(rel): rel for rel in manifest}
+
+    plan = DeployPlan()
+    existing = scan_entries(game_path, entries)
+    existing_keys = set()
+    for rel_path, st in existing.items():
+        key = _key(rel_path)
+        existing_keys.add(key)
+        source_rel = wanted.get(key)
+        if source_rel is None:
+            plan.to_delete.append(rel_path)
+            continue
+        source_info = manifest[source_rel]
+        if st.st_size != source_info["size"]:
+            plan.to_copy.append(source_rel)
+            continue
+        record = recorded.get(key)
+        if record and record.get("size") == st.st_size and record.get("mtime_ns") == st.st_mtime_ns:
+            target_hash = record.get("hash")
+        else:
+            target_hash = hash_file(os.path.join(game_path, rel_path))
+        if target_hash == source_info["hash"]:
+            plan.unchanged.append(source_rel)
+        else:
+            plan.to_copy.append(source_rel)
+
+    for key, source_rel in wanted.items():
+        if key not in existing_keys:
+            plan.to_copy.append(source_rel)
+    return plan
+
+
+def _remove_path(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def _prune_empty_dirs(game_path, entries):
+    """删除 ENB 文件夹中因删除文件而留下的空目录"""
+    for entry in entries:
+        entry_path = os.path.join(game_path, entry)
+        if not os.path.isdir(entry_path):
+            continue
+        for dir_path, _dir_names, _file_names in os.walk(entry_path, topdown=False):
+            try:
+                if not os.listdir(dir_path):
+                    os.rmdir(dir_path)
+            except OSError:
+                pass
+
+
+def _move(source, target):
+    """重命名文件或目录；不在同一卷上时回退为移动"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.replace(source, target)
+    except OSError:
+        shutil.move(source, target)
+
+
+class _Transaction:
+    """一次 ENB 切换用到的日志、暂存区和回滚区路径（均位于 state_dir 中）"""
+
+    def __init__(self, game_path, state_dir):
+        self.game_path = game_path
+        self.journal_path = os.path.join(state_dir, JOURNAL_FILE_NAME)
+        self.record_path = os.path.join(state_dir, DEPLOYED_RECORD_FILE_NAME)
+        self.staging_path = os.path.join(state_dir, STAGING_DIR_NAME)
+        self.rollback_path = os.path.join(state_dir, ROLLBACK_DIR_NAME)
+
+    def write_journal(self, state, plan, record=None):
+        save_json(self.journal_path, {
+            "state": state,
+            "to_copy": plan["to_copy"],
+            "to_delete": plan["to_delete"],
+            "record": record,
+        })
+
+    def cleanup(self):
+        for path in (self.staging_path, self.rollback_path):
+            if os.path.exists(path):
+                shutil.rmtree(path, ignore_errors=True)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def commit(self, plan):
+        """先把旧文件移入回滚区，再把暂存的新文件重命名到位"""
+        for rel_path in plan["to_delete"]:
+            _move(os.path.join(self.game_path, rel_path), os.path.join(self.rollback_path, rel_path))
+        for rel_path in plan["to_copy"]:
+            target = os.path.join(self.game_path, rel_path)
+            if os.path.isdir(target) and not os.path.islink(target):
+                # 同名目录中的文件都在 to_delete 中，已经移走，只剩空目录
+                shutil.rmtree(target)
+            elif os.path.lexists(target):
+                _move(target, os.path.join(self.rollback_path, rel_path))
+        for rel_path in plan["to_copy"]:
+            _move(os.path.join(self.staging_path, rel_path), os.path.join(self.game_path, rel_path))
+
+    def rollback(self, plan):
+        """
+        撤销未完成的 commit。
+
+        暂存区中已不存在的文件说明新文件已经放到游戏目录，需要移除；
+        回滚区中存在的文件说明旧文件已经移走，需要移回。
+        """
+        for rel_path in plan["to_copy"]:
+            if not os.path.lexists(os.path.join(self.staging_path, rel_path)):
+                _remove_path(os.path.join(self.game_path, rel_path))
+        for rel_path in plan["to_delete"] + plan["to_copy"]:
+            saved = os.path.join(self.rollback_path, rel_path)
+            if os.path.lexists(saved):
+                _remove_path(os.path.join(self.game_path, rel_path))
+                _move(saved, os.path.join(self.game_path, rel_path))
+
+
+def _build_record(manifest, game_path):
+    """部署完成后游戏目录中 ENB 文件的记录（使用实际的大小和修改时间）"""
+    record = {}
+    for rel_path, info in manifest.items():
+        st = os.stat(os.path.join(game_path, rel_path))
+        record[rel_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": info["hash"]}
+    return record
+
+
+def apply_plan(plan, manifest, source_path_for, game_path, entries, state_dir, mode=DEPLOY_MODE_COPY, tracker=None,
+               workers=DEFAULT_WORKERS):
+    """
+    以事务方式执行部署计划，返回 (DeployStats, 部署记录)。
+
+    1. 把新增或变化的文件放入暂存区（可取消，游戏目录不变）；
+    2. 把旧文件移入回滚区，再把暂存文件重命名到游戏目录（只有重命名，很快）；
+    3. 写入部署记录后删除回滚区。
+    每个阶段开始前写入日志，中断后由 recover_interrupted 前滚或回滚。
+
+    source_path_for(rel_path) 返回预设中对应文件的实际路径，mode 见 place_file。
+    文件放置由 workers 个线程并发进行，失败的文件汇总为 CopyErrors 抛出。
+    """
+    tracker = tracker or ProgressTracker()
+    transaction = _Transaction(game_path, state_dir)
+    journal_plan = {"to_copy": plan.to_copy, "to_delete": plan.to_delete}
+    if os.path.exists(transaction.journal_path):
+        # 上次的切换还没有恢复，回滚区中可能是旧文件仅有的副本，不能清理
+        raise RuntimeError("上次 ENB 切换被中断且尚未恢复，请先恢复后再部署")
+    transaction.cleanup() # 清理上次遗留的暂存区
+    transaction.write_journal("staging", journal_plan)
+
+    try:
+        for rel_path in plan.to_copy:
+            os.makedirs(os.path.dirname(os.path.join(transaction.staging_path, rel_path)), exist_ok=True)
+        methods = run_parallel(
+            plan.to_copy,
+            lambda rel: place_file(source_path_for(rel), os.path.join(transaction.staging_path, rel), mode),
+            workers,
+            tracker,
+            lambda rel: manifest[rel]["size"]
+        )
+    except BaseException:
+        # 游戏目录尚未改动，丢弃暂存区即可
+        transaction.cleanup()
+        raise
+
+    transaction.write_journal("committing", journal_plan)
+    try:
+        transaction.commit(journal_plan)
+    except BaseException:
+        transaction.rollback(journal_plan)
+        transaction.cleanup()
+        raise
+    _prune_empty_dirs(game_path, entries)
+
+    stats = DeployStats()
+    stats.files_deleted = len(plan.to_delete)
+    stats.files_unchanged = len(plan.unchanged)
+    for rel_path, method in zip(plan.to_copy, methods):
+        if method == DEPLOY_MODE_COPY:
+            stats.files_copied += 1
+            stats.bytes_written += manifest[rel_path]["size"]
+        else:
+            stats.files_linked += 1
+
+    record = _build_record(manifest, game_path)
+    transaction.write_journal("committed", journal_plan, record)
+    save_json(transaction.record_path, record)
+    transaction.cleanup()
+    return stats, record
+
+
+def recover_interrupted(game_path, state_dir, entries):
+    """
+    检查上次 ENB 切换是否被中断（崩溃、断电、强制结束 MO2）并自动恢复。
+
+    返回 "rolled_back"、"rolled_forward"，没有未完成的切换时返回 None。
+    """
+    transaction = _Transaction(game_path, state_dir)
+    journal = load_json(transaction.journal_path)
+    if not journal and os.path.exists(transaction.journal_path):
+        # 无法判断回滚区中的文件该放回哪里，保留它们，由用户手动处理
+        raise RuntimeError(f"ENB 切换日志已损坏: {transaction.journal_path}\n被替换的旧文件保存在 {transaction.rollback_path}")
+    if not journal:
+        # 日志缺失时暂存区/回滚区中的内容都不再需要
+        if os.path.exists(transaction.staging_path) or os.path.exists(transaction.rollback_path):
+            transaction.cleanup()
+        return None
+
+    state = journal.get("state")
+    if state == "committed" and journal.get("record") is not None:
+        # 所有文件已经到位，只差写入记录和清理
+        save_json(transaction.record_path, journal["record"])
+        transaction.cleanup()
+        return "rolled_forward"
+    if state == "committing":
+        transaction.rollback(journal)
+        _prune_empty_dirs(game_path, entries)
+    # "staging" 阶段游戏目录没有被修改，丢弃暂存区即可
+    transaction.cleanup()
+    return "rolled_back"
+
+
+def deploy_manifest(manifest, source_path_for, game_path, entries, state_dir, mode=DEPLOY_MODE_COPY,
+                    progress=None, cancelled=None, workers=DEFAULT_WORKERS):
+    """
+    按清单增量部署到游戏目录：只替换多余或变化的文件，相同文件保持不动。
+
+    state_dir 保存部署记录、日志、暂存区和回滚区，应与游戏目录位于同一磁盘，
+    这样切换时只需要重命名。取消或失败时游戏目录保持原样，并抛出相应异常。
+    上次中断的切换先恢复，恢复失败时抛出异常，不开始新的切换。
+    """
+    recovered = recover_interrupted(game_path, state_dir, entries)
+    if recovered:
+        print(f"部署前恢复了上次中断的 ENB 切换: {recovered}")
+    record_path = os.path.join(state_dir, DEPLOYED_RECORD_FILE_NAME)
+    deployed_record = load_json(record_path)
+    plan = plan_deploy(manifest, game_path, entries, deployed_record)
+    if not plan.to_copy and not plan.to_delete:
+        # 游戏目录已与预设逐字节一致，不写日志也不做任何文件操作
+        if deployed_record is None:
+            save_json(record_path, _build_record(manifest, game_path))
+        stats = DeployStats()
+        stats.files_unchanged = len(plan.unchanged)
+        return stats
+    tracker = ProgressTracker(
+        len(plan.to_copy),
+        sum(manifest[rel]["size"] for rel in plan.to_copy),
+        progress,
+        cancelled
+    )
+    tracker.check()
+    stats, _record = apply_plan(plan, manifest, source_path_for, game_path, entries, state_dir, mode, tracker, workers)
+    return stats
+
+
+def deploy_preset(preset_path, game_path, entries, state_dir, mode=DEPLOY_MODE_COPY,
+                  progress=None, cancelled=None, workers=DEFAULT_WORKERS):
+    """将预设目录增量部署到游戏目录"""
+    manifest = load_preset_manifest(preset_path, entries)
+    return deploy_manifest(manifest, lambda rel: os.path.join(preset_path, rel), game_path, entries, state_dir, mode,
+                           progress, cancelled, workers)
+
+
+def remove_entries(game_path, entries, state_dir=None, progress=None):
+    """
+    从游戏目录中移除所有 ENB 文件和文件夹，并删除部署记录。
+
+    删除操作不可取消：中途停止会留下不完整的 ENB。
+    """
+    record_path = os.path.join(state_dir, DEPLOYED_RECORD_FILE_NAME) if state_dir else None
+    if record_path and os.path.exists(record_path):
+        os.remove(record_path)
+    tracker = ProgressTracker(len(entries), 0, progress)
+    for entry in entries:
+        _remove_path(os.path.join(game_path, entry))
+        tracker.advance()
+
+
+def copy_tree(source_dir, target_dir, progress=None, cancelled=None, workers=DEFAULT_WORKERS):
+    """
+    只遍历一次源目录，用线程池并发复制所有文件（保留元数据），报告进度并支持取消。
+
+    取消或失败时删除已部分创建的目标目录。
+    """
+    dirs = []
+    files = []
+    for dir_path, _dir_names, file_names in os.walk(source_dir):
+        dirs.append(os.path.relpath(dir_path, source_dir))
+        for file_name in file_names:
+            full_path = os.path.join(dir_path, file_name)
+            files.append((os.path.relpath(full_path, source_dir), os.path.getsize(full_path)))
+
+    tracker = ProgressTracker(len(files), sum(size for _rel, size in files), progress, cancelled)
+    try:
+        for rel_dir in dirs:
+            os.makedirs(os.path.normpath(os.path.join(target_dir, rel_dir)), exist_ok=True)
+        run_parallel(
+            files,
+            lambda item: copy_file(os.path.join(source_dir, item[0]), os.path.join(target_dir, item[0])),
+            workers,
+            tracker,
+            lambda item: item[1]
+        )
+    except BaseException:
+        shutil.rmtree(target_dir, ignore_errors=True)
+        raise
+
+
+def replace_tree(source_dir, target_dir, progress=None, cancelled=None, workers=DEFAULT_WORKERS):
+    """
+    把 source_dir 复制为 target_dir；已存在的 target_dir 只在复制全部完成后才被替换。
+
+    先复制到同级以 "." 开头的临时目录（不会被当作预设列出），成功后再换入；
+    取消或失败时原有目录保持不变。上次在换入过程中中断时，先恢复被换出的旧目录。
+    """
+    parent, name = os.path.split(os.path.normpath(target_dir))
+    staging_dir = os.path.join(parent, f".{name}.installing")
+    replaced_dir = os.path.join(parent, f".{name}.replaced")
+    if os.path.isdir(replaced_dir):
+        if os.path.exists(target_dir):
+            shutil.rmtree(replaced_dir, ignore_errors=True)
+        else:
+            os.replace(replaced_dir, target_dir)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    copy_tree(source_dir, staging_dir, progress, cancelled, workers)
+    had_target = os.path.exists(target_dir)
+    if had_target:
+        os.replace(target_dir, replaced_dir)
+    try:
+        os.replace(staging_dir, target_dir)
+    except BaseException:
+        if had_target:
+            os.replace(replaced_dir, target_dir)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    if had_target:
+        shutil.rmtree(replaced_dir, ignore_errors=True)
@@ -0,0 +1,253 @@
+# coding=utf-8
+
+import os
+import hashlib
+
+from .enb_deploy import load_json, save_json, scan_entries
+
+
+INDEX_FILE_NAME = ".enb_index.json" # 位于 ENB备份 中
+SAMPLE_SIZE = 4096 # 指纹对每个文件只读取开头、中间、结尾各 4 KB
+
+
+def _norm_rel(rel_path):
+    """统一大小写和分隔符，使 Windows 与存储中的相对路径可以比较"""
+    return os.path.normcase(rel_path).replace("\\", "/")
+
+
+def _sample_digest(path, size):
+    """读取文件的开头、中间和结尾，计算抽样摘要"""
+    with open(path, 'rb') as f:
+        sample = f.read(SAMPLE_SIZE)
+        if size > SAMPLE_SIZE * 3:
+            f.seek(size // 2)
+            sample += f.read(SAMPLE_SIZE)
+            f.seek(-SAMPLE_SIZE, os.SEEK_END)
+            sample += f.read(SAMPLE_SIZE)
+    return hashlib.sha1(sample).hexdigest()
+
+
+def fingerprint(files, sample_cache=None):
+    """
+    计算一组 ENB 文件的快速指纹：相对路径 + 大小 + 抽样内容。
+
+    files 为 [(相对路径, 实际路径, 大小, 修改时间)]；sample_cache 为
+    {相对路径: [大小, 修改时间, 摘要]}，大小和修改时间未变的文件不会重新读取。
+    没有任何文件时返回 None。
+    """
+    if not files:
+        return None
+    digest = hashlib.sha256()
+    for rel_path, path, size, mtime_ns in sorted(files, key=lambda f: _norm_rel(f[0])):
+        cached = sample_cache.get(rel_path) if sample_cache is not None else None
+        if cached and mtime_ns is not None and cached[0] == size and cached[1] == mtime_ns:
+            sample = cached[2]
+        else:
+            sample = _sample_digest(path, size)
+            if sample_cache is not None:
+                sample_cache[rel_path] = [size, mtime_ns, sample]
+        digest.update(f"{_norm_rel(rel_path)}\0{size}\0{sample}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def fingerprint_dir(root, entries, sample_cache=None):
+    """计算 root 下 ENB 文件的指纹"""
+    files = [
+        (rel_path, os.path.join(root, rel_path), st.st_size, st.st_mtime_ns)
+        for rel_path, st in scan_entries(root, entries).items()
+    ]
+    if sample_cache is not None:
+        # 丢弃已不存在文件的缓存
+        present = {rel_path for rel_path, *_rest in files}
+        for rel_path in list(sample_cache):
+            if rel_path not in present:
+                del sample_cache[rel_path]
+    return fingerprint(files, sample_cache)
+
+
+def _scan_preset_dir(preset_path, entries):
+    """
+    用 os.scandir 递归统计预设目录，返回索引条目。
+
+    dir_mtimes 记录每个子目录的修改时间，用于下次判断是否需要重新扫描。
+    """
+    size = 0
+    file_count = 0
+    dir_mtimes = {}
+    stack = [preset_path]
+    while stack:
+        current = stack.pop()
+        dir_mtimes[os.path.relpath(current, preset_path)] = os.stat(current).st_mtime_ns
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    size += entry.stat(follow_symlinks=False).st_size
+                    file_count += 1
+    top_level = {os.path.normcase(name) for name in os.listdir(preset_path)}
+    contains = [entry for entry in entries if os.path.normcase(entry) in top_level]
+    # 直接编辑 enbseries.ini 等顶层文件不会改变目录修改时间，单独记录
+    file_mtimes = {
+        entry: os.stat(os.path.join(preset_path, entry)).st_mtime_ns
+        for entry in contains
+        if os.path.isfile(os.path.join(preset_path, entry))
+    }
+    return {
+        "kind": "dir",
+        "dir_mtimes": dir_mtimes,
+        "file_mtimes": file_mtimes,
+        "size": size,
+        "file_count": file_count,
+        "contains": contains,
+        "fingerprint": fingerprint_dir(preset_path, entries),
+    }
+
+
+def _tree_entry(store, name, entries):
+    """去重存储中预设的索引条目"""
+    tree = store.load_tree(name)
+    wanted = {os.path.normcase(entry): entry for entry in entries}
+    present = {os.path.normcase(rel.replace("\\", "/").split("/", 1)[0]) for rel in tree}
+    manifest = store.preset_manifest(name, entries)
+    return {
+        "kind": "store",
+        "tree_mtime": os.stat(store.tree_path(name)).st_mtime_ns,
+        "size": sum(info["size"] for info in tree.values()),
+        "file_count": len(tree),
+        "contains": [wanted[key] for key in wanted if key in present],
+        "fingerprint": fingerprint([
+            (rel_path, store.object_path(info["hash"]), info["size"], None)
+            for rel_path, info in manifest.items()
+        ]),
+    }
+
+
+def _dir_unchanged(preset_path, cached):
+    """记录的所有目录（以及顶层 ENB 文件）修改时间都未变化，说明预设内容没有变化"""
+    if not cached.get("dir_mtimes") or "fingerprint" not in cached:
+        return False
+    recorded = list(cached["dir_mtimes"].items()) + list(cached.get("file_mtimes", {}).items())
+    for rel_path, mtime_ns in recorded:
+        try:
+            if os.stat(os.path.join(preset_path, rel_path)).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def is_complete(info):
+    """预设至少需要 ENB 配置和一个注入 DLL 才能正常工作"""
+    contains = {os.path.normcase(entry) for entry in info.get("contains", [])}
+    has_dll = "d3d11.dll" in contains or "dxgi.dll" in contains
+    return has_dll and "enbseries.ini" in contains
+
+
+class PresetIndex:
+    """
+    持久化的 ENB 预设索引：大小、文件数、包含哪些 ENB 文件，以及当前启用的预设。
+
+    按目录修改时间增量刷新，未变化的预设不会重新扫描。
+    """
+
+    def __init__(self, backup_path, entries):
+        self.backup_path = backup_path
+        self.entries = entries
+        self.index_path = os.path.join(backup_path, INDEX_FILE_NAME)
+        data = load_json(self.index_path) or {}
+        self.presets = data.get("presets", {})
+        self.active = data.get("active")
+        self.game_samples = data.get("game_samples", {}) # 游戏目录中 ENB 文件的抽样缓存
+
+    def save(self):
+        try:
+            save_json(self.index_path, {
+                "presets": self.presets,
+                "active": self.active,
+                "game_samples": self.game_samples,
+            })
+        except OSError as e:
+            print(f"保存 ENB 预设索引失败: {e}")
+
+    def refresh(self, store=None):
+        """增量刷新索引，返回按名称排序的预设列表"""
+        presets = {}
+        rescanned = 0
+        with os.scandir(self.backup_path) as it:
+            for entry in it:
+                # 以 "." 开头的是插件内部目录（如去重存储），不是预设
+                if entry.name.startswith(".") or not entry.is_dir():
+                    continue
+                cached = self.presets.get(entry.name)
+                if cached and cached.get("kind") == "dir" and _dir_unchanged(entry.path, cached):
+                    presets[entry.name] = cached
+                else:
+                    presets[entry.name] = _scan_preset_dir(entry.path, self.entries)
+                    rescanned += 1
+
+        if store is not None:
+            for name in store.preset_names():
+                if name in presets:
+                    continue
+                cached = self.presets.get(name)
+                try:
+                    tree_mtime = os.stat(store.tree_path(name)).st_mtime_ns
+                except OSError:
+                    continue
+                if cached and cached.get("kind") == "store" and cached.get("tree_mtime") == tree_mtime and "fingerprint" in cached:
+                    presets[name] = cached
+                else:
+                    presets[name] = _tree_entry(store, name, self.entries)
+                    rescanned += 1
+
+        changed = rescanned or set(presets) != set(self.presets)
+        self.presets = presets
+        if self.active not in presets:
+            self.active = None
+        if changed:
+            self.save()
+        return sorted(presets)
+
+    def set_active(self, name):
+        if self.active != name:
+            self.active = name
+            self.save()
+
+    def game_fingerprint(self, game_path):
+        """当前部署在游戏目录中的 ENB 文件指纹，没有 ENB 文件时返回 None"""
+        return fingerprint_dir(game_path, self.entries, self.game_samples)
+
+    def detect_active(self, game_path):
+        """
+        通过指纹匹配找出游戏目录中当前部署的预设（需先调用 refresh）。
+
+        同时存在多个内容相同的预设时优先保留已记录的那个。
+        """
+        game_fp = self.game_fingerprint(game_path)
+        matches = [
+            name for name, info in self.presets.items()
+            if game_fp is not None and info.get("fingerprint") == game_fp
+        ]
+        self.active = self.active if self.active in matches else (sorted(matches)[0] if matches else None)
+        self.save() # 同时持久化抽样缓存
+        return self.active
+
+    def describe(self, name):
+        """用于列表显示的预设说明"""
+        info = self.presets.get(name, {})
+        text = f"{name}  ({info.get('size', 0) / 1024 / 1024:.1f} MB, {info.get('file_count', 0)} 个文件)"
+        if not is_complete(info):
+            text += "  [不完整]"
+        if name == self.active:
+            text = "★ " + text + "  [当前启用]"
+        return text
+
+    def tooltip(self, name):
+        info = self.presets.get(name, {})
+        contains = info.get("contains", [])
+        missing = [entry for entry in self.entries if entry not in contains]
+        text = "包含: " + (", ".join(contains) if contains else "无")
+        if missing:
+            text += "\n缺少: " + ", ".join(missing)
+        return text
@@ -0,0 +1,161 @@
+# coding=utf-8
+
+import os
+import hashlib
+import threading
+
+from .copy_engine import DEFAULT_WORKERS, run_parallel
+from .enb_deploy import HASH_CHUNK_SIZE, ProgressTracker, load_json, save_json
+
+
+STORE_DIR_NAME = ".store" # 位于 ENB备份 中，列表刷新时会被忽略
+OBJECTS_DIR_NAME = "objects"
+TREES_DIR_NAME = "presets"
+
+
+class EnbStore:
+    """
+    按内容寻址、去重的 ENB 预设存储。
+
+    每个文件按 SHA-256 保存一次 (objects/ab/abcdef...)，
+    每个预设是一棵引用树 (presets/<名称>.json: {相对路径: {size, mtime_ns, hash}})。
+    多个预设共享的 d3d11.dll、着色器等只占用一份磁盘空间。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_path = os.path.join(root, OBJECTS_DIR_NAME)
+        self.trees_path = os.path.join(root, TREES_DIR_NAME)
+
+    def object_path(self, file_hash):
+        return os.path.join(self.objects_path, file_hash[:2], file_hash)
+
+    def tree_path(self, name):
+        return os.path.join(self.trees_path, name + ".json")
+
+    def preset_names(self):
+        """存储中的所有预设名称"""
+        if not os.path.isdir(self.trees_path):
+            return []
+        return sorted(
+            entry.name[:-len(".json")]
+            for entry in os.scandir(self.trees_path)
+            if entry.is_file() and entry.name.endswith(".json")
+        )
+
+    def has_preset(self, name):
+        return os.path.isfile(self.tree_path(name))
+
+    def load_tree(self, name):
+        return load_json(self.tree_path(name)) or {}
+
+    def preset_manifest(self, name, entries):
+        """返回预设中属于 ENB 文件列表的部分，格式与 enb_deploy 的清单相同"""
+        wanted = {os.path.normcase(entry) for entry in entries}
+        return {
+            rel_path: info
+            for rel_path, info in self.load_tree(name).items()
+            if os.path.normcase(rel_path.replace("\\", "/").split("/", 1)[0]) in wanted
+        }
+
+    def _store_file(self, source):
+        """边复制边计算哈希，把文件放入对象库；已存在的对象直接复用。返回 (哈希, 新写入字节数)"""
+        os.makedirs(self.objects_path, exist_ok=True)
+        digest = hashlib.sha256()
+        temp_path = os.path.join(self.objects_path, f"incoming-{os.getpid()}-{threading.get_ident()}.tmp")
+        size = 0
+        with open(source, 'rb') as src, open(temp_path, 'wb') as dst:
+            while True:
+                chunk = src.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+        file_hash = digest.hexdigest()
+        target = self.object_path(file_hash)
+        if os.path.exists(target):
+            os.remove(temp_path)
+            return file_hash, 0
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(temp_path, target)
+        return file_hash, size
+
+    def import_preset(self, source_dir, name, progress=None, cancelled=None, workers=DEFAULT_WORKERS):
+        """
+        把 source_dir 整个目录导入为名为 name 的预设（已存在则替换）。
+
+        返回新写入对象库的字节数；被替换的旧预设不再引用的对象、
+        以及取消导入时已写入的对象由 gc 回收。
+        """
+        files = []
+        for dir_path, _dir_names, file_names in os.walk(source_dir):
+            for file_name in file_names:
+                full_path = os.path.join(dir_path, file_name)
+                files.append((full_path, os.stat(full_path)))
+
+        tracker = ProgressTracker(len(files), sum(st.st_size for _path, st in files), progress, cancelled)
+        stored = run_parallel(files, lambda item: self._store_file(item[0]), workers, tracker, lambda item: item[1].st_size)
+        tree = {}
+        for (full_path, st), (file_hash, _written) in zip(files, stored):
+            tree[os.path.relpath(full_path, source_dir)] = {
+                "size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": file_hash
+            }
+        os.makedirs(self.trees_path, exist_ok=True)
+        save_json(self.tree_path(name), tree)
+        return sum(written for _hash, written in stored)
+
+    def delete_preset(self, name):
+        """删除预设的引用树并回收不再被引用的对象"""
+        tree_path = self.tree_path(name)
+        if os.path.exists(tree_path):
+            os.remove(tree_path)
+        return self.gc()
+
+    def _referenced_hashes(self):
+        referenced = set()
+        for name in self.preset_names():
+            referenced.update(info["hash"] for info in self.load_tree(name).values())
+        return referenced
+
+    def gc(self):
+        """标记-清除：删除没有任何预设引用的对象，返回 (删除个数, 释放字节数)"""
+        if not os.path.isdir(self.objects_path):
+            return 0, 0
+        referenced = self._referenced_hashes()
+        removed = 0
+        freed = 0
+        for bucket in os.scandir(self.objects_path):
+            if not bucket.is_dir():
+                # 中断导入遗留的临时文件
+                if bucket.name.endswith(".tmp"):
+                    os.remove(bucket.path)
+                continue
+            for obj in os.scandir(bucket.path):
+                if obj.name not in referenced:
+                    freed += obj.stat().st_size
+                    os.remove(obj.path)
+                    removed += 1
+            if not os.listdir(bucket.path):
+                os.rmdir(bucket.path)
+        return removed, freed
+
+    def stats(self):
+        """返回 (逻辑大小, 实际占用大小)：逻辑大小为所有预设文件大小之和"""
+        logical = 0
+        unique = {}
+        for name in self.preset_names():
+            for info in self.load_tree(name).values():
+                logical += info["size"]
+                unique[info["hash"]] = info["size"]
+        return logical, sum(unique.values())
+
+    def dedup_summary(self):
+        """用于状态栏显示的去重信息，存储为空时返回空字符串"""
+        logical, physical = self.stats()
+        if not logical:
+            return ""
+        ratio = logical / physical if physical else 1.0
+        saved = (logical - physical) / 1024 / 1024
+        return f"去重比 {ratio:.2f}x，节省 {saved:.1f} MB"
+
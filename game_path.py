@@ -0,0 +1,120 @@
+# coding=utf-8
+
+import os
+import json
+
+from .ini_editor import IniDocument
+
+
+GAME_EXECUTABLES = ("SkyrimSE.exe", "skse64_loader.exe")
+
+
+def is_game_dir(path):
+    """目录中存在 SkyrimSE.exe 或 skse64_loader.exe 时视为有效的游戏根目录"""
+    return bool(path) and any(os.path.isfile(os.path.join(path, name)) for name in GAME_EXECUTABLES)
+
+
+def read_mo_game_path(mo_ini_path):
+    """从 ModOrganizer.ini 的 [General] gamePath 读取游戏路径，去掉 @ByteArray(...) 包装"""
+    value = IniDocument.load(mo_ini_path).get("General", "gamePath")
+    if not value:
+        return None
+    if value.startswith("@ByteArray(") and value.endswith(")"):
+        value = value[len("@ByteArray("):-1]
+    return os.path.normpath(value.replace("\\\\", "\\"))
+
+
+class GamePathResolver:
+    """
+    确定游戏根目录，按以下顺序尝试：
+    MO2 当前管理的游戏 -> ModOrganizer.ini 的 gamePath -> 注册表 -> 上次会话确认过的路径。
+
+    确认有效的路径在本次会话内直接复用（只检查一次可执行文件是否仍在），并写入缓存文件供下次启动使用；
+    ModOrganizer.ini 的解析结果按文件修改时间缓存，文件未变化时不再解析。
+    """
+
+    def __init__(self, cache_path, managed_game=None, mo_ini_path=None, registry=None):
+        self.cache_path = cache_path
+        self.managed_game = managed_game # 返回游戏目录的函数
+        self.mo_ini_path = mo_ini_path
+        self.registry = registry # 返回注册表中安装路径的函数
+        self.source = None # 当前路径的来源，用于日志
+        self._path = None
+        self._state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"读取游戏路径缓存失败，将重新确定: {e}")
+        return {}
+
+    def _save(self):
+        temp_path = self.cache_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            print(f"写入游戏路径缓存失败: {e}")
+
+    def _from_managed_game(self):
+        return self.managed_game() if self.managed_game else None
+
+    def _from_mo_ini(self):
+        """按修改时间缓存 ModOrganizer.ini 中的 gamePath"""
+        if not self.mo_ini_path:
+            return None
+        try:
+            mtime = os.stat(self.mo_ini_path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._state.get("mo_ini") or {}
+        if cached.get("path") == self.mo_ini_path and cached.get("mtime_ns") == mtime:
+            return cached.get("game_path")
+        game_path = read_mo_game_path(self.mo_ini_path)
+        self._state["mo_ini"] = {"path": self.mo_ini_path, "mtime_ns": mtime, "game_path": game_path}
+        self._save()
+        return game_path
+
+    def _from_registry(self):
+        return self.registry() if self.registry else None
+
+    def _from_last_session(self):
+        return self._state.get("game_path")
+
+    def resolve(self):
+        """返回有效的游戏根目录，全部来源都无效时返回 None"""
+        if self._path is not None and is_game_dir(self._path):
+            return self._path
+        self._path = None
+        sources = (
+            ("managed_game", self._from_managed_game),
+            ("mo_ini", self._from_mo_ini),
+            ("registry", self._from_registry),
+            ("last_session", self._from_last_session),
+        )
+        for source, lookup in sources:
+            try:
+                path = lookup()
+            except Exception as e:
+                print(f"从 {source} 获取游戏路径失败: {e}")
+                continue
+            if path and is_game_dir(path):
+                self.remember(os.path.normpath(path), source)
+                return self._path
+        return None
+
+    def remember(self, path, source="manual"):
+        """记录确认有效的游戏路径（包括用户手动选择的路径）"""
+        self._path = path
+        self.source = source
+        if self._state.get("game_path") != path:
+            self._state["game_path"] = path
+            self._save()
+        print(f"游戏路径: {path} (来源: {source})")
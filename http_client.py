@@ -0,0 +1,304 @@
+# coding=utf-8
+
+import time
+import random
+import socket
+import threading
+import http.client
+import urllib.error
+import urllib.parse
+import urllib.request
+
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.121 Safari/537.36"
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 0.5 # 秒，第 n 次重试前等待 BACKOFF_BASE * 2^n 秒上下浮动
+BACKOFF_MAX = 8
+MAX_IDLE_PER_HOST = 4
+MAX_REDIRECTS = 5
+BREAKER_THRESHOLD = 5 # 连续多少个请求失败（每个请求在重试用尽后计一次）后熔断
+BREAKER_COOLDOWN = 30 # 熔断后多少秒内不再访问该主机
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class CircuitOpenError(urllib.error.URLError):
+    """主机连续失败次数过多，熔断期间直接拒绝请求"""
+
+
+class _CircuitBreaker:
+    """单个主机的熔断器：连续失败达到阈值后打开，冷却结束后放行一次试探请求"""
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < BREAKER_COOLDOWN or self.probing:
+            return False
+        self.probing = True # 半开状态，只放行一个请求
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.failures >= BREAKER_THRESHOLD:
+            self.opened_at = time.monotonic()
+
+    def end_probe(self):
+        """试探请求因与主机无关的原因结束（取消、程序错误），不计成功或失败，下一个请求重新试探"""
+        self.probing = False
+
+
+class PooledResponse:
+    """
+    包装 http.client.HTTPResponse；正文读完后连接放回连接池供下次复用。
+
+    与 urlopen 的返回值一样提供 status、headers、read() 并可用于 with 语句。
+    """
+
+    def __init__(self, client, key, conn, response, url):
+        self._client = client
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.headers = response.headers
+
+    def read(self, amt=None):
+        data = self._response.read(amt)
+        if self._response.isclosed():
+            self._release()
+        return data
+
+    def _release(self):
+        if self._conn is None:
+            return
+        if self._response.isclosed() and not self._response.will_close:
+            self._client._put_idle(self._key, self._conn)
+        else:
+            self._conn.close()
+        self._conn = None
+
+    def close(self):
+        if self._conn is not None and not self._response.isclosed():
+            # 正文未读完，连接无法复用
+            self._response.close()
+            self._conn.close()
+            self._conn = None
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HttpClient:
+    """
+    插件共享的 HTTP 客户端。
+
+    按主机保持 keep-alive 连接池，避免每次请求重新进行 TCP/TLS 握手；
+    连接错误和 5xx/429 响应按带抖动的指数退避重试；
+    同一主机连续失败时熔断一段时间，不再反复请求。
+    错误以 urllib.error.HTTPError / URLError 抛出，调用方可以沿用 urlopen 的异常处理。
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, user_agent=DEFAULT_USER_AGENT):
+        self.timeout = timeout
+        self.retries = retries
+        self.user_agent = user_agent
+        self._lock = threading.Lock()
+        self._idle = {} # (scheme, host, port) -> [连接]
+        self._breakers = {} # host -> _CircuitBreaker
+        self._active = set() # 正在等待响应的连接，shutdown 时中断
+        self._closed = threading.Event()
+        self.connections_opened = 0
+        self.requests_sent = 0
+        self.tracer = None # tracing.Tracer，设置时把请求耗时计入当前 span
+
+    def _key(self, parsed):
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        return parsed.scheme, parsed.hostname, port
+
+    def _new_connection(self, key, timeout):
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        proxy = urllib.request.getproxies().get(scheme)
+        if proxy and not urllib.request.proxy_bypass(host):
+            proxy_url = urllib.parse.urlparse(proxy if "://" in proxy else "http://" + proxy)
+            conn = connection_class(proxy_url.hostname, proxy_url.port or 80, timeout=timeout)
+            conn.set_tunnel(host, port)
+        else:
+            conn = connection_class(host, port, timeout=timeout)
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    def _get_idle(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            return idle.pop() if idle else None
+
+    def _put_idle(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE_PER_HOST:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _breaker(self, host):
+        with self._lock:
+            return self._breakers.setdefault(host, _CircuitBreaker())
+
+    def _request(self, conn, method, target, headers):
+        with self._lock:
+            self._active.add(conn)
+        try:
+            conn.request(method, target, headers=headers)
+            return conn.getresponse()
+        finally:
+            with self._lock:
+                self._active.discard(conn)
+
+    def _send(self, key, method, target, headers, timeout):
+        """发送一次请求；复用的空闲连接已被服务器关闭时换新连接重发，不计为失败"""
+        conn = self._get_idle(key)
+        if conn is not None:
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                return conn, self._request(conn, method, target, headers)
+            except (http.client.RemoteDisconnected, ConnectionError, http.client.BadStatusLine):
+                conn.close()
+        conn = self._new_connection(key, timeout)
+        try:
+            return conn, self._request(conn, method, target, headers)
+        except BaseException:
+            conn.close()
+            raise
+
+    def open(self, url, headers=None, timeout=None, method="GET", retries=None):
+        """
+        发送请求并返回 PooledResponse（正文尚未读取）。
+
+        3xx 重定向自动跟随；304 和 4xx/5xx 抛出 HTTPError，连接失败抛出 URLError。
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        request_headers = {"User-Agent": self.user_agent, "Accept-Encoding": "identity"}
+        request_headers.update(headers or {})
+
+        for _redirect in range(MAX_REDIRECTS + 1):
+            parsed = urllib.parse.urlparse(url)
+            key = self._key(parsed)
+            target = parsed.path or "/"
+            if parsed.query:
+                target += "?" + parsed.query
+            breaker = self._breaker(parsed.hostname)
+
+            attempt = 0
+            while True:
+                if self._closed.is_set():
+                    raise urllib.error.URLError("HTTP 客户端已关闭")
+                with self._lock:
+                    allowed = breaker.allow()
+                    probing = breaker.probing # 本次是半开状态下的试探请求，失败时不再重试
+                if not allowed:
+                    raise CircuitOpenError(f"{parsed.hostname} 连续请求失败，暂停访问 {BREAKER_COOLDOWN} 秒")
+                try:
+                    with self._lock:
+                        self.requests_sent += 1
+                    sent = time.perf_counter()
+                    conn, response = self._send(key, method, target, request_headers, timeout)
+                    if self.tracer is not None:
+                        span = self.tracer.current()
+                        span.add("requests")
+                        span.add("net_ms", round((time.perf_counter() - sent) * 1000, 2))
+                except (OSError, http.client.HTTPException) as e:
+                    if attempt >= retries or probing:
+                        # 每个请求只在重试用尽后计一次失败
+                        with self._lock:
+                            breaker.record_failure()
+                        raise urllib.error.URLError(e)
+                except BaseException:
+                    if probing:
+                        with self._lock:
+                            breaker.end_probe()
+                    raise
+                else:
+                    if response.status not in RETRY_STATUSES:
+                        with self._lock:
+                            breaker.record_success()
+                        break
+                    if attempt >= retries or probing:
+                        with self._lock:
+                            breaker.record_failure()
+                        break
+                    response.read()
+                    if response.will_close:
+                        conn.close()
+                    else:
+                        self._put_idle(key, conn)
+                attempt += 1
+                delay = min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX)
+                if self._closed.wait(random.uniform(delay / 2, delay)):
+                    raise urllib.error.URLError("HTTP 客户端已关闭")
+
+            pooled = PooledResponse(self, key, conn, response, url)
+            if response.status in REDIRECT_STATUSES and response.headers.get("Location"):
+                pooled.read()
+                pooled.close()
+                url = urllib.parse.urljoin(url, response.headers["Location"])
+                if response.status == 303:
+                    method = "GET"
+                continue
+            if response.status >= 300:
+                pooled.read()
+                pooled.close()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None) from None
+            return pooled
+        raise urllib.error.URLError(f"重定向次数过多: {url}")
+
+    def get_bytes(self, url, headers=None, timeout=None):
+        with self.open(url, headers=headers, timeout=timeout) as response:
+            return response.read()
+
+    def get_text(self, url, headers=None, timeout=None):
+        return self.get_bytes(url, headers=headers, timeout=timeout).decode('utf-8')
+
+    def shutdown(self):
+        """
+        停止所有请求（MO2 退出时调用）：正在等待响应的连接被中断，
+        之后的请求和重试等待立即以 URLError 结束。
+        """
+        self._closed.set()
+        with self._lock:
+            active = list(self._active)
+        for conn in active:
+            if conn.sock is not None:
+                try:
+                    conn.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self.close()
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
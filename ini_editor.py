@@ -0,0 +1,122 @@
+# coding=utf-8
+
+import os
+import re
+
+
+_SECTION_RE = re.compile(r"^\s*\[([^\]]*)\]")
+_KEY_RE = re.compile(r"^(\s*)([^=;#\[\s][^=]*?)(\s*=\s*)(.*?)(\s*)$")
+_BOOLEAN_STATES = {"1": True, "yes": True, "true": True, "on": True,
+                   "0": False, "no": False, "false": False, "off": False}
+
+
+class IniDocument:
+    """
+    保留原始行的 INI 编辑器。
+
+    文件只解析一次，注释、空行、键的顺序、BOM 和换行符都原样保留；
+    set 只替换对应行的值，值未变化时不算修改，save 只在有修改时原子地写回。
+    节名和键名不区分大小写。
+    """
+
+    def __init__(self, path, lines=None, bom=False, newline="\r\n", trailing_newline=True):
+        self.path = path
+        self.lines = lines or []
+        self.bom = bom
+        self.newline = newline
+        self.trailing_newline = trailing_newline
+        self.dirty_keys = set()
+        self._index = {} # (节, 键) -> 行号
+        self._sections = {} # 节 -> 该节最后一行的行号
+        self._reindex()
+
+    @classmethod
+    def load(cls, path):
+        """读取 INI 文件；文件不存在时返回空文档，保存时创建"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return cls(path)
+        bom = data.startswith(b"\xef\xbb\xbf")
+        text = data.decode('utf-8-sig', errors='surrogateescape')
+        newline = "\r\n" if "\r\n" in text or "\n" not in text else "\n"
+        return cls(path, text.splitlines(), bom, newline, text.endswith(("\n", "\r")) or not text)
+
+    def _reindex(self):
+        self._index.clear()
+        self._sections.clear()
+        section = ""
+        for number, line in enumerate(self.lines):
+            match = _SECTION_RE.match(line)
+            if match:
+                section = match.group(1).strip().lower()
+                self._sections[section] = number
+                continue
+            self._sections[section] = number
+            key_match = _KEY_RE.match(line)
+            if key_match:
+                self._index.setdefault((section, key_match.group(2).lower()), number)
+
+    @property
+    def dirty(self):
+        return bool(self.dirty_keys)
+
+    def has_section(self, section):
+        return section.lower() in self._sections
+
+    def get(self, section, key, fallback=None):
+        number = self._index.get((section.lower(), key.lower()))
+        if number is None:
+            return fallback
+        return _KEY_RE.match(self.lines[number]).group(4)
+
+    def getboolean(self, section, key, fallback=False):
+        value = self.get(section, key)
+        if value is None:
+            return fallback
+        return _BOOLEAN_STATES.get(value.lower(), fallback)
+
+    def set(self, section, key, value):
+        """设置键值；值与当前相同时不做任何修改。返回是否修改"""
+        value = str(value)
+        number = self._index.get((section.lower(), key.lower()))
+        if number is not None:
+            match = _KEY_RE.match(self.lines[number])
+            if match.group(4) == value:
+                return False
+            self.lines[number] = match.group(1) + match.group(2) + match.group(3) + value + match.group(5)
+        else:
+            end = self._sections.get(section.lower())
+            if end is None:
+                if self.lines and self.lines[-1].strip():
+                    self.lines.append("")
+                self.lines.append(f"[{section}]")
+                self.lines.append(f"{key}={value}")
+            else:
+                # 插入到该节最后一个非空行之后，保持节末尾的空行
+                while end > 0 and not self.lines[end].strip() and not _SECTION_RE.match(self.lines[end]):
+                    end -= 1
+                self.lines.insert(end + 1, f"{key}={value}")
+            self._reindex()
+        self.dirty_keys.add((section.lower(), key.lower()))
+        return True
+
+    def to_bytes(self):
+        text = self.newline.join(self.lines)
+        if self.lines and self.trailing_newline:
+            text += self.newline
+        data = text.encode('utf-8', errors='surrogateescape')
+        return b"\xef\xbb\xbf" + data if self.bom else data
+
+    def save(self):
+        """有修改时通过临时文件原子地写回，返回是否写入"""
+        if not self.dirty:
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(self.to_bytes())
+        os.replace(temp_path, self.path)
+        self.dirty_keys.clear()
+        return True
@@ -0,0 +1,125 @@
+# coding=utf-8
+
+import os
+import json
+import time
+import threading
+import urllib.error
+
+from .http_client import HttpClient
+
+
+class MetadataCache:
+    """
+    版本号、更新日志、下载信息等远程元数据的磁盘缓存。
+
+    每个 URL 保存响应正文、获取时间以及 ETag / Last-Modified。
+    未过期的条目直接返回，不访问网络；过期条目使用
+    If-None-Match / If-Modified-Since 重新验证，服务器返回 304 时只刷新时间戳。
+    """
+
+    def __init__(self, cache_path, ttl=3600, serve_stale_offline=True, http_client=None):
+        self.cache_path = cache_path
+        self.http_client = http_client or HttpClient()
+        self.ttl = ttl # 秒
+        self.serve_stale_offline = serve_stale_offline # 网络失败时返回过期数据
+        self._lock = threading.Lock() # 版本探测线程与主线程会同时访问
+        self._entries = self._load()
+
+    def _load(self):
+        """从磁盘读取缓存文件，损坏或不存在时返回空缓存"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"读取元数据缓存失败，将重新建立: {e}")
+        return {}
+
+    def _save(self):
+        """原子地写回缓存文件（调用方需持有锁）"""
+        temp_path = self.cache_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            print(f"写入元数据缓存失败: {e}")
+
+    def get(self, url):
+        """返回缓存条目（可能已过期），不存在时返回 None"""
+        with self._lock:
+            entry = self._entries.get(url)
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry):
+        return entry is not None and (time.time() - entry.get("fetched_at", 0)) < self.ttl
+
+    def store(self, url, body, etag=None, last_modified=None):
+        with self._lock:
+            self._entries[url] = {
+                "body": body,
+                "fetched_at": time.time(),
+                "etag": etag,
+                "last_modified": last_modified,
+            }
+            self._save()
+
+    def touch(self, url):
+        """304 重新验证成功后刷新获取时间"""
+        with self._lock:
+            if url in self._entries:
+                self._entries[url]["fetched_at"] = time.time()
+                self._save()
+
+    def invalidate(self, url=None):
+        """删除单个 URL 的缓存，url 为 None 时清空全部"""
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(url, None)
+            self._save()
+
+    def fetch(self, url, timeout=5, force=False):
+        """
+        获取 URL 的正文文本。
+
+        force=True 时跳过新鲜度检查，但仍会使用条件请求。
+        网络失败且没有可用的缓存时抛出原始异常。
+        """
+        entry = self.get(url)
+        if not force and self.is_fresh(entry):
+            return entry["body"]
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            with self.http_client.open(url, headers=headers, timeout=timeout) as response:
+                body = response.read().decode('utf-8')
+                self.store(url, body, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                return body
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and entry:
+                self.touch(url)
+                return entry["body"]
+            if entry and self.serve_stale_offline:
+                print(f"获取 {url} 失败 (HTTP {e.code})，使用过期缓存")
+                return entry["body"]
+            raise
+        except Exception as e:
+            if entry and self.serve_stale_offline:
+                print(f"获取 {url} 失败 ({e})，使用过期缓存")
+                return entry["body"]
+            raise
+
+    def fetch_json(self, url, timeout=5, force=False):
+        return json.loads(self.fetch(url, timeout=timeout, force=force))
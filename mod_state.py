@@ -0,0 +1,83 @@
+# coding=utf-8
+
+import mobase
+
+try:
+    from PyQt6.QtCore import QTimer
+except ImportError:
+    from PyQt5.QtCore import QTimer
+
+
+class ModStateTransaction:
+    """
+    批量修改模组启用状态，最后只刷新一次 MO2。
+
+    用法:
+        with controller.mod_states:
+            controller.mod_states.set_active("某模组", True)
+            ...
+
+    可以嵌套使用，内层的修改并入最外层，最外层退出时统一提交；
+    与当前状态相同的修改会被跳过，没有实际修改时不刷新。
+    最外层因异常退出时放弃所有未提交的修改。
+    在 with 块之外调用 set_active 时立即提交。
+
+    刷新推迟到事件循环的下一轮执行，期间多次提交只刷新一次。
+    """
+
+    def __init__(self, organizer):
+        self.organizer = organizer
+        self._pending = {} # 模组名 -> 目标启用状态
+        self._depth = 0
+        self._refresh_scheduled = False
+
+    def set_active(self, name, active):
+        self._pending[name] = bool(active)
+        if self._depth == 0:
+            self.commit()
+
+    def __enter__(self):
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth > 0:
+            return
+        if exc_type is not None:
+            self._pending.clear()
+            return
+        self.commit()
+
+    def _set_active(self, mod_list, names, active):
+        try:
+            mod_list.setActive(names, active)
+        except TypeError:
+            # 旧版本 MO2 只接受单个模组名
+            for name in names:
+                mod_list.setActive(name, active)
+
+    def commit(self):
+        """应用所有修改，有变化时安排一次刷新；返回实际修改的模组数"""
+        pending, self._pending = self._pending, {}
+        mod_list = self.organizer.modList()
+        changes = {True: [], False: []}
+        for name, active in pending.items():
+            if bool(mod_list.state(name) & mobase.ModState.ACTIVE) != active:
+                changes[active].append(name)
+        for active, names in changes.items():
+            if names:
+                self._set_active(mod_list, names, active)
+        changed = len(changes[True]) + len(changes[False])
+        if changed:
+            self._schedule_refresh()
+        return changed
+
+    def _schedule_refresh(self):
+        if not self._refresh_scheduled:
+            self._refresh_scheduled = True
+            QTimer.singleShot(0, self._refresh)
+
+    def _refresh(self):
+        self._refresh_scheduled = False
+        self.organizer.refresh()
@@ -0,0 +1,149 @@
+# coding=utf-8
+
+import difflib
+import hashlib
+
+import mobase
+
+from .enb_deploy import load_json, save_json
+
+
+def order_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def parse_order(text):
+    """
+    解析排序文本，格式与 MO2 的 modlist.txt 相同：第一行优先级最高，
+    "+名称" 为启用，"-名称" 为禁用，"*" 开头（非托管）和 "#" 开头的行被忽略。
+
+    返回 [(名称, 是否启用)]。
+    """
+    entries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] in "*#":
+            continue
+        if line[0] in "+-":
+            entries.append((line[1:], line[0] == "+"))
+        else:
+            entries.append((line, True))
+    return entries
+
+
+def _place_above(mod_list, name, below, above):
+    """
+    确保 name 位于下方邻居 below 之上、上方邻居 above 之下（邻居为 None 时不限制）。
+
+    已经满足时不移动，否则放到 below 正上方（没有 below 时放到 above 正下方）。
+    返回是否移动了模组。
+    """
+    priority = mod_list.priority(name)
+    below_priority = mod_list.priority(below) if below is not None else None
+    above_priority = mod_list.priority(above) if above is not None else None
+    if (below_priority is None or priority > below_priority) and (above_priority is None or priority < above_priority):
+        return False
+    if below_priority is None:
+        target = above_priority
+    elif priority < below_priority:
+        target = below_priority # 移出后下方邻居的优先级减一，插入到它的原位置即在它正上方
+    else:
+        target = below_priority + 1
+    mod_list.setPriority(name, target)
+    return True
+
+
+def _in_order(mod_list, ascending):
+    """ascending 中的模组在 mod_list 中是否按优先级从低到高排列"""
+    priorities = [mod_list.priority(name) for name in ascending]
+    return all(low < high for low, high in zip(priorities, priorities[1:]))
+
+
+class OrderSyncResult:
+    def __init__(self, changed_lines=0, moved=0, toggled=0, missing=None):
+        self.changed_lines = changed_lines
+        self.moved = moved
+        self.toggled = toggled
+        self.missing = missing or [] # 排序中有、但当前未安装的模组
+
+    def summary(self):
+        text = f"变化 {self.changed_lines} 行，调整顺序 {self.moved} 个，切换启用状态 {self.toggled} 个"
+        if self.missing:
+            text += f"\n未安装的模组 ({len(self.missing)}): " + ", ".join(self.missing[:10])
+            if len(self.missing) > 10:
+                text += " ..."
+        return text
+
+
+class OrderSync:
+    """
+    增量同步服务器上的模组排序。
+
+    记录上次应用的排序内容和哈希；内容未变化时直接跳过。
+    变化时按行对比上次的排序，只把变化的行应用到 MO2 的 modList，不需要刷新整个配置。
+    """
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+        state = load_json(state_path) or {}
+        self.applied_hash = state.get("sha256")
+        self.applied_lines = state.get("lines", [])
+
+    def is_current(self, remote_hash):
+        """服务器公布的哈希与上次应用的一致时，无需下载"""
+        return bool(remote_hash) and remote_hash.lower() == self.applied_hash
+
+    def _changed_entries(self, entries):
+        """与上次应用的排序逐行对比，返回新排序中变化（新增或位置改变）的行号"""
+        lines = [("+" if enabled else "-") + name for name, enabled in entries]
+        matcher = difflib.SequenceMatcher(None, self.applied_lines, lines, autojunk=False)
+        changed = set()
+        for tag, _i1, _i2, j1, j2 in matcher.get_opcodes():
+            if tag != "equal":
+                changed.update(range(j1, j2))
+        return lines, sorted(changed)
+
+    def apply(self, text, mod_list):
+        """
+        把排序文本应用到 mod_list（mobase.IModList）。
+
+        内容与上次应用的相同时返回 None；否则返回 OrderSyncResult。
+        只保证排序中各模组之间的相对顺序，用户自行添加的模组保持原位。
+        """
+        text_hash = order_hash(text)
+        if text_hash == self.applied_hash:
+            return None
+
+        entries = parse_order(text)
+        lines, changed = self._changed_entries(entries)
+        installed = set(mod_list.allMods())
+        result = OrderSyncResult(changed_lines=len(changed))
+        result.missing = [name for name, _enabled in entries if name not in installed]
+
+        # entries 第一行优先级最高，从优先级最低的一端开始处理，
+        # 每个变化的模组放到它下方邻居之上、上方邻居之下
+        ascending = [name for name, _enabled in reversed(entries) if name in installed]
+        position = {name: index for index, name in enumerate(ascending)}
+        for line_index in sorted(changed, reverse=True):
+            name, enabled = entries[line_index]
+            if name not in installed:
+                continue
+            if bool(mod_list.state(name) & mobase.ModState.ACTIVE) != enabled:
+                mod_list.setActive(name, enabled)
+                result.toggled += 1
+            index = position[name]
+            if _place_above(mod_list, name, ascending[index - 1] if index > 0 else None,
+                            ascending[index + 1] if index + 1 < len(ascending) else None):
+                result.moved += 1
+
+        # 未变化的模组可能已被用户手动拖动，增量调整后仍不一致时按完整排序逐个放置
+        if not _in_order(mod_list, ascending):
+            print("模组排序增量调整后顺序仍不一致，改为完整排序")
+            for index in range(1, len(ascending)):
+                if _place_above(mod_list, ascending[index], ascending[index - 1], None):
+                    result.moved += 1
+
+        self.applied_hash = text_hash
+        self.applied_lines = lines
+        save_json(self.state_path, {"sha256": text_hash, "lines": lines})
+        return result
@@ -0,0 +1,333 @@
+# coding=utf-8
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import zipfile
+import http.client
+import urllib.error
+import urllib.parse
+
+from .enb_deploy import OperationCancelled, load_json, save_json
+from .http_client import HttpClient
+
+
+CHUNK_SIZE = 256 * 1024
+PACKAGE_FILE_NAME = "update_package.zip"
+STAGING_DIR_NAME = ".update_staging"
+BACKUP_DIR_NAME = ".update_backup"
+DELTA_DIR_NAME = ".update_delta"
+DELTA_META_FILE_NAME = ".delta.json" # 增量下载目录中各文件对应的 sha256，用于判断能否续传
+# 本地状态文件，更新包中即使包含也不覆盖
+PROTECTED_FILES = ("version.ini", "metadata_cache.json", "order_sync.json", "game_path.json", "trace.jsonl", "trace_summary.json")
+
+
+class UpdateError(Exception):
+    """更新包下载、校验或安装失败"""
+
+
+def sha256_of_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PluginUpdater:
+    """
+    插件自更新：流式、可续传地下载更新包，校验 SHA-256，再整体替换插件文件。
+
+    下载内容以固定大小的块写入 plugin_path 中的 .part 临时文件，内存占用与包大小无关；
+    连接中断后使用 HTTP Range 从已下载的位置继续。
+    """
+
+    def __init__(self, plugin_path, http_client=None, timeout=15, max_retries=5):
+        self.plugin_path = plugin_path
+        self.http_client = http_client or HttpClient()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.package_path = os.path.join(plugin_path, PACKAGE_FILE_NAME)
+        self.part_path = self.package_path + ".part"
+        self.part_meta_path = self.part_path + ".json"
+
+    def _prepare_part(self, url, expected_sha256):
+        """只有同一个 URL 和校验值的未完成下载才能续传"""
+        meta = load_json(self.part_meta_path)
+        if meta != {"url": url, "sha256": expected_sha256.lower()}:
+            if os.path.exists(self.part_path):
+                os.remove(self.part_path)
+            save_json(self.part_meta_path, {"url": url, "sha256": expected_sha256.lower()})
+
+    def _download_once(self, url, part_path, progress, cancelled):
+        """
+        发起一次请求并把数据追加到 part_path。
+
+        返回 True 表示下载完整；连接提前结束时返回 False，由调用方续传。
+        """
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        try:
+            # 续传由本函数的调用方负责，客户端不再重试
+            response = self.http_client.open(url, headers=headers, timeout=self.timeout, retries=0)
+        except urllib.error.HTTPError as e:
+            if e.code == 416 and offset:
+                # 请求的范围超出文件末尾，说明之前已经下载完整
+                return True
+            raise
+
+        with response:
+            if offset and response.status != 206:
+                # 服务器不支持 Range，只能从头开始
+                offset = 0
+            total = None
+            content_range = response.headers.get("Content-Range")
+            if response.status == 206 and content_range:
+                match = re.match(r"bytes \d+-\d+/(\d+)", content_range)
+                if match:
+                    total = int(match.group(1))
+            elif response.headers.get("Content-Length"):
+                total = offset + int(response.headers["Content-Length"])
+
+            done = offset
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                while True:
+                    if cancelled is not None and cancelled():
+                        raise OperationCancelled()
+                    try:
+                        chunk = response.read(CHUNK_SIZE)
+                    except http.client.IncompleteRead as e:
+                        f.write(e.partial)
+                        return False
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    done += len(chunk)
+                    if progress is not None:
+                        progress(0, 1, done, total or 0)
+        return total is None or done >= total
+
+    def _download_resumable(self, url, part_path, progress, cancelled):
+        """
+        下载到 part_path，网络错误时按指数退避重试并续传，有进展的重试不计入次数。
+        """
+        failures = 0
+        while True:
+            size_before = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            try:
+                if self._download_once(url, part_path, progress, cancelled):
+                    return
+                error = UpdateError("连接提前关闭")
+            except OperationCancelled:
+                raise
+            except urllib.error.HTTPError:
+                raise
+            except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+                error = e
+            size_after = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            failures = 0 if size_after > size_before else failures + 1
+            if failures > self.max_retries:
+                raise UpdateError(f"下载更新失败: {error}")
+            print(f"更新下载中断 ({error})，将从 {size_after} 字节处继续")
+            time.sleep(min(2 ** failures, 30))
+
+    def download(self, url, expected_sha256, progress=None, cancelled=None):
+        """
+        下载完整更新包并校验 SHA-256，返回包路径。
+
+        progress(files_done, files_total, bytes_done, bytes_total) 在每个数据块后调用。
+        """
+        self._prepare_part(url, expected_sha256)
+        self._download_resumable(url, self.part_path, progress, cancelled)
+
+        actual = sha256_of_file(self.part_path)
+        if actual.lower() != expected_sha256.lower():
+            os.remove(self.part_path)
+            os.remove(self.part_meta_path)
+            raise UpdateError(f"更新包 SHA-256 校验失败 (期望 {expected_sha256}，实际 {actual})")
+        os.replace(self.part_path, self.package_path)
+        os.remove(self.part_meta_path)
+        return self.package_path
+
+    def _package_members(self, archive):
+        """返回 [(压缩包内名称, 相对路径)]；所有文件位于同一顶层文件夹时去掉该文件夹"""
+        names = [info.filename for info in archive.infolist() if not info.is_dir()]
+        for name in names:
+            normalized = os.path.normpath(name)
+            if os.path.isabs(normalized) or normalized.startswith(".."):
+                raise UpdateError(f"更新包中包含非法路径: {name}")
+        prefixes = {name.split("/", 1)[0] for name in names}
+        strip = len(prefixes) == 1 and all("/" in name for name in names)
+        members = []
+        for name in names:
+            rel_path = name.split("/", 1)[1] if strip else name
+            if rel_path in PROTECTED_FILES:
+                continue
+            members.append((name, os.path.normpath(rel_path)))
+        return members
+
+    def install(self, package_path=None):
+        """解压完整更新包到暂存区后替换插件文件，返回替换的相对路径列表"""
+        package_path = package_path or self.package_path
+        staging_path = os.path.join(self.plugin_path, STAGING_DIR_NAME)
+        if os.path.exists(staging_path):
+            shutil.rmtree(staging_path)
+
+        try:
+            with zipfile.ZipFile(package_path) as archive:
+                members = self._package_members(archive)
+                for name, rel_path in members:
+                    target = os.path.join(staging_path, rel_path)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with archive.open(name) as src, open(target, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        except zipfile.BadZipFile as e:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise UpdateError(f"更新包格式无效: {e}")
+
+        rel_paths = [rel_path for _name, rel_path in members]
+        self._swap_in(staging_path, rel_paths)
+        os.remove(package_path)
+        return rel_paths
+
+    def _swap_in(self, staging_path, rel_paths):
+        """把暂存区中的文件替换到插件目录：旧文件先移到备份区，任何一步失败都会还原"""
+        backup_path = os.path.join(self.plugin_path, BACKUP_DIR_NAME)
+        if os.path.exists(backup_path):
+            shutil.rmtree(backup_path)
+        moved = []
+        placed = []
+        try:
+            for rel_path in rel_paths:
+                current = os.path.join(self.plugin_path, rel_path)
+                if os.path.exists(current):
+                    backup = os.path.join(backup_path, rel_path)
+                    os.makedirs(os.path.dirname(backup), exist_ok=True)
+                    os.replace(current, backup)
+                    moved.append(rel_path)
+                os.makedirs(os.path.dirname(current), exist_ok=True)
+                os.replace(os.path.join(staging_path, rel_path), current)
+                placed.append(rel_path)
+        except BaseException:
+            for rel_path in placed:
+                os.remove(os.path.join(self.plugin_path, rel_path))
+            for rel_path in moved:
+                os.replace(os.path.join(backup_path, rel_path), os.path.join(self.plugin_path, rel_path))
+            raise
+        finally:
+            shutil.rmtree(staging_path, ignore_errors=True)
+
+        shutil.rmtree(backup_path, ignore_errors=True)
+
+    def local_hashes(self):
+        """已安装插件文件的 {相对路径: sha256}，不包括内部目录、缓存和本地状态文件"""
+        hashes = {}
+        for dir_path, dir_names, file_names in os.walk(self.plugin_path):
+            dir_names[:] = [name for name in dir_names if not name.startswith(".") and name != "__pycache__"]
+            for file_name in file_names:
+                rel_path = os.path.relpath(os.path.join(dir_path, file_name), self.plugin_path).replace("\\", "/")
+                if rel_path in PROTECTED_FILES or rel_path.startswith(PACKAGE_FILE_NAME):
+                    continue
+                hashes[rel_path] = sha256_of_file(os.path.join(dir_path, file_name))
+        return hashes
+
+    def plan_delta(self, files):
+        """
+        对比服务器文件清单 {相对路径: {"sha256", "size"}} 与本地文件，
+        返回需要下载的相对路径列表（新增或内容不同的文件）。
+        """
+        local = self.local_hashes()
+        changed = []
+        for rel_path, info in sorted(files.items()):
+            normalized = os.path.normpath(rel_path)
+            if os.path.isabs(normalized) or normalized.startswith(".."):
+                raise UpdateError(f"文件清单中包含非法路径: {rel_path}")
+            if rel_path in PROTECTED_FILES:
+                continue
+            if local.get(rel_path, "").lower() != info["sha256"].lower():
+                changed.append(rel_path)
+        return changed
+
+    def _prepare_delta(self, delta_path, files, changed):
+        """
+        保留上次中断的增量下载中、目标 sha256 仍相同的文件，删除其余文件。
+        返回记录 {相对路径: sha256}。
+        """
+        meta_path = os.path.join(delta_path, DELTA_META_FILE_NAME)
+        previous = load_json(meta_path) or {}
+        expected = {rel_path: files[rel_path]["sha256"].lower() for rel_path in changed}
+        for rel_path, sha256 in previous.items():
+            if expected.get(rel_path) != sha256:
+                target = os.path.join(delta_path, os.path.normpath(rel_path))
+                if os.path.exists(target):
+                    os.remove(target)
+        os.makedirs(delta_path, exist_ok=True)
+        save_json(meta_path, expected)
+        return expected
+
+    def install_delta(self, files, files_url, progress=None, cancelled=None):
+        """
+        增量更新：只下载内容变化的文件，逐个校验后一起替换。
+
+        files_url 为文件下载的根地址，单个文件的地址为 files_url/相对路径。
+        下载的文件保存在 .update_delta 中，中断或取消后下次从断点继续（与完整更新包相同）。
+        返回 (替换的相对路径列表, 本次下载字节数)。
+        """
+        changed = self.plan_delta(files)
+        delta_path = os.path.join(self.plugin_path, DELTA_DIR_NAME)
+        expected = self._prepare_delta(delta_path, files, changed)
+        bytes_total = sum(files[rel_path].get("size", 0) for rel_path in changed)
+        bytes_before = 0
+        downloaded = 0
+        for index, rel_path in enumerate(changed):
+            target = os.path.join(delta_path, os.path.normpath(rel_path))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            size_at_start = os.path.getsize(target) if os.path.exists(target) else 0
+            size = files[rel_path].get("size")
+            if not (size is not None and size_at_start == size and sha256_of_file(target) == expected[rel_path]):
+                url = files_url.rstrip("/") + "/" + urllib.parse.quote(rel_path)
+
+                def file_progress(_files_done, _files_total, done, _total, index=index, offset=bytes_before):
+                    if progress is not None:
+                        progress(index, len(changed), offset + done, bytes_total)
+
+                self._download_resumable(url, target, file_progress, cancelled)
+                if sha256_of_file(target) != expected[rel_path]:
+                    os.remove(target) # 内容错误的文件不能续传
+                    raise UpdateError(f"{rel_path} SHA-256 校验失败")
+            downloaded += os.path.getsize(target) - size_at_start
+            bytes_before += os.path.getsize(target)
+        # 替换完成或失败后 _swap_in 都会删除 .update_delta
+        self._swap_in(delta_path, [os.path.normpath(rel_path) for rel_path in changed])
+        return changed, downloaded
+
+    def apply_update(self, package_url, expected_sha256, files=None, files_url=None, progress=None, cancelled=None):
+        """
+        安装更新：版本信息提供文件清单时先尝试增量更新，失败则回退到完整更新包。
+
+        返回 (替换的相对路径列表, 下载字节数, 节省字节数)。
+        节省字节数以服务器清单中所有文件的大小之和作为完整下载的大小估算。
+        """
+        if files and files_url:
+            try:
+                changed, downloaded = self.install_delta(files, files_url, progress, cancelled)
+                full_size = sum(info.get("size", 0) for info in files.values())
+                print(f"增量更新完成: {len(changed)} 个文件，下载 {downloaded} 字节，节省 {full_size - downloaded} 字节")
+                return changed, downloaded, max(full_size - downloaded, 0)
+            except OperationCancelled:
+                raise
+            except Exception as e:
+                print(f"增量更新失败，改为下载完整更新包: {e}")
+        package_path = self.download(package_url, expected_sha256, progress, cancelled)
+        downloaded = os.path.getsize(package_path)
+        changed = self.install(package_path)
+        # 完整更新包已经包含所有文件，未完成的增量下载不再需要
+        shutil.rmtree(os.path.join(self.plugin_path, DELTA_DIR_NAME), ignore_errors=True)
+        return changed, downloaded, 0
@@ -0,0 +1,68 @@
+# coding=utf-8
+
+import queue
+import itertools
+import threading
+
+from .tracing import NULL_SPAN
+
+
+DEFAULT_WORKERS = 2
+
+
+class PrefetchScheduler:
+    """
+    启动后在后台按优先级并发执行预取任务。
+
+    预取任务只负责预热元数据缓存、组合清单等，之后点击按钮时的正常调用直接命中内存中的数据；
+    优先级数字小的先开始，相同优先级按加入顺序。
+    cancel() 丢弃尚未开始的任务，正在进行的请求在各自的超时内结束；
+    线程为守护线程，不会阻止 MO2 退出。
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, tracer=None):
+        self.workers = max(1, workers)
+        self.tracer = tracer
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._cancelled = threading.Event()
+        self._threads = []
+
+    def add(self, name, func, priority=0):
+        """加入任务 func()，失败只记录日志"""
+        if not self._cancelled.is_set():
+            self._queue.put((priority, next(self._order), name, func))
+
+    def start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"prefetch-{i}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _run(self):
+        while not self._cancelled.is_set():
+            try:
+                _priority, _order, name, func = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            span = self.tracer.span(f"prefetch:{name}") if self.tracer is not None else NULL_SPAN
+            try:
+                with span:
+                    func()
+            except Exception as e:
+                print(f"预取 {name} 失败: {e}")
+
+    def cancel(self):
+        """取消尚未开始的任务"""
+        self._cancelled.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
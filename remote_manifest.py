@@ -0,0 +1,72 @@
+# coding=utf-8
+
+import time
+import threading
+import urllib.error
+
+
+class RemoteManifest:
+    """
+    组合清单：一次请求同时获取插件版本、整合包版本、更新日志、排序信息和教程目录版本。
+
+    清单格式:
+        {
+            "plugin": {"version": ..., "sha256": ..., "url": ..., "files": ..., "files_url": ...},
+            "modpack": {"version": ...},
+            "changelog": "...",
+            "order": {"sha256": ..., "url": ...},
+            "tutorials": {"version": ...}
+        }
+
+    清单通过元数据缓存获取，各处调用共享同一份缓存，有效期内只访问一次网络。
+    服务器没有清单（404）或清单中缺少某一项时，回退到该项原来的单独地址。
+    """
+
+    def __init__(self, metadata_cache, manifest_url):
+        self.metadata_cache = metadata_cache
+        self.manifest_url = manifest_url
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock() # 预取线程和主线程同时加载时只请求一次
+        self._missing_until = 0 # 清单不存在时，在缓存有效期内不再请求
+
+    def load(self, timeout=5, force=False):
+        """返回清单字典；清单不可用时返回 None"""
+        with self._lock:
+            if not force and time.monotonic() < self._missing_until:
+                return None
+        try:
+            with self._fetch_lock:
+                manifest = self.metadata_cache.fetch_json(self.manifest_url, timeout=timeout, force=force)
+        except urllib.error.HTTPError as e:
+            if e.code in (404, 410):
+                with self._lock:
+                    self._missing_until = time.monotonic() + self.metadata_cache.ttl
+                print("服务器未提供组合清单，使用单独的地址")
+            else:
+                print(f"获取组合清单失败: {e}")
+            return None
+        except Exception as e:
+            print(f"获取组合清单失败: {e}")
+            return None
+        return manifest if isinstance(manifest, dict) else None
+
+    def is_recent(self, max_age):
+        """清单在 max_age 秒内获取或验证过"""
+        entry = self.metadata_cache.get(self.manifest_url)
+        return entry is not None and time.time() - entry.get("fetched_at", 0) < max_age
+
+    def section(self, name, fallback_url=None, as_json=True, timeout=5, force=False):
+        """
+        返回清单中的一项；清单中没有时从 fallback_url 单独获取。
+
+        as_json=False 时回退地址的正文按文本返回（如更新日志）。
+        两者都不可用时，没有 fallback_url 返回 None，否则抛出回退请求的异常。
+        """
+        manifest = self.load(timeout=timeout, force=force)
+        if manifest is not None and name in manifest:
+            return manifest[name]
+        if not fallback_url:
+            return None
+        if as_json:
+            return self.metadata_cache.fetch_json(fallback_url, timeout=timeout, force=force)
+        return self.metadata_cache.fetch(fallback_url, timeout=timeout, force=force)
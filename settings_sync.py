@@ -0,0 +1,63 @@
+# coding=utf-8
+
+import os
+import hashlib
+
+from .copy_engine import copy_file
+
+
+DEFAULT_BACKUP_COUNT = 5
+
+
+def file_digest(path):
+    """文件内容的 SHA-256，文件不存在时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class SettingsMirror:
+    """
+    把配置文件同步到另一位置（如 overwrite 目录）。
+
+    按内容哈希比较，只写入内容不同的文件，避免触发 MO2 的 overwrite 监视和 VFS 重新扫描；
+    目标被覆盖前保留有限数量的轮换备份 (.bak, .bak1, ...)，
+    最新备份与当前内容相同时不再重复备份。
+    """
+
+    def __init__(self, backup_count=DEFAULT_BACKUP_COUNT):
+        self.backup_count = max(0, backup_count)
+
+    def backup_paths(self, target):
+        """从新到旧排列的备份路径"""
+        if not self.backup_count:
+            return []
+        return [target + ".bak"] + [f"{target}.bak{i}" for i in range(1, self.backup_count)]
+
+    def _backup(self, target, target_digest):
+        paths = self.backup_paths(target)
+        if not paths or file_digest(paths[0]) == target_digest:
+            return False
+        for i in range(len(paths) - 1, 0, -1):
+            if os.path.exists(paths[i - 1]):
+                os.replace(paths[i - 1], paths[i])
+        copy_file(target, paths[0])
+        return True
+
+    def mirror(self, source, target):
+        """目标内容与源文件不同时备份并原子地替换目标，返回是否写入"""
+        source_digest = file_digest(source)
+        if source_digest is None:
+            raise FileNotFoundError(source)
+        target_digest = file_digest(target)
+        if source_digest == target_digest:
+            return False
+        if target_digest is not None:
+            self._backup(target, target_digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = target + ".tmp"
+        copy_file(source, temp_path)
+        os.replace(temp_path, target)
+        return True
@@ -0,0 +1,32 @@
+# coding=utf-8
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "support"))
+
+import harness
+
+harness.install_stubs()
+
+
+@pytest.fixture
+def plugin(tmp_path):
+    """复制到临时目录并加载的插件包，插件写入的文件不会落在仓库中"""
+    return harness.load_plugin(str(tmp_path / "plugin"))
+
+
+@pytest.fixture
+def qt_app():
+    """MO2 中已经存在的 QApplication；测试通过发出 aboutToQuit 模拟退出"""
+    try:
+        from PyQt6 import QtWidgets
+    except ImportError:
+        from PyQt5 import QtWidgets
+    if harness.QT_STUBBED:
+        from PyQt5 import QtCore
+        del QtCore._pending[:] # 丢弃之前的测试留下、尚未触发的定时器
+        return QtWidgets.QApplication([]) # 替身每个测试使用新的实例，不保留之前连接的槽
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
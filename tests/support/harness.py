@@ -0,0 +1,433 @@
+# coding=utf-8
+"""
+在 MO2 之外加载插件的辅助工具，供 tests/ 和 benchmarks/ 共用。
+
+install_stubs() 把 mobase 替身加入 sys.path，未安装 PyQt 时同时使用 Qt 替身（安装了则使用 offscreen 平台）；
+load_plugin() 把插件目录加载为包；FakeOrganizer / FakeModList 模拟 MO2 的模组列表；
+ScriptedDialogs 让消息框和对话框不阻塞，open_enb_window 在没有窗口时准备 ENB 操作；
+LocalServer 是可以模拟延迟、断线的本地 HTTP 服务器。
+"""
+
+import os
+import sys
+import time
+import types
+import threading
+import importlib.util
+
+
+SUPPORT_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(os.path.dirname(SUPPORT_DIR))
+PACKAGE_NAME = "xingli"
+QT_STUBBED = False # install_stubs 后为 True 表示使用 Qt 替身
+
+
+def install_stubs():
+    """使插件在没有 MO2 的环境中可以导入"""
+    stubs = os.path.join(SUPPORT_DIR, "stubs")
+    if stubs not in sys.path:
+        sys.path.insert(0, stubs)
+    global QT_STUBBED
+    qt_stubs = os.path.join(stubs, "qt")
+    if QT_STUBBED or (importlib.util.find_spec("PyQt6") is None and importlib.util.find_spec("PyQt5") is None):
+        QT_STUBBED = True
+        if qt_stubs not in sys.path:
+            sys.path.insert(0, qt_stubs)
+    else:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def copy_plugin(target_dir):
+    """把插件源文件复制到 target_dir"""
+    import shutil
+    os.makedirs(target_dir, exist_ok=True)
+    for name in os.listdir(PLUGIN_DIR):
+        if name.endswith(".py"):
+            shutil.copy2(os.path.join(PLUGIN_DIR, name), os.path.join(target_dir, name))
+
+
+def load_plugin(target_dir=None, copy_sources=True):
+    """
+    把插件加载为名为 xingli 的包并返回。
+
+    target_dir 不为 None 时先把插件源文件复制过去，插件写入的 version.ini、缓存等文件不会落在仓库中；
+    copy_sources 为 False 时直接加载 target_dir 中已经复制好的插件（benchmarks/startup.py 不希望导入 shutil）。
+    本仓库中没有的 network / tutorial_data 模块用最小替身代替。
+    """
+    install_stubs()
+    plugin_dir = PLUGIN_DIR
+    if target_dir is not None:
+        if copy_sources:
+            copy_plugin(target_dir)
+        plugin_dir = target_dir
+
+    for name in list(sys.modules):
+        if name == PACKAGE_NAME or name.startswith(PACKAGE_NAME + "."):
+            del sys.modules[name]
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [plugin_dir]
+    package.__file__ = os.path.join(plugin_dir, "__init__.py")
+    sys.modules[PACKAGE_NAME] = package
+
+    if not os.path.exists(os.path.join(plugin_dir, "network.py")):
+        network = types.ModuleType(PACKAGE_NAME + ".network")
+
+        class Network:
+            def __init__(self, *args, **kwargs):
+                self.args = args
+
+            def check_for_updates(self, parent=None):
+                pass
+
+        network.Network = Network
+        sys.modules[network.__name__] = network
+    if not os.path.exists(os.path.join(plugin_dir, "tutorial_data.py")):
+        tutorial_data = types.ModuleType(PACKAGE_NAME + ".tutorial_data")
+        tutorial_data.TUTORIAL_CATEGORIES = make_catalog(3, 20)
+        sys.modules[tutorial_data.__name__] = tutorial_data
+    return package
+
+
+def process_events():
+    """处理排队的事件和零间隔定时器（替身中依次触发所有待执行的定时器）"""
+    try:
+        from PyQt6.QtCore import QCoreApplication
+    except ImportError:
+        from PyQt5.QtCore import QCoreApplication
+    QCoreApplication.processEvents()
+
+
+def make_catalog(categories, per_category):
+    """生成教程目录 {分类: [{"name", "url"}]}"""
+    words = ["ENB", "安装", "指南", "画质", "性能", "优化", "天际", "模组", "排序", "存档"]
+    return {
+        f"分类{c}": [
+            {"name": f"{words[i % len(words)]}{words[(i * 7 + c) % len(words)]}教程 {c}-{i}", "url": f"https://example.invalid/{c}/{i}"}
+            for i in range(per_category)
+        ]
+        for c in range(categories)
+    }
+
+
+class FakeModList:
+    """
+    模拟 mobase.IModList。order 按优先级从低到高排列，priority(name) 为下标；
+    setPriority 与 MO2 相同：先移出再插入到目标位置，其他模组随之移动。
+    """
+
+    def __init__(self, names, active=None):
+        import mobase
+        self._active_flag = mobase.ModState.ACTIVE
+        self._exists_flag = mobase.ModState.EXISTS
+        self.order = list(names)
+        self.active = set(self.order if active is None else active)
+        self.set_active_calls = 0
+        self.set_priority_calls = 0
+
+    def allMods(self):
+        return list(self.order)
+
+    def allModsByProfilePriority(self):
+        return list(self.order)
+
+    def priority(self, name):
+        return self.order.index(name)
+
+    def setPriority(self, name, priority):
+        self.set_priority_calls += 1
+        self.order.remove(name)
+        priority = max(0, min(priority, len(self.order)))
+        self.order.insert(priority, name)
+        return True
+
+    def state(self, name):
+        if name not in self.order:
+            return 0
+        return self._exists_flag | (self._active_flag if name in self.active else 0)
+
+    def setActive(self, names, active):
+        self.set_active_calls += 1
+        for name in [names] if isinstance(names, str) else names:
+            if active:
+                self.active.add(name)
+            else:
+                self.active.discard(name)
+        return True
+
+
+class FakeOrganizer:
+    """模拟 mobase.IOrganizer：记录 refresh 次数，插件设置保存在 settings 字典中"""
+
+    def __init__(self, base_path, mod_list=None, settings=None):
+        self.base_path = base_path
+        self.mod_list = mod_list or FakeModList([])
+        self.settings = settings or {}
+        self.refresh_calls = 0
+        self.ui_callbacks = []
+
+    def modList(self):
+        return self.mod_list
+
+    def refresh(self, save_changes=True):
+        self.refresh_calls += 1
+
+    def pluginSetting(self, plugin_name, key):
+        return self.settings.get(key)
+
+    def basePath(self):
+        return self.base_path
+
+    def modsPath(self):
+        return os.path.join(self.base_path, "mods")
+
+    def overwritePath(self):
+        return os.path.join(self.base_path, "overwrite")
+
+    def onUserInterfaceInitialized(self, callback):
+        self.ui_callbacks.append(callback)
+        return True
+
+
+class FakeListItem:
+    """未安装 PyQt 时代替 QListWidgetItem（替身控件不保存数据）"""
+
+    def __init__(self, text=""):
+        self._text = text
+        self._data = {}
+
+    def setData(self, role, value):
+        self._data[role] = value
+
+    def data(self, role):
+        return self._data.get(role)
+
+    def text(self):
+        return self._text
+
+    def setToolTip(self, text):
+        pass
+
+
+class FakeListWidget:
+    """只实现 ENB 列表用到的方法的 QListWidget"""
+
+    def __init__(self, role):
+        self.role = role
+        self.items = []
+        self.current = None
+
+    def clear(self):
+        self.items = []
+        self.current = None
+
+    def addItem(self, item):
+        self.items.append(item)
+
+    def currentItem(self):
+        return self.current
+
+    def select(self, name):
+        self.current = next(item for item in self.items if item.data(self.role) == name)
+
+
+class FixedGamePath:
+    """代替 GamePathResolver，总是返回同一个游戏目录"""
+
+    def __init__(self, game_path):
+        self.game_path = game_path
+
+    def resolve(self):
+        return self.game_path
+
+    def remember(self, path, source=None):
+        self.game_path = path
+
+
+class _Overlay:
+    def __init__(self, base, overrides):
+        self._base = base
+        self.__dict__.update(overrides)
+
+    def __getattr__(self, name):
+        return getattr(self._base, name)
+
+
+class ScriptedDialogs:
+    """
+    替换插件模块中的 QtWidgets：消息框只记录文本，确认框总是回答“是”，
+    选择文件夹和输入文本的对话框返回 directory / text。其余控件不变。
+    """
+
+    def __init__(self):
+        self.messages = [] # (标题, 文本)
+        self.directory = ""
+        self.text = ""
+
+    def install(self, module):
+        dialogs = self
+
+        def record(parent, title, text, *args):
+            dialogs.messages.append((title, text))
+
+        class MessageBox:
+            Yes = 0x4000
+            No = 0x10000
+            information = warning = critical = staticmethod(record)
+
+            @staticmethod
+            def question(parent, title, text, *args):
+                record(parent, title, text)
+                return MessageBox.Yes
+
+        class FileDialog:
+            @staticmethod
+            def getExistingDirectory(*args):
+                return dialogs.directory
+
+        class InputDialog:
+            @staticmethod
+            def getText(*args):
+                return dialogs.text, True
+
+        overrides = {"QMessageBox": MessageBox, "QFileDialog": FileDialog, "QInputDialog": InputDialog}
+        if QT_STUBBED:
+            overrides["QListWidgetItem"] = FakeListItem
+        module.QtWidgets = _Overlay(module.QtWidgets, overrides)
+        return self
+
+    def last(self):
+        return self.messages[-1][1] if self.messages else None
+
+
+def open_enb_window(controller, game_path):
+    """不创建窗口，只准备 ENB 窗口用到的控件并刷新预设列表"""
+    from importlib import import_module
+    module = import_module(type(controller).__module__)
+    widgets = module.QtWidgets
+    controller._game_paths = FixedGamePath(game_path)
+    controller.enb_list = FakeListWidget(module.Qt.UserRole)
+    controller.enb_action_buttons = []
+    controller.enb_progress_bar = widgets.QProgressBar()
+    controller.enb_cancel_button = widgets.QPushButton()
+    controller.enb_status_label = widgets.QLabel()
+    return controller._refresh_enb_window()
+
+
+def wait_for_job(controller, timeout_ms=60000):
+    """等待 ENB 后台任务结束，并处理它排队发回主线程的信号"""
+    job = controller._enb_job
+    if job is not None:
+        assert job.wait(timeout_ms), "ENB 后台任务超时"
+    process_events()
+
+
+class LocalServer:
+    """
+    在后台线程运行的本地 HTTP 服务器。
+
+    routes 为 {路径: handler(request)}，handler 可以调用 request.send_response 等方法自行响应；
+    常用行为见 static（可延迟响应）和 ranged（支持 Range、可中途断开）。
+    """
+
+    def __init__(self, routes=None):
+        import http.server # 不在模块顶部导入：它会带入 http.client、email 等，影响启动耗时的测量
+        self.routes = dict(routes or {})
+        self.requests = [] # (方法, 路径, 请求头)
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True # 响应头和正文分两次写出，否则 keep-alive 连接上每个请求都会等待延迟确认
+
+            def do_GET(self):
+                server.requests.append(("GET", self.path, dict(self.headers)))
+                route = server.routes.get(self.path.split("?", 1)[0])
+                if route is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                route(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def static(body, content_type="application/json", delay=0):
+    """返回固定正文的路由，delay 秒后才响应"""
+    data = body.encode('utf-8') if isinstance(body, str) else body
+
+    def handler(request):
+        if delay:
+            time.sleep(delay)
+        request.send_response(200)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+    return handler
+
+
+def ranged(data, drops=0, drop_after=None):
+    """
+    支持 Range 请求的下载路由；前 drops 次响应在发送 drop_after 字节后断开连接。
+    """
+    state = {"drops": drops}
+
+    def handler(request):
+        start = 0
+        range_header = request.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            start = int(range_header[len("bytes="):].split("-", 1)[0])
+        if start >= len(data):
+            request.send_response(416)
+            request.send_header("Content-Range", f"bytes */{len(data)}")
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        body = data[start:]
+        request.send_response(206 if start else 200)
+        if start:
+            request.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        if state["drops"] > 0:
+            state["drops"] -= 1
+            cut = drop_after if drop_after is not None else len(body) // 2
+            request.wfile.write(body[:cut])
+            request.wfile.flush()
+            request.close_connection = True
+            request.connection.shutdown(2)
+            return
+        request.wfile.write(body)
+
+    return handler
+
+
+def unreachable_url(path="/"):
+    """返回一个没有服务监听的本地地址"""
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}{path}"
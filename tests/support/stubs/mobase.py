@@ -0,0 +1,45 @@
+# coding=utf-8
+"""测试和基准使用的最小 mobase 替身，只包含插件实际用到的名称"""
+
+import enum
+
+
+class ModState(enum.IntFlag):
+    EXISTS = 0x1
+    ACTIVE = 0x2
+    ESSENTIAL = 0x4
+    EMPTY = 0x8
+    ENDORSED = 0x10
+    VALID = 0x20
+
+
+class PluginSetting:
+    def __init__(self, key, description, default_value):
+        self.key = key
+        self.description = description
+        self.default_value = default_value
+
+
+class VersionInfo:
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def __str__(self):
+        return ".".join(str(part) for part in self.parts)
+
+
+class IPlugin:
+    def __init__(self):
+        pass
+
+
+class IPluginTool(IPlugin):
+    pass
+
+
+class IOrganizer:
+    pass
+
+
+class IModList:
+    pass
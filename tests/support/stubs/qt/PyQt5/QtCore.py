@@ -0,0 +1,211 @@
+# coding=utf-8
+
+import threading
+
+
+class _Flags(type):
+    def __getattr__(cls, name):
+        return 0
+
+
+class Qt(metaclass=_Flags):
+    DisplayRole = 0
+    ToolTipRole = 3
+    UserRole = 256
+
+
+class _BoundSignal:
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def disconnect(self, slot=None):
+        if slot is None:
+            self._slots.clear()
+        else:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            slot(*args)
+
+
+class pyqtSignal:
+    """槽函数在发出信号的线程中直接调用（真实 Qt 会排队到接收者线程）"""
+
+    def __init__(self, *types):
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        bound = _BoundSignal()
+        instance.__dict__[self.name] = bound
+        return bound
+
+
+class QObject:
+    def __init__(self, parent=None):
+        self._parent = parent
+
+    def deleteLater(self):
+        pass
+
+
+class QCoreApplication(QObject):
+    @staticmethod
+    def processEvents(*args):
+        run_pending_timers()
+
+
+class QThread(QObject):
+    finished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._thread = None
+        self._interrupted = threading.Event()
+
+    def run(self):
+        pass
+
+    def _bootstrap(self):
+        try:
+            self.run()
+        finally:
+            self.finished.emit()
+
+    def start(self):
+        self._interrupted.clear()
+        self._thread = threading.Thread(target=self._bootstrap, daemon=True)
+        self._thread.start()
+
+    def isRunning(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def isFinished(self):
+        return self._thread is not None and not self._thread.is_alive()
+
+    def wait(self, msecs=None):
+        if self._thread is None:
+            return True
+        self._thread.join(None if msecs is None else msecs / 1000)
+        return not self._thread.is_alive()
+
+    def requestInterruption(self):
+        self._interrupted.set()
+
+    def isInterruptionRequested(self):
+        return self._interrupted.is_set()
+
+    def quit(self):
+        pass
+
+
+_pending = [] # 等待触发的定时器回调
+
+
+def run_pending_timers():
+    """依次触发所有到期的定时器（替身中的定时器不计时，由测试手动推进）"""
+    while _pending:
+        callback = _pending.pop(0)
+        callback()
+
+
+class QTimer(QObject):
+    timeout = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._single_shot = False
+        self._interval = 0
+        self._active = False
+
+    @staticmethod
+    def singleShot(msec, callback):
+        _pending.append(callback)
+
+    def setSingleShot(self, single_shot):
+        self._single_shot = single_shot
+
+    def setInterval(self, msec):
+        self._interval = msec
+
+    def interval(self):
+        return self._interval
+
+    def start(self, msec=None):
+        if msec is not None:
+            self._interval = msec
+        if not self._active:
+            self._active = True
+            _pending.append(self._fire)
+
+    def stop(self):
+        self._active = False
+        if self._fire in _pending:
+            _pending.remove(self._fire)
+
+    def isActive(self):
+        return self._active
+
+    def _fire(self):
+        if not self._active:
+            return
+        if self._single_shot:
+            self._active = False
+        else:
+            _pending.append(self._fire)
+        self.timeout.emit()
+
+
+class QModelIndex:
+    def __init__(self, row=-1):
+        self._row = row
+
+    def isValid(self):
+        return self._row >= 0
+
+    def row(self):
+        return self._row
+
+
+class QAbstractListModel(QObject):
+    def index(self, row, column=0, parent=None):
+        return QModelIndex(row)
+
+
+class QSortFilterProxyModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._source = None
+
+    def setSourceModel(self, model):
+        self._source = model
+
+    def sourceModel(self):
+        return self._source
+
+    def invalidate(self):
+        pass
+
+    def sort(self, column, order=None):
+        pass
+
+    def rowCount(self, parent=None):
+        if self._source is None:
+            return 0
+        return sum(1 for row in range(self._source.rowCount()) if self.filterAcceptsRow(row, None))
+
+
+class QStandardPaths:
+    DocumentsLocation = 1
+
+    @staticmethod
+    def writableLocation(location):
+        return ""
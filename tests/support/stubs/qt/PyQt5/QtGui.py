@@ -0,0 +1,14 @@
+# coding=utf-8
+
+from .QtWidgets import _Widget
+
+
+_classes = {}
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    if name not in _classes:
+        _classes[name] = type(name, (_Widget,), {})
+    return _classes[name]
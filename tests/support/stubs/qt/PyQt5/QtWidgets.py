@@ -0,0 +1,49 @@
+# coding=utf-8
+
+from .QtCore import QObject, pyqtSignal
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class _AnyAttribute(type):
+    def __getattr__(cls, name):
+        return _noop
+
+
+class _Widget(metaclass=_AnyAttribute):
+    """未单独实现的控件：构造和所有方法调用都不做任何事"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return _noop
+
+
+class QApplication(QObject):
+    aboutToQuit = pyqtSignal()
+    _instance = None
+
+    def __init__(self, argv=None):
+        super().__init__()
+        QApplication._instance = self
+
+    @staticmethod
+    def instance():
+        return QApplication._instance
+
+    def quit(self):
+        self.aboutToQuit.emit()
+
+
+_classes = {}
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    if name not in _classes:
+        _classes[name] = type(name, (_Widget,), {})
+    return _classes[name]
@@ -0,0 +1,2 @@
+# coding=utf-8
+"""未安装 PyQt 时使用的最小替身：信号直接调用槽函数，QThread 基于 threading，定时器手动触发"""
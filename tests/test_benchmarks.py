@@ -0,0 +1,18 @@
+# coding=utf-8
+"""基准测试脚本本身可以运行（每项只测一次，不保存结果）"""
+
+import os
+import sys
+import subprocess
+
+import harness
+
+
+def test_benchmarks_run(tmp_path):
+    script = os.path.join(harness.PLUGIN_DIR, "benchmarks", "run.py")
+    result = subprocess.run(
+        [sys.executable, script, "--repeat", "1", "--no-save", "--results", str(tmp_path / "summary.json")],
+        capture_output=True, text=True, encoding="utf-8", timeout=300
+    )
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+    assert "bench.start_enb.switch" in result.stdout
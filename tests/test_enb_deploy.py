@@ -0,0 +1,252 @@
+# coding=utf-8
+
+import os
+
+import pytest
+
+
+def write_tree(root, files):
+    for rel_path, data in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+def read_tree(root):
+    result = {}
+    for dir_path, _dir_names, file_names in os.walk(root):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            with open(path, 'rb') as f:
+                result[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+    return result
+
+
+OLD = {"enbseries.ini": b"old", "enbseries/effect.fx": b"old effect"}
+NEW = {"enbseries.ini": b"new", "enbseries/effect.fx": b"new effect", "enblocal.ini": b"local"}
+
+
+def test_replace_tree_swaps_in_new_preset(plugin, tmp_path):
+    from xingli import enb_deploy
+
+    source, target = str(tmp_path / "source"), str(tmp_path / "backup" / "P")
+    write_tree(source, NEW)
+    write_tree(target, OLD)
+    enb_deploy.replace_tree(source, target, workers=2)
+    assert read_tree(target) == NEW
+    assert os.listdir(os.path.dirname(target)) == ["P"]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_cancelled_replace_keeps_old_preset(plugin, tmp_path, workers):
+    from xingli import enb_deploy
+
+    source, target = str(tmp_path / "source"), str(tmp_path / "backup" / "P")
+    write_tree(source, {f"enbseries/{i}.fx": b"x" * 1000 for i in range(50)})
+    write_tree(target, OLD)
+    calls = []
+
+    def cancelled():
+        calls.append(1)
+        return len(calls) > 5
+
+    with pytest.raises(enb_deploy.OperationCancelled):
+        enb_deploy.replace_tree(source, target, cancelled=cancelled, workers=workers)
+    assert read_tree(target) == OLD
+    assert os.listdir(os.path.dirname(target)) == ["P"]
+
+
+def test_failed_replace_keeps_old_preset(plugin, tmp_path, monkeypatch):
+    from xingli import enb_deploy
+    from xingli.copy_engine import CopyErrors
+
+    source, target = str(tmp_path / "source"), str(tmp_path / "backup" / "P")
+    write_tree(source, NEW)
+    write_tree(target, OLD)
+    original = enb_deploy.copy_file
+
+    def failing_copy(src, dst):
+        if src.endswith("enblocal.ini"):
+            raise OSError("磁盘已满")
+        return original(src, dst)
+
+    monkeypatch.setattr(enb_deploy, "copy_file", failing_copy)
+    with pytest.raises(CopyErrors):
+        enb_deploy.replace_tree(source, target, workers=1)
+    assert read_tree(target) == OLD
+    assert os.listdir(os.path.dirname(target)) == ["P"]
+
+
+def test_interrupted_swap_restores_old_preset(plugin, tmp_path):
+    from xingli import enb_deploy
+
+    backup = tmp_path / "backup"
+    source, target = str(tmp_path / "source"), str(backup / "P")
+    write_tree(source, NEW)
+    # 上次在旧目录换出后、新目录换入前中断
+    write_tree(str(backup / ".P.replaced"), OLD)
+    write_tree(str(backup / ".P.installing"), {"partial": b"?"})
+
+    def cancel_immediately():
+        return True
+
+    with pytest.raises(enb_deploy.OperationCancelled):
+        enb_deploy.replace_tree(source, target, cancelled=cancel_immediately)
+    assert read_tree(target) == OLD
+    assert sorted(os.listdir(str(backup))) == ["P"]
+
+
+ENTRIES = ["enbseries", "enbseries.ini", "enblocal.ini"]
+
+
+class Crash(BaseException):
+    """模拟 MO2 在切换途中被强制结束：异常处理中的回滚和清理都不会执行"""
+
+
+@pytest.fixture
+def deployment(plugin, tmp_path):
+    from xingli import enb_deploy
+
+    game, state = str(tmp_path / "game"), str(tmp_path / "state")
+    old, new = str(tmp_path / "presets" / "Old"), str(tmp_path / "presets" / "New")
+    write_tree(old, OLD)
+    write_tree(new, NEW)
+    os.makedirs(game)
+    os.makedirs(state)
+    enb_deploy.deploy_preset(old, game, ENTRIES, state)
+    assert read_tree(game) == OLD
+    return enb_deploy, game, state, new
+
+
+def crash_during_commit(monkeypatch, enb_deploy, moves_before_crash):
+    original = enb_deploy._move
+    moves = []
+
+    def move(source, target):
+        if len(moves) == moves_before_crash:
+            raise Crash()
+        moves.append(source)
+        original(source, target)
+
+    def rollback(self, plan):
+        raise Crash()
+
+    monkeypatch.setattr(enb_deploy, "_move", move)
+    monkeypatch.setattr(enb_deploy._Transaction, "rollback", rollback)
+
+
+def test_failed_commit_rolls_back(deployment, monkeypatch):
+    enb_deploy, game, state, new = deployment
+    original = enb_deploy._move
+    moves = []
+
+    def failing_move(source, target):
+        moves.append(source)
+        if len(moves) == 3:
+            raise OSError("文件被占用")
+        original(source, target)
+
+    monkeypatch.setattr(enb_deploy, "_move", failing_move)
+    with pytest.raises(OSError):
+        enb_deploy.deploy_preset(new, game, ENTRIES, state)
+    monkeypatch.undo()
+    assert read_tree(game) == OLD
+    assert not os.path.exists(os.path.join(state, enb_deploy.JOURNAL_FILE_NAME))
+    assert not os.path.exists(os.path.join(state, enb_deploy.ROLLBACK_DIR_NAME))
+
+
+@pytest.mark.parametrize("moves_before_crash", [1, 3, 4])
+def test_crash_while_committing_is_rolled_back(deployment, monkeypatch, moves_before_crash):
+    enb_deploy, game, state, new = deployment
+    crash_during_commit(monkeypatch, enb_deploy, moves_before_crash)
+    with pytest.raises(Crash):
+        enb_deploy.deploy_preset(new, game, ENTRIES, state)
+    monkeypatch.undo()
+    assert enb_deploy.load_json(os.path.join(state, enb_deploy.JOURNAL_FILE_NAME))["state"] == "committing"
+    assert enb_deploy.recover_interrupted(game, state, ENTRIES) == "rolled_back"
+    assert read_tree(game) == OLD
+    assert enb_deploy.recover_interrupted(game, state, ENTRIES) is None
+
+
+def test_crash_after_commit_is_rolled_forward(deployment, monkeypatch):
+    enb_deploy, game, state, new = deployment
+    original = enb_deploy.save_json
+
+    def save_json(path, data):
+        if path.endswith(enb_deploy.DEPLOYED_RECORD_FILE_NAME):
+            raise Crash()
+        original(path, data)
+
+    monkeypatch.setattr(enb_deploy, "save_json", save_json)
+    with pytest.raises(Crash):
+        enb_deploy.deploy_preset(new, game, ENTRIES, state)
+    monkeypatch.undo()
+    assert enb_deploy.recover_interrupted(game, state, ENTRIES) == "rolled_forward"
+    assert read_tree(game) == NEW
+    # 记录已写入，再次部署同一预设不需要任何文件操作
+    assert enb_deploy.deploy_preset(new, game, ENTRIES, state).files_copied == 0
+
+
+def test_deploy_recovers_interrupted_switch_first(deployment, monkeypatch):
+    enb_deploy, game, state, new = deployment
+    crash_during_commit(monkeypatch, enb_deploy, 3)
+    with pytest.raises(Crash):
+        enb_deploy.deploy_preset(new, game, ENTRIES, state)
+    monkeypatch.undo()
+    stats = enb_deploy.deploy_preset(new, game, ENTRIES, state)
+    assert read_tree(game) == NEW
+    assert stats.files_copied == len(NEW)
+
+
+def test_deploy_refuses_to_discard_unrecoverable_rollback_area(deployment):
+    enb_deploy, game, state, new = deployment
+    saved = {"enbseries.ini": b"only copy of the old file"}
+    write_tree(os.path.join(state, enb_deploy.ROLLBACK_DIR_NAME), saved)
+    with open(os.path.join(state, enb_deploy.JOURNAL_FILE_NAME), 'w', encoding='utf-8') as f:
+        f.write("{not json")
+    with pytest.raises(RuntimeError):
+        enb_deploy.deploy_preset(new, game, ENTRIES, state)
+    assert read_tree(os.path.join(state, enb_deploy.ROLLBACK_DIR_NAME)) == saved
+    assert read_tree(game) == OLD
+
+
+@pytest.mark.parametrize("rel_path", ["enbseries.ini", "enbseries/effect.fx", "enbseries/common.fxh", "enbseries/readme.txt"])
+def test_editing_hardlinked_deployment_leaves_preset_untouched(plugin, tmp_path, rel_path):
+    from xingli import enb_deploy
+
+    preset, game, state = str(tmp_path / "preset"), str(tmp_path / "game"), str(tmp_path / "state")
+    files = {"d3d11.dll": b"dll", rel_path: b"original"}
+    write_tree(preset, files)
+    os.makedirs(game)
+    os.makedirs(state)
+    entries = ["d3d11.dll", rel_path.split("/", 1)[0]]
+    enb_deploy.deploy_preset(preset, game, entries, state, mode=enb_deploy.DEPLOY_MODE_HARDLINK)
+    assert os.path.samefile(os.path.join(preset, "d3d11.dll"), os.path.join(game, "d3d11.dll"))
+
+    with open(os.path.join(game, rel_path), 'r+b') as f: # 在游戏目录中原地编辑
+        f.write(b"tweaked")
+    deployed_from = read_tree(preset) # 还包含部署时生成的清单
+    assert {rel: deployed_from[rel] for rel in files} == files
+
+
+def test_editing_deployment_from_store_keeps_objects_intact(plugin, tmp_path):
+    from xingli import enb_deploy
+    from xingli.enb_store import EnbStore
+
+    source, game, state = str(tmp_path / "source"), str(tmp_path / "game"), str(tmp_path / "state")
+    write_tree(source, {"d3d11.dll": b"dll", "enbseries/effect.fx": b"original"})
+    os.makedirs(game)
+    os.makedirs(state)
+    store = EnbStore(str(tmp_path / "store"))
+    store.import_preset(source, "P")
+    entries = ["d3d11.dll", "enbseries"]
+    manifest = store.preset_manifest("P", entries)
+    enb_deploy.deploy_manifest(manifest, lambda rel: store.object_path(manifest[rel]["hash"]), game, entries, state,
+                               mode=enb_deploy.DEPLOY_MODE_HARDLINK)
+
+    with open(os.path.join(game, "enbseries", "effect.fx"), 'r+b') as f:
+        f.write(b"tweaked")
+    for info in manifest.values():
+        # 对象以哈希命名，内容必须仍与哈希一致
+        assert enb_deploy.hash_file(store.object_path(info["hash"])) == info["hash"]
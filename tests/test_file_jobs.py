@@ -0,0 +1,82 @@
+# coding=utf-8
+"""后台文件任务的引用保留到线程结束；关闭 ENB 窗口、退出 MO2 时取消任务且等待有上限"""
+
+import time
+import threading
+
+import pytest
+
+import harness
+
+
+@pytest.fixture
+def controller(plugin, qt_app, tmp_path):
+    from xingli import consolidation_controller as module
+
+    harness.ScriptedDialogs().install(module)
+    controller = module.ConsolidationController()
+    assert harness.open_enb_window(controller, str(tmp_path / "game"))
+    return controller
+
+
+def run_job(controller, work):
+    results = []
+    controller._run_enb_job(work, results.append, "失败", "已取消")
+    return controller._enb_job, results
+
+
+def test_job_reference_kept_until_thread_finished(controller):
+    seen = []
+    go = threading.Event()
+
+    def on_success(_result):
+        # 结果信号在线程结束之前发出，此时引用必须还在
+        seen.append(controller._enb_job is job)
+
+    controller._run_enb_job(lambda progress, cancelled: go.wait(5), on_success, "失败", "已取消")
+    job = controller._enb_job
+    go.set()
+    harness.wait_for_job(controller, 5000)
+    assert seen == [True]
+    assert controller._enb_job is None
+
+
+def test_quit_interrupts_and_waits_for_enb_job(controller):
+    started = threading.Event()
+
+    def work(progress, cancelled):
+        started.set()
+        while not cancelled():
+            time.sleep(0.01)
+        return "stopped"
+
+    job, results = run_job(controller, work)
+    assert started.wait(5)
+    controller._stop_background_work()
+    assert not job.isRunning()
+    assert job.isInterruptionRequested()
+
+
+def test_quit_wait_is_bounded(controller):
+    release = threading.Event()
+    job, _results = run_job(controller, lambda progress, cancelled: release.wait(10))
+    controller.QUIT_WAIT_MS = 100
+    started = time.perf_counter()
+    controller._stop_background_work()
+    assert time.perf_counter() - started < 2
+    release.set()
+    assert job.wait(5000)
+
+
+def test_closing_window_does_not_block_on_uncancellable_job(controller):
+    release = threading.Event()
+    job, results = run_job(controller, lambda progress, cancelled: release.wait(10))
+    controller.ENB_CLOSE_WAIT_MS = 100
+    started = time.perf_counter()
+    controller._on_enb_window_closed()
+    assert time.perf_counter() - started < 2
+    assert controller._enb_job is job # 任务在后台完成，引用保留到线程结束
+    release.set()
+    harness.wait_for_job(controller, 5000)
+    assert controller._enb_job is None
+    assert results == [True]
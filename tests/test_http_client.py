@@ -0,0 +1,69 @@
+# coding=utf-8
+"""熔断器按请求计数：重试中的每次失败不单独计数；半开试探请求意外结束时不会永久挡住主机"""
+
+import urllib.error
+
+import pytest
+
+import harness
+
+
+@pytest.fixture
+def http_client(plugin, monkeypatch):
+    from xingli import http_client
+
+    monkeypatch.setattr(http_client, "BACKOFF_BASE", 0.001) # 不真正等待退避
+    return http_client
+
+
+def fail(client, url):
+    with pytest.raises(urllib.error.URLError) as info:
+        client.get_bytes(url)
+    return info.value
+
+
+def test_breaker_counts_requests_not_attempts(http_client):
+    client = http_client.HttpClient(retries=3)
+    url = harness.unreachable_url("/manifest")
+    for _ in range(http_client.BREAKER_THRESHOLD - 1):
+        assert not isinstance(fail(client, url), http_client.CircuitOpenError)
+    assert client.requests_sent == 4 * (http_client.BREAKER_THRESHOLD - 1) # 每个请求都完整重试
+    fail(client, url) # 第 BREAKER_THRESHOLD 个失败的请求打开熔断器
+    assert isinstance(fail(client, url), http_client.CircuitOpenError)
+
+
+def busy(request):
+    request.send_response(503)
+    request.send_header("Content-Length", "0")
+    request.end_headers()
+
+
+def test_retry_statuses_count_once_per_request(http_client):
+    client = http_client.HttpClient(retries=2)
+    with harness.LocalServer({"/busy": busy}) as server:
+        for _ in range(http_client.BREAKER_THRESHOLD - 1):
+            assert getattr(fail(client, server.url("/busy")), "code", None) == 503
+        assert len(server.requests) == 3 * (http_client.BREAKER_THRESHOLD - 1)
+        breaker = client._breaker("127.0.0.1")
+        assert breaker.opened_at is None
+
+
+def test_unexpected_error_during_probe_releases_host(http_client, monkeypatch):
+    client = http_client.HttpClient(retries=0)
+    breaker = client._breaker("127.0.0.1")
+    breaker.failures = http_client.BREAKER_THRESHOLD
+    breaker.opened_at = 0 # 冷却早已结束，下一个请求是半开试探
+
+    def broken_send(*args):
+        raise RuntimeError("程序错误")
+
+    monkeypatch.setattr(client, "_send", broken_send)
+    with pytest.raises(RuntimeError):
+        client.get_bytes(harness.unreachable_url("/manifest"))
+    assert not breaker.probing
+    monkeypatch.undo()
+
+    body = b'{"plugin": {"version": "9.9.9"}}'
+    with harness.LocalServer({"/manifest": harness.static(body)}) as server:
+        assert client.get_bytes(server.url("/manifest")) == body
+    assert breaker.opened_at is None and breaker.failures == 0
@@ -0,0 +1,71 @@
+# coding=utf-8
+"""模组启用状态的修改批量提交，MO2 只在事件循环的下一轮刷新一次"""
+
+import pytest
+
+import harness
+
+
+@pytest.fixture
+def states(plugin, qt_app, tmp_path):
+    from xingli.mod_state import ModStateTransaction
+
+    mod_list = harness.FakeModList(["a", "b", "c"], active=["a"])
+    organizer = harness.FakeOrganizer(str(tmp_path / "mo2"), mod_list)
+    return ModStateTransaction(organizer), organizer, mod_list
+
+
+def test_commit_defers_and_coalesces_refresh(states):
+    transaction, organizer, mod_list = states
+    with transaction:
+        transaction.set_active("b", True)
+        transaction.set_active("c", True)
+    with transaction:
+        transaction.set_active("a", False)
+    assert mod_list.active == {"b", "c"}
+    assert organizer.refresh_calls == 0 # 提交时不阻塞在刷新上
+    harness.process_events()
+    assert organizer.refresh_calls == 1
+    harness.process_events()
+    assert organizer.refresh_calls == 1
+
+
+def test_nested_blocks_commit_once(states):
+    transaction, organizer, mod_list = states
+    with transaction:
+        transaction.set_active("b", True)
+        with transaction:
+            transaction.set_active("c", True)
+        assert mod_list.active == {"a"}
+    assert mod_list.set_active_calls == 1
+    harness.process_events()
+    assert organizer.refresh_calls == 1
+
+
+def test_set_active_outside_block_commits_immediately(states):
+    transaction, organizer, mod_list = states
+    transaction.set_active("b", True)
+    assert mod_list.active == {"a", "b"}
+    harness.process_events()
+    assert organizer.refresh_calls == 1
+
+
+def test_unchanged_state_does_not_refresh(states):
+    transaction, organizer, mod_list = states
+    with transaction:
+        transaction.set_active("a", True)
+        transaction.set_active("b", False)
+    harness.process_events()
+    assert mod_list.set_active_calls == 0
+    assert organizer.refresh_calls == 0
+
+
+def test_exception_discards_pending_changes(states):
+    transaction, organizer, mod_list = states
+    with pytest.raises(RuntimeError):
+        with transaction:
+            transaction.set_active("b", True)
+            raise RuntimeError()
+    harness.process_events()
+    assert mod_list.active == {"a"}
+    assert organizer.refresh_calls == 0
@@ -0,0 +1,100 @@
+# coding=utf-8
+"""排序同步后，排序中已安装模组的相对顺序和启用状态必须与服务器一致"""
+
+import random
+
+import pytest
+
+import harness
+
+
+def order_text(entries):
+    return "\n".join(("+" if enabled else "-") + name for name, enabled in entries)
+
+
+def assert_applied(mod_list, entries):
+    installed = set(mod_list.order)
+    expected = [name for name, _enabled in reversed(entries) if name in installed]
+    assert [name for name in mod_list.order if name in set(expected)] == expected
+    for name, enabled in entries:
+        if name in installed:
+            assert (name in mod_list.active) == enabled
+
+
+def mutate(rng, entries, pool):
+    """模拟服务器排序的一次更新：移动、增删、切换启用状态"""
+    entries = list(entries)
+    for _ in range(rng.randint(1, 8)):
+        action = rng.random()
+        if action < 0.5 and len(entries) > 1:
+            entry = entries.pop(rng.randrange(len(entries)))
+            entries.insert(rng.randrange(len(entries) + 1), entry)
+        elif action < 0.65:
+            unused = [name for name in pool if name not in {n for n, _e in entries}]
+            if unused:
+                entries.insert(rng.randrange(len(entries) + 1), (rng.choice(unused), rng.random() < 0.8))
+        elif action < 0.8 and len(entries) > 1:
+            entries.pop(rng.randrange(len(entries)))
+        elif entries:
+            index = rng.randrange(len(entries))
+            entries[index] = (entries[index][0], not entries[index][1])
+    return entries
+
+
+def shuffle_locally(rng, mod_list):
+    """用户在两次同步之间手动拖动了部分模组"""
+    for _ in range(rng.randint(0, 3)):
+        name = rng.choice(mod_list.order)
+        mod_list.setPriority(name, rng.randrange(len(mod_list.order)))
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_fuzzed_syncs_end_in_server_order(plugin, tmp_path, seed):
+    from xingli.order_sync import OrderSync
+
+    rng = random.Random(seed)
+    pool = [f"mod{i:02d}" for i in range(30)]
+    installed = rng.sample(pool, 24) + ["user_a", "user_b"] # 最后两个是用户自行添加的模组
+    rng.shuffle(installed)
+    mod_list = harness.FakeModList(installed, active=[name for name in installed if rng.random() < 0.5])
+    sync = OrderSync(str(tmp_path / "order_sync.json"))
+
+    entries = [(name, rng.random() < 0.8) for name in rng.sample(pool, 20)]
+    for _ in range(4):
+        assert sync.apply(order_text(entries), mod_list) is not None
+        assert_applied(mod_list, entries)
+        shuffle_locally(rng, mod_list)
+        previous = entries
+        while entries == previous:
+            entries = mutate(rng, previous, pool)
+
+
+def test_unchanged_order_is_skipped(plugin, tmp_path):
+    from xingli.order_sync import OrderSync
+
+    mod_list = harness.FakeModList(["a", "b", "c"])
+    sync = OrderSync(str(tmp_path / "order_sync.json"))
+    text = order_text([("c", True), ("b", True), ("a", False)])
+    result = sync.apply(text, mod_list)
+    assert result.toggled == 1
+    assert mod_list.order == ["a", "b", "c"] and result.moved == 0
+    calls = mod_list.set_priority_calls
+    assert sync.apply(text, mod_list) is None
+    assert mod_list.set_priority_calls == calls
+
+
+
+def test_check_order_updates_reports_unexpected_errors(plugin, qt_app, tmp_path):
+    from xingli import consolidation_controller as module
+
+    dialogs = harness.ScriptedDialogs().install(module)
+    controller = module.ConsolidationController()
+    controller.organizer = harness.FakeOrganizer(str(tmp_path / "mo2"))
+
+    class MalformedManifest:
+        def section(self, *args, **kwargs):
+            raise KeyError("order")
+
+    controller._remote_manifest = MalformedManifest()
+    controller.check_order_updates() # 异常不能逃出 Qt 槽函数
+    assert "下载新的排序失败" in dialogs.messages[-1][1]
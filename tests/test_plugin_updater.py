@@ -0,0 +1,158 @@
+# coding=utf-8
+"""插件更新包和增量更新文件的下载在连接中断后从断点续传，安装时保留本地的 version.ini"""
+
+import hashlib
+import io
+import os
+import zipfile
+
+import pytest
+
+import harness
+
+
+def make_package(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for name, data in files.items():
+            archive.writestr("xingli/" + name, data)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def updater(plugin, monkeypatch):
+    from xingli import plugin_updater
+
+    sleeps = []
+    monkeypatch.setattr(plugin_updater.time, "sleep", sleeps.append) # 不真正等待退避
+    target = os.path.dirname(plugin.__file__)
+    with open(os.path.join(target, "version.ini"), 'w', encoding='utf-8') as f:
+        f.write("[Version]\nversion = 1.0.0\n")
+    return plugin_updater.PluginUpdater(target), target, sleeps
+
+
+def test_dropped_download_resumes_and_keeps_version_ini(updater):
+    updater, target, sleeps = updater
+    payload = os.urandom(1024 * 1024)
+    package = make_package({"payload.bin": payload, "version.ini": b"[Version]\nversion = 9.9.9\n"})
+    with harness.LocalServer({"/update.zip": harness.ranged(package, drops=3)}) as server:
+        changed, downloaded, _saved = updater.apply_update(server.url("/update.zip"), hashlib.sha256(package).hexdigest())
+
+    assert len(server.requests) == 4 # 三次中断，每次都从已下载的位置继续
+    ranges = [headers.get("Range") for _method, _path, headers in server.requests]
+    assert ranges[0] is None and all(r and r.startswith("bytes=") for r in ranges[1:])
+    offsets = [int(r[len("bytes="):].rstrip("-")) for r in ranges[1:]]
+    assert offsets == sorted(offsets) and offsets[0] > 0
+    assert len(sleeps) == 3
+    assert downloaded == len(package)
+
+    assert changed == ["payload.bin"]
+    with open(os.path.join(target, "payload.bin"), 'rb') as f:
+        assert f.read() == payload
+    with open(os.path.join(target, "version.ini"), encoding='utf-8') as f:
+        assert "1.0.0" in f.read()
+    assert not os.path.exists(updater.part_path)
+
+
+def test_checksum_mismatch_discards_download(updater):
+    from xingli.plugin_updater import UpdateError
+
+    updater, target, _sleeps = updater
+    package = make_package({"payload.bin": b"x" * 1000})
+    with harness.LocalServer({"/update.zip": harness.ranged(package, drops=1)}) as server:
+        with pytest.raises(UpdateError):
+            updater.download(server.url("/update.zip"), "0" * 64)
+    assert not os.path.exists(updater.part_path)
+    assert not os.path.exists(os.path.join(target, "payload.bin"))
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def write(target, rel_path, data):
+    with open(os.path.join(target, rel_path), 'wb') as f:
+        f.write(data)
+
+
+def read(target, rel_path):
+    with open(os.path.join(target, rel_path), 'rb') as f:
+        return f.read()
+
+
+def file_list(files):
+    return {rel_path: {"sha256": sha256(data), "size": len(data)} for rel_path, data in files.items()}
+
+
+def test_delta_update_downloads_only_changed_files(updater):
+    from xingli.plugin_updater import DELTA_DIR_NAME
+
+    updater, target, _sleeps = updater
+    write(target, "same.py", b"unchanged")
+    write(target, "changed.py", b"old")
+    remote = {
+        "same.py": b"unchanged",
+        "changed.py": b"new" * 1000,
+        "added.py": b"added" * 1000,
+        "version.ini": b"[Version]\nversion = 9.9.9\n",
+    }
+    routes = {"/files/" + rel_path: harness.ranged(data) for rel_path, data in remote.items()}
+    with harness.LocalServer(routes) as server:
+        changed, downloaded, saved = updater.apply_update(
+            server.url("/update.zip"), "0" * 64, file_list(remote), server.url("/files")
+        )
+
+    assert sorted(changed) == ["added.py", "changed.py"]
+    assert sorted(path for _method, path, _headers in server.requests) == ["/files/added.py", "/files/changed.py"]
+    assert downloaded == len(remote["changed.py"]) + len(remote["added.py"])
+    assert saved == sum(len(data) for data in remote.values()) - downloaded
+    assert read(target, "changed.py") == remote["changed.py"]
+    assert read(target, "added.py") == remote["added.py"]
+    assert b"1.0.0" in read(target, "version.ini") # 清单中的本地状态文件不下载、不覆盖
+    assert not os.path.exists(os.path.join(target, DELTA_DIR_NAME))
+
+
+def test_cancelled_delta_download_resumes(updater):
+    from xingli.plugin_updater import OperationCancelled
+
+    updater, target, _sleeps = updater
+    remote = {"payload.bin": os.urandom(1024 * 1024)}
+    received = []
+    with harness.LocalServer({"/files/payload.bin": harness.ranged(remote["payload.bin"])}) as server:
+        # 收到第一块数据后取消，模拟用户取消或 MO2 在下载途中退出
+        with pytest.raises(OperationCancelled):
+            updater.install_delta(
+                file_list(remote), server.url("/files"),
+                progress=lambda *args: received.append(args), cancelled=lambda: bool(received)
+            )
+        changed, downloaded = updater.install_delta(file_list(remote), server.url("/files"))
+
+    ranges = [headers.get("Range") for _method, _path, headers in server.requests]
+    assert ranges[0] is None
+    offset = int(ranges[1][len("bytes="):].rstrip("-"))
+    assert offset > 0 # 第二次从第一次中断的位置继续
+    assert downloaded == len(remote["payload.bin"]) - offset
+    assert changed == ["payload.bin"]
+    assert read(target, "payload.bin") == remote["payload.bin"]
+
+
+def test_failed_delta_falls_back_to_full_package(updater):
+    from xingli.plugin_updater import DELTA_DIR_NAME
+
+    updater, target, _sleeps = updater
+    payload = b"payload" * 1000
+    package = make_package({"payload.bin": payload, "version.ini": b"[Version]\nversion = 9.9.9\n"})
+    routes = {
+        "/files/payload.bin": harness.ranged(b"corrupted" * 1000), # 与清单中的校验值不符
+        "/update.zip": harness.ranged(package),
+    }
+    with harness.LocalServer(routes) as server:
+        changed, downloaded, saved = updater.apply_update(
+            server.url("/update.zip"), sha256(package), file_list({"payload.bin": payload}), server.url("/files")
+        )
+
+    assert changed == ["payload.bin"]
+    assert (downloaded, saved) == (len(package), 0)
+    assert read(target, "payload.bin") == payload
+    assert b"1.0.0" in read(target, "version.ini")
+    assert not os.path.exists(os.path.join(target, DELTA_DIR_NAME))
@@ -0,0 +1,43 @@
+# coding=utf-8
+"""分辨率设置窗口：SSEDisplayTweaks.ini 缺失和无法读取时给出不同的提示"""
+
+import os
+
+import pytest
+
+import harness
+
+
+@pytest.fixture
+def setup(plugin, qt_app, tmp_path):
+    from xingli import consolidation_controller as module
+
+    dialogs = harness.ScriptedDialogs().install(module)
+    controller = module.ConsolidationController()
+    controller.organizer = harness.FakeOrganizer(str(tmp_path / "mo2"))
+    ini_path = os.path.join(controller.organizer.modsPath(), "显示修复-SSE Display Tweaks", "SKSE", "Plugins", "SSEDisplayTweaks.ini")
+    return controller, dialogs, ini_path
+
+
+def test_missing_ini_reports_missing_mod(setup):
+    controller, dialogs, _ini_path = setup
+    assert controller._refresh_resolution_window() is False
+    title, text = dialogs.messages[-1]
+    assert title == "文件未找到"
+    assert "请确认已安装SSE Display Tweaks模组" in text
+
+
+def test_unreadable_ini_reports_config_error(setup, monkeypatch):
+    from xingli import ini_editor
+
+    controller, dialogs, ini_path = setup
+    os.makedirs(os.path.dirname(ini_path))
+    with open(ini_path, 'w', encoding='utf-8') as f:
+        f.write("[Render]\nResolution=1920x1080\n")
+
+    def load(path):
+        raise PermissionError(f"文件被占用: {path}")
+
+    monkeypatch.setattr(ini_editor.IniDocument, "load", staticmethod(load))
+    assert controller._refresh_resolution_window() is False
+    assert dialogs.messages[-1][0] == "配置文件错误"
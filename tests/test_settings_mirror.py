@@ -0,0 +1,23 @@
+# coding=utf-8
+"""等待合并的设置同步在 MO2 退出时必须写入 overwrite 目录"""
+
+import harness
+
+
+def test_pending_mirrors_are_flushed_on_quit(plugin, qt_app, tmp_path):
+    from xingli.consolidation_controller import ConsolidationController
+
+    controller = ConsolidationController()
+    controller.PLUGIN_MANIFEST_URL = harness.unreachable_url("/manifest")
+    controller.PLUGIN_VERSION_URL = harness.unreachable_url("/version")
+    assert controller.init(harness.FakeOrganizer(str(tmp_path / "mo2")))
+
+    source = tmp_path / "SSEDisplayTweaks.ini"
+    source.write_text("[Render]\nResolution=2560x1440\n", encoding="utf-8")
+    target = tmp_path / "overwrite" / "SKSE" / "Plugins" / "SSEDisplayTweaks.ini"
+    controller._schedule_settings_mirror(str(source), str(target))
+    assert not target.exists() # 仍在等待合并
+
+    qt_app.aboutToQuit.emit()
+    assert target.read_text(encoding="utf-8") == source.read_text(encoding="utf-8")
+    assert not controller._mirror_timer.isActive()
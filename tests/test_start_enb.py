@@ -0,0 +1,73 @@
+# coding=utf-8
+"""应用 ENB 时以清单哈希判断是否需要部署：预设被原地修改后必须重新部署"""
+
+import os
+
+import pytest
+
+import harness
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def patch_in_place(path, offset, data):
+    """同样大小的原地修改，所在目录的修改时间不变"""
+    st = os.stat(path)
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+    # 文件系统时间戳精度有限，确保修改时间确实变化（真实编辑发生在很久以后）
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+@pytest.fixture
+def enb_setup(plugin, qt_app, tmp_path):
+    from xingli import consolidation_controller as module
+
+    dialogs = harness.ScriptedDialogs().install(module)
+    game_path = str(tmp_path / "game")
+    preset = os.path.join(game_path, "ENB备份", "P")
+    write_file(os.path.join(preset, "enbseries.ini"), b"a" * 8000) # 4~12 KB，抽样只读取开头 4 KB
+    write_file(os.path.join(preset, "enbseries", "effect.fx"), b"effect v1")
+    write_file(os.path.join(preset, "d3d11.dll"), b"dll")
+
+    controller = module.ConsolidationController()
+    assert harness.open_enb_window(controller, game_path)
+
+    def apply():
+        controller.enb_list.select("P") # 刷新列表会清除选中项
+        controller.start_enb()
+        harness.wait_for_job(controller, 5000)
+        return dialogs.last()
+
+    return controller, game_path, preset, apply
+
+
+def test_in_place_preset_edits_are_redeployed(enb_setup):
+    controller, game_path, preset, apply = enb_setup
+    assert "成功部署" in apply()
+    assert controller.enb_index.active == "P"
+    assert "无需重新应用" in apply()
+
+    patch_in_place(os.path.join(preset, "enbseries.ini"), 6000, b"bbb")
+    patch_in_place(os.path.join(preset, "enbseries", "effect.fx"), 7, b"v2")
+    assert "成功部署" in apply()
+    assert read_file(os.path.join(game_path, "enbseries.ini")) == read_file(os.path.join(preset, "enbseries.ini"))
+    assert read_file(os.path.join(game_path, "enbseries", "effect.fx")) == b"effect v2"
+
+
+def test_edits_in_game_directory_are_reverted(enb_setup):
+    controller, game_path, preset, apply = enb_setup
+    apply()
+    patch_in_place(os.path.join(game_path, "enbseries.ini"), 6000, b"bbb")
+    assert "成功部署" in apply()
+    assert read_file(os.path.join(game_path, "enbseries.ini")) == b"a" * 8000
@@ -0,0 +1,123 @@
+# coding=utf-8
+"""
+init() 在服务器快速、缓慢、不可达时都应立即返回；MO2 退出时版本探测线程应及时结束。
+导入插件和 init 时不在主线程导入网络、ENB 部署、教程等模块（耗时只在 benchmarks/startup.py 中测量）。
+"""
+
+import sys
+import json
+import time
+
+import pytest
+
+import harness
+
+
+INIT_BUDGET_SECONDS = 0.5 # 远大于正常耗时，只用于发现 init 被网络请求阻塞
+
+
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def make_controller(plugin, tmp_path, manifest_url, version_url):
+    from xingli.consolidation_controller import ConsolidationController
+
+    controller = ConsolidationController()
+    controller.PLUGIN_MANIFEST_URL = manifest_url
+    controller.PLUGIN_VERSION_URL = version_url
+    controller.PLUGIN_CHANGELOG_URL = version_url
+    organizer = harness.FakeOrganizer(str(tmp_path / "mo2"))
+    return controller, organizer
+
+
+def timed_init(controller, organizer):
+    started = time.perf_counter()
+    assert controller.init(organizer)
+    return time.perf_counter() - started
+
+
+def quit_and_measure(app, controller):
+    started = time.perf_counter()
+    app.aboutToQuit.emit()
+    return time.perf_counter() - started
+
+
+def test_init_with_fast_server_fills_version(plugin, qt_app, tmp_path):
+    manifest = json.dumps({"plugin": {"version": "9.9.9"}})
+    with harness.LocalServer({"/manifest": harness.static(manifest)}) as server:
+        controller, organizer = make_controller(plugin, tmp_path, server.url("/manifest"), server.url("/version"))
+        assert timed_init(controller, organizer) < INIT_BUDGET_SECONDS
+        assert wait_until(lambda: controller.server_version == "9.9.9", 5)
+        quit_and_measure(qt_app, controller)
+
+
+def test_init_with_slow_server_returns_and_quits_promptly(plugin, qt_app, tmp_path):
+    manifest = json.dumps({"plugin": {"version": "9.9.9"}})
+    with harness.LocalServer({"/manifest": harness.static(manifest, delay=3)}) as server:
+        controller, organizer = make_controller(plugin, tmp_path, server.url("/manifest"), server.url("/version"))
+        assert timed_init(controller, organizer) < INIT_BUDGET_SECONDS
+        assert wait_until(lambda: server.requests, 2) # 探测请求已发出，正在等待响应
+        assert quit_and_measure(qt_app, controller) < 1.5
+        assert not controller._version_probe.isRunning()
+        assert controller.server_version is None
+
+
+@pytest.mark.parametrize("delay", [0, 0.3])
+def test_init_with_unreachable_server_returns_and_quits_promptly(plugin, qt_app, tmp_path, delay):
+    controller, organizer = make_controller(
+        plugin, tmp_path, harness.unreachable_url("/manifest"), harness.unreachable_url("/version")
+    )
+    assert timed_init(controller, organizer) < INIT_BUDGET_SECONDS
+    time.sleep(delay) # 退出时探测线程可能正在重试或退避等待
+    assert quit_and_measure(qt_app, controller) < 1.5
+    assert not controller._version_probe.isRunning()
+
+
+# 第一次使用时才导入的插件模块；网络模块由版本探测线程在后台导入
+DEFERRED_MODULES = (
+    "http_client", "metadata_cache", "remote_manifest", "plugin_updater", "prefetch",
+    "enb_deploy", "enb_store", "enb_index", "copy_engine", "settings_sync", "ini_editor",
+    "order_sync", "game_path", "tutorial_index",
+) # tutorial_data 在测试中是 load_plugin 预先放入 sys.modules 的替身，不检查
+
+
+def test_init_does_not_import_deferred_modules(plugin, qt_app, tmp_path, monkeypatch):
+    from xingli import consolidation_controller as module
+
+    probes = []
+    monkeypatch.setattr(module.VersionProbeThread, "start", lambda thread: probes.append(thread))
+    controller, organizer = make_controller(
+        plugin, tmp_path, harness.unreachable_url("/manifest"), harness.unreachable_url("/version")
+    )
+    assert controller.init(organizer)
+    controller.settings()
+    assert len(probes) == 1 # 版本探测照常启动（这里不真正运行，以便检查主线程导入了什么）
+    loaded = [name for name in DEFERRED_MODULES if f"{plugin.__name__}.{name}" in sys.modules]
+    assert loaded == []
+
+
+def test_setting_defaults_match_modules(plugin):
+    from xingli.consolidation_controller import ConsolidationController
+    from xingli.copy_engine import DEFAULT_WORKERS
+    from xingli.enb_deploy import DEPLOY_MODE_COPY
+    from xingli.settings_sync import DEFAULT_BACKUP_COUNT
+
+    assert ConsolidationController.DEFAULT_COPY_WORKERS == DEFAULT_WORKERS
+    assert ConsolidationController.DEFAULT_ENB_DEPLOY_MODE == DEPLOY_MODE_COPY
+    assert ConsolidationController.DEFAULT_SETTINGS_BACKUP_COUNT == DEFAULT_BACKUP_COUNT
+
+
+def test_http_client_created_after_quit_is_closed(plugin):
+    from xingli.consolidation_controller import ConsolidationController
+
+    controller = ConsolidationController()
+    controller._stop_background_work()
+    assert controller._http_client is None
+    # 版本探测线程在退出之后才第一次访问网络时，不应再发出请求
+    assert controller.http_client._closed.is_set()
@@ -0,0 +1,45 @@
+# coding=utf-8
+"""教程搜索：按名称子串和拼音首字母匹配；只有安装了 pypinyin 时才提示全拼搜索"""
+
+import harness
+
+
+def test_search_matches_name_substrings(plugin):
+    from xingli.tutorial_index import TutorialIndex, ALL_CATEGORIES
+
+    index = TutorialIndex(harness.make_catalog(3, 40))
+    ids = index.search("画质", ALL_CATEGORIES)
+    assert ids and all("画质" in index.entries[i][0] for i in ids)
+    assert index.search("ＥＮＢ", "分类0") == index.search("enb", "分类0") # 全角和大小写统一
+
+
+def test_placeholder_follows_pinyin_support(plugin, monkeypatch):
+    from xingli import tutorial_index
+
+    monkeypatch.setattr(tutorial_index, "PINYIN_SEARCH", False)
+    assert "、拼音" not in tutorial_index.search_placeholder()
+    assert "首字母" in tutorial_index.search_placeholder()
+    monkeypatch.setattr(tutorial_index, "PINYIN_SEARCH", True)
+    assert "、拼音" in tutorial_index.search_placeholder()
+
+
+def test_builtin_initials_cover_common_characters(plugin):
+    from xingli.tutorial_index import initials
+
+    assert initials("安装指南") == "azzn"
+    assert initials("画质优化") == "hzyh"
+    assert initials("天际模组排序") == "tjmzpx"
+    assert initials("ENB 存档 3") == "ENB cd 3" # 非汉字保持不变
+    assert initials("亍") == "亍" # 二级汉字没有内置首字母
+
+
+def test_initials_search_without_pypinyin(plugin, monkeypatch):
+    from xingli import tutorial_index
+
+    monkeypatch.setattr(tutorial_index, "lazy_pinyin", None) # MO2 自带的 Python 没有 pypinyin
+    index = tutorial_index.TutorialIndex({"分类0": [
+        {"name": "ENB安装指南", "url": "https://example.invalid/1"},
+        {"name": "画质优化教程", "url": "https://example.invalid/2"},
+    ]})
+    assert [index.entries[i][0] for i in index.search("azzn")] == ["ENB安装指南"]
+    assert [index.entries[i][0] for i in index.search("HZYH")] == ["画质优化教程"]
@@ -0,0 +1,243 @@
+# coding=utf-8
+
+import os
+import json
+import time
+import functools
+import threading
+
+
+DEFAULT_MAX_BYTES = 1024 * 1024 # 单个日志文件的大小上限
+DEFAULT_BACKUP_COUNT = 3 # 轮换保留的旧日志数量
+REGRESSION_RATIO = 1.25 # p95 比上一版本慢这么多倍时视为性能回退
+REGRESSION_MIN_MS = 5.0 # 忽略 p95 低于此值的操作，避免计时噪声
+
+
+def percentile(sorted_values, q):
+    """已排序数据的 q 分位数（最近秩），数据为空时返回 None"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def compare_summaries(baseline, current, ratio=REGRESSION_RATIO, min_ms=REGRESSION_MIN_MS):
+    """比较两份汇总，返回 p95 变慢的操作 {操作: (基准 p95, 当前 p95)}"""
+    regressions = {}
+    for name, stats in current.items():
+        before = (baseline.get(name) or {}).get("p95_ms")
+        after = stats.get("p95_ms")
+        if before is None or after is None or after < min_ms:
+            continue
+        if after > max(before, min_ms) * ratio:
+            regressions[name] = (before, after)
+    return regressions
+
+
+class _NullSpan:
+    """关闭追踪时使用的空操作 span"""
+
+    def add(self, key, value=1):
+        pass
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一次操作的计时；add / set 记录处理的文件数、字节数、网络耗时等附加字段"""
+
+    def __init__(self, tracer, name, fields):
+        self.tracer = tracer
+        self.name = name
+        self.fields = fields
+        self._started = None
+
+    def add(self, key, value=1):
+        self.fields[key] = self.fields.get(key, 0) + value
+
+    def set(self, key, value):
+        self.fields[key] = value
+
+    def __enter__(self):
+        self.tracer._push(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = (time.perf_counter() - self._started) * 1000
+        self.tracer._pop(self)
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        self.tracer.record(self.name, elapsed, **self.fields)
+        return False
+
+
+class Tracer:
+    """
+    热点操作的计时追踪，结果以 JSON Lines 追加到本地日志文件，按大小轮换。
+
+    关闭时 span() 返回共享的空操作对象，不计时也不写文件；
+    current() 返回当前线程最内层的 span，供网络请求等底层代码附加耗时。
+    """
+
+    def __init__(self, log_path, enabled=False, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+        self.log_path = log_path
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.backup_count = max(0, backup_count)
+        self._lock = threading.Lock() # 后台任务线程与主线程会同时写入
+        self._local = threading.local()
+        self.base_fields = {} # 写入每条记录的公共字段，如插件版本
+
+    def span(self, name, **fields):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, fields)
+
+    def current(self):
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else NULL_SPAN
+
+    def _push(self, span):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+
+    def _pop(self, span):
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+
+    def record(self, name, elapsed_ms, **fields):
+        """记录一条已经测得耗时的操作"""
+        if not self.enabled:
+            return
+        entry = {"ts": round(time.time(), 3), "op": name, "ms": round(elapsed_ms, 2)}
+        entry.update(self.base_fields)
+        entry.update(fields)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                self._rotate_if_needed(len(line.encode('utf-8')))
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"写入追踪日志失败: {e}")
+
+    def log_paths(self):
+        """从新到旧排列的日志文件路径"""
+        return [self.log_path] + [f"{self.log_path}.{i}" for i in range(1, self.backup_count + 1)]
+
+    def _rotate_if_needed(self, incoming):
+        try:
+            size = os.path.getsize(self.log_path)
+        except OSError:
+            return
+        if size + incoming <= self.max_bytes:
+            return
+        paths = self.log_paths()
+        if len(paths) == 1:
+            os.remove(self.log_path)
+            return
+        for i in range(len(paths) - 1, 0, -1):
+            if os.path.exists(paths[i - 1]):
+                os.replace(paths[i - 1], paths[i])
+
+    def records(self):
+        """按时间顺序读取所有日志文件中的记录，跳过损坏的行"""
+        with self._lock:
+            paths = [path for path in reversed(self.log_paths()) if os.path.exists(path)]
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def summary(self, records=None, version=None):
+        """{操作: {"count", "p50_ms", "p95_ms", "max_ms"}}；指定 version 时只统计该插件版本的记录"""
+        durations = {}
+        for entry in self.records() if records is None else records:
+            if version is not None and entry.get("version") != version:
+                continue
+            if "op" in entry and "ms" in entry:
+                durations.setdefault(entry["op"], []).append(entry["ms"])
+        result = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "max_ms": values[-1],
+            }
+        return result
+
+    def save_summary(self, path, version):
+        """
+        把 version 的汇总写入 path（{版本: {"saved_at", "ops"}}），
+        返回与之前最近保存的其他版本相比变慢的操作。
+        """
+        summary = self.summary(version=version)
+        if not summary:
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+            if not isinstance(history, dict):
+                history = {}
+        except FileNotFoundError:
+            history = {}
+        except Exception as e:
+            print(f"读取性能汇总失败，将重新建立: {e}")
+            history = {}
+        others = [entry for name, entry in history.items() if name != version and isinstance(entry, dict)]
+        baseline = max(others, key=lambda entry: entry.get("saved_at", 0)) if others else None
+        history[version] = {"saved_at": round(time.time(), 3), "ops": summary}
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(history, f, ensure_ascii=False, indent=1)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"写入性能汇总失败: {e}")
+        return compare_summaries(baseline.get("ops", {}), summary) if baseline else {}
+
+    def format_summary(self, summary=None):
+        """汇总的文本表格，用于在窗口或日志中显示"""
+        summary = self.summary() if summary is None else summary
+        if not summary:
+            return "没有追踪记录。"
+        width = max(len(name) for name in summary)
+        lines = [f"{'操作':<{width}}  {'次数':>6}  {'p50(ms)':>9}  {'p95(ms)':>9}  {'最大(ms)':>9}"]
+        for name, stats in summary.items():
+            lines.append(
+                f"{name:<{width}}  {stats['count']:>6}  {stats['p50_ms']:>9.1f}  {stats['p95_ms']:>9.1f}  {stats['max_ms']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+def traced(name):
+    """用 self.tracer 追踪方法的耗时；追踪关闭时直接调用原方法"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            tracer = self.tracer
+            if not tracer.enabled:
+                return func(self, *args, **kwargs)
+            with Span(tracer, name, {}):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,178 @@
+# coding=utf-8
+
+import bisect
+import unicodedata
+
+try:
+    from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+except ImportError:
+    from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+
+try:
+    from pypinyin import lazy_pinyin, Style # 可选依赖，用于拼音和首字母搜索
+except ImportError:
+    lazy_pinyin = None
+
+
+ALL_CATEGORIES = None # search 的 category 参数为 None 时搜索所有分类
+PINYIN_SEARCH = lazy_pinyin is not None # MO2 不自带 pypinyin，未安装时只支持内置的常用字首字母搜索
+
+# GB2312 一级汉字（3755 个常用字）按拼音排序：每个首字母在一级汉字区中的起始编码。
+# 不依赖 pypinyin 即可得到常用字的首字母；二级汉字按部首排序，无法这样得到，保持原字
+_GB2312_INITIAL_STARTS = (
+    0xB0A1, 0xB0C5, 0xB2C1, 0xB4EE, 0xB6EA, 0xB7A2, 0xB8C1, 0xB9FE, 0xBBF7, 0xBFA6, 0xC0AC, 0xC2E8,
+    0xC4C3, 0xC5B6, 0xC5BE, 0xC6DA, 0xC8BB, 0xC8F6, 0xCBFA, 0xCDDA, 0xCEF4, 0xD1B9, 0xD4D1,
+)
+_GB2312_INITIALS = "abcdefghjklmnopqrstwxyz" # 没有以 i、u、v 开头的拼音
+_GB2312_LEVEL1_END = 0xD7F9
+
+
+def search_placeholder():
+    """搜索框的提示文字，只提到确实支持的搜索方式"""
+    if PINYIN_SEARCH:
+        return "输入关键词、拼音或首字母搜索教程..."
+    return "输入关键词或拼音首字母搜索教程..."
+
+
+def initials(text):
+    """把常用汉字替换为拼音首字母，其余字符保持不变"""
+    result = []
+    for char in text:
+        try:
+            encoded = char.encode("gb2312")
+        except UnicodeEncodeError:
+            result.append(char)
+            continue
+        code = int.from_bytes(encoded, "big")
+        if len(encoded) == 2 and _GB2312_INITIAL_STARTS[0] <= code <= _GB2312_LEVEL1_END:
+            result.append(_GB2312_INITIALS[bisect.bisect_right(_GB2312_INITIAL_STARTS, code) - 1])
+        else:
+            result.append(char)
+    return "".join(result)
+
+
+def normalize(text):
+    """统一全角/半角和大小写，去掉空白"""
+    return "".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def _search_keys(name):
+    """教程名称的可搜索形式：名称本身和首字母，安装了 pypinyin 时还有全拼"""
+    keys = [normalize(name)]
+    if lazy_pinyin is not None:
+        keys.append(normalize("".join(lazy_pinyin(name))))
+        keys.append(normalize("".join(lazy_pinyin(name, style=Style.FIRST_LETTER))))
+    else:
+        keys.append(normalize(initials(name)))
+    return keys
+
+
+class TutorialIndex:
+    """
+    从 TUTORIAL_CATEGORIES 一次性构建的教程索引。
+
+    entries 为 [(名称, URL, 分类)]；名称 -> URL 使用字典查找；
+    搜索使用单字和双字 n-gram 倒排索引，先求候选集合再逐个确认子串匹配。
+    """
+
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self.entries = []
+        self.urls = {}
+        self._keys = []
+        self._by_category = {}
+        self._grams = {} # n-gram -> {条目编号}
+        for category, tutorials in categories.items():
+            ids = self._by_category.setdefault(category, [])
+            for tutorial in tutorials:
+                entry_id = len(self.entries)
+                self.entries.append((tutorial["name"], tutorial["url"], category))
+                self.urls.setdefault(tutorial["name"], tutorial["url"])
+                keys = _search_keys(tutorial["name"])
+                self._keys.append(keys)
+                ids.append(entry_id)
+                for key in keys:
+                    for gram in self._key_grams(key):
+                        self._grams.setdefault(gram, set()).add(entry_id)
+
+    @staticmethod
+    def _key_grams(key):
+        grams = set(key)
+        grams.update(key[i:i + 2] for i in range(len(key) - 1))
+        return grams
+
+    def url_for(self, name):
+        return self.urls.get(name)
+
+    def search(self, query, category=ALL_CATEGORIES):
+        """返回匹配的条目编号，名称以关键词开头的排在前面"""
+        ids = self._by_category.get(category, []) if category is not ALL_CATEGORIES else range(len(self.entries))
+        query = normalize(query)
+        if not query:
+            return list(ids)
+
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(self._grams.get(g, ()))):
+            postings = self._grams.get(gram)
+            if not postings:
+                return []
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        if category is not ALL_CATEGORIES:
+            candidates &= set(ids)
+
+        prefix = []
+        contains = []
+        for entry_id in sorted(candidates):
+            keys = self._keys[entry_id]
+            if any(key.startswith(query) for key in keys):
+                prefix.append(entry_id)
+            elif any(query in key for key in keys):
+                contains.append(entry_id)
+        return prefix + contains
+
+
+class TutorialListModel(QAbstractListModel):
+    """索引中所有教程的列表模型；显示名称，提示分类，UserRole 为 URL"""
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index_data = index
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.index_data.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name, url, category = self.index_data.entries[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.ToolTipRole:
+            return f"{category}\n{url}"
+        if role == Qt.UserRole:
+            return url
+        return None
+
+
+class TutorialFilterProxy(QSortFilterProxyModel):
+    """按索引搜索结果过滤并排序，不在每次输入时重新创建列表项"""
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index_data = index
+        self._rank = {entry_id: entry_id for entry_id in range(len(index.entries))}
+
+    def set_filter(self, query, category=ALL_CATEGORIES):
+        matches = self.index_data.search(query, category)
+        self._rank = {entry_id: rank for rank, entry_id in enumerate(matches)}
+        self.invalidate()
+        self.sort(0)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return source_row in self._rank
+
+    def lessThan(self, left, right):
+        return self._rank.get(left.row(), 0) < self._rank.get(right.row(), 0)